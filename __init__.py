@@ -1,12 +1,18 @@
 from .rule_peak_hours import is_peak_hour, get_peak_hour_multiplier
 from .rule_availability import check_availability
 from .rule_pricing import calculate_price
-from .rule_validation import validate_booking
+from .rule_validation import validate_booking, validate_bookings, compile_working_hours
+from .dynamic_rules import CompiledRules, Decision, DynamicRuleEngine
 
 __all__ = [
     'is_peak_hour',
     'get_peak_hour_multiplier',
     'check_availability',
     'calculate_price',
-    'validate_booking'
+    'validate_booking',
+    'validate_bookings',
+    'compile_working_hours',
+    'CompiledRules',
+    'Decision',
+    'DynamicRuleEngine'
 ] 
\ No newline at end of file
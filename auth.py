@@ -1,9 +1,21 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..services.auth_service import register_user, authenticate_user, refresh_token
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from ..services.auth_service import register_user, authenticate_user, refresh_token, logout_user
+from ..services.password_hasher import HashingPoolSaturated
 
 bp = Blueprint('auth', __name__)
 
+def _busy_response():
+    """
+    Fail fast while password hashing is saturated
+    """
+    response = jsonify({
+        'success': False,
+        'message': 'Service busy. Please try again shortly'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @bp.route('/register', methods=['POST'])
 def register():
     """
@@ -42,6 +54,8 @@ def register():
             }
         }), 201
         
+    except HashingPoolSaturated:
+        return _busy_response()
     except Exception as e:
         return jsonify({
             'success': False,
@@ -81,6 +95,8 @@ def login():
             'tokens': tokens
         })
         
+    except HashingPoolSaturated:
+        return _busy_response()
     except Exception as e:
         return jsonify({
             'success': False,
@@ -91,13 +107,14 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     """
-    Refresh access token using refresh token
+    Refresh access token using refresh token; the refresh token is rotated
     """
     try:
         current_user_id = get_jwt_identity()
+        claims = get_jwt()
         
         # Refresh token
-        success, message, token = refresh_token(current_user_id)
+        success, message, token = refresh_token(current_user_id, claims['jti'], claims['exp'])
         
         if not success:
             return jsonify({
@@ -111,6 +128,35 @@ def refresh():
             'token': token
         })
         
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """
+    Revoke the presented token and, if given, the refresh token
+    """
+    try:
+        claims = get_jwt()
+        data = request.get_json(silent=True) or {}
+        
+        success, message = logout_user(claims['jti'], claims['exp'], data.get('refresh_token'))
+        
+        if not success:
+            return jsonify({
+                'success': False,
+                'message': message
+            }), 400
+            
+        return jsonify({
+            'success': True,
+            'message': message
+        })
+        
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1,8 +1,10 @@
 from datetime import timedelta
-from flask_jwt_extended import create_access_token, create_refresh_token
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
 from ..models.postgresql.models import User, db
 from .logging_service import log_event
+from .password_hasher import HashingPoolSaturated, hash_password, verify_password
+from .user_email_index import user_email_index
+from .jwt_service import revocation_list
 
 def register_user(email, password, name):
     """
@@ -15,14 +17,17 @@ def register_user(email, password, name):
         
     Returns:
         tuple: (success, message, user)
+        
+    Raises:
+        HashingPoolSaturated: If password hashing is overloaded
     """
     try:
-        # Check if user already exists
-        if User.query.filter_by(email=email).first():
+        # Check if user already exists; unknown emails skip the database
+        if user_email_index.lookup(email):
             return False, "Email already registered", None
             
         # Create new user
-        hashed_password = generate_password_hash(password)
+        hashed_password = hash_password(password)
         user = User(
             email=email,
             password=hashed_password,
@@ -31,6 +36,7 @@ def register_user(email, password, name):
         
         db.session.add(user)
         db.session.commit()
+        user_email_index.add(email)
         
         # Log registration event
         log_event('user_registration', {
@@ -41,6 +47,8 @@ def register_user(email, password, name):
         
         return True, "User registered successfully", user
         
+    except HashingPoolSaturated:
+        raise
     except Exception as e:
         db.session.rollback()
         return False, str(e), None
@@ -55,26 +63,31 @@ def authenticate_user(email, password):
         
     Returns:
         tuple: (success, message, tokens)
+        
+    Raises:
+        HashingPoolSaturated: If password hashing is overloaded
     """
     try:
-        user = User.query.filter_by(email=email).first()
+        # Unknown emails are rejected without a database query
+        user = user_email_index.lookup(email)
         
-        if not user or not check_password_hash(user.password, password):
+        # Unknown emails are checked against a dummy hash so timing stays constant
+        if not verify_password(user['password'] if user else None, password):
             return False, "Invalid email or password", None
             
         # Create tokens
         access_token = create_access_token(
-            identity=user.id,
+            identity=user['id'],
             expires_delta=timedelta(minutes=15)
         )
         refresh_token = create_refresh_token(
-            identity=user.id,
+            identity=user['id'],
             expires_delta=timedelta(days=7)
         )
         
         # Log login event
         log_event('user_login', {
-            'user_id': user.id,
+            'user_id': user['id'],
             'email': email
         })
         
@@ -83,15 +96,22 @@ def authenticate_user(email, password):
             'refresh_token': refresh_token
         }
         
+    except HashingPoolSaturated:
+        raise
     except Exception as e:
         return False, str(e), None
 
-def refresh_token(user_id):
+def refresh_token(user_id, refresh_jti=None, refresh_expires_at=None):
     """
     Create a new access token for a user
     
+    When the used refresh token's claims are given, it is revoked and a new
+    refresh token is issued alongside the access token (rotation).
+    
     Args:
         user_id (int): User's ID
+        refresh_jti (str, optional): jti claim of the refresh token being used
+        refresh_expires_at (int, optional): exp claim of the refresh token being used
         
     Returns:
         tuple: (success, message, token)
@@ -101,10 +121,40 @@ def refresh_token(user_id):
             identity=user_id,
             expires_delta=timedelta(minutes=15)
         )
+        token = {'access_token': access_token}
         
-        return True, "Token refreshed successfully", {
-            'access_token': access_token
-        }
+        if refresh_jti:
+            revocation_list.revoke(refresh_jti, refresh_expires_at)
+            token['refresh_token'] = create_refresh_token(
+                identity=user_id,
+                expires_delta=timedelta(days=7)
+            )
+        
+        return True, "Token refreshed successfully", token
+        
+    except Exception as e:
+        return False, str(e), None
+
+def logout_user(jti, expires_at, refresh_token=None):
+    """
+    Revoke the caller's tokens
+    
+    Args:
+        jti (str): jti claim of the token used to call logout
+        expires_at (int): exp claim of that token
+        refresh_token (str, optional): Encoded refresh token to revoke as well
+        
+    Returns:
+        tuple: (success, message)
+    """
+    try:
+        revocation_list.revoke(jti, expires_at)
+        
+        if refresh_token:
+            claims = decode_token(refresh_token)
+            revocation_list.revoke(claims['jti'], claims['exp'])
+            
+        return True, "Logged out successfully"
         
     except Exception as e:
-        return False, str(e), None 
\ No newline at end of file
+        return False, str(e) 
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+Save benchmark results as JSON and flag regressions against a baseline.
+
+Result files look like:
+
+    {"meta": {...}, "results": {"case[size=10]": {"ns_per_call": 1234.5, ...}}}
+
+A case regresses when its ns_per_call grew by more than the threshold
+(default 20%). Cases present in only one file are listed but never fail
+the comparison.
+
+Run with: python -m backend.benchmarks.bench_compare baseline.json current.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+DEFAULT_THRESHOLD = 0.20
+
+def save_results(path: str, results: Dict[str, Dict], **meta) -> None:
+    """
+    Write benchmark results with enough metadata to judge comparability.
+
+    Args:
+        path: Output file
+        results: {case_name: {'ns_per_call': float, ...}}
+        **meta: Extra metadata such as the seed
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    meta.update({
+        'created_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine()
+    })
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2, sort_keys=True)
+
+def load_results(path: str) -> Dict[str, Dict]:
+    with open(path) as f:
+        return json.load(f)['results']
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare per-call timings case by case.
+
+    Args:
+        baseline: Results from load_results()
+        current: Results from load_results() or a suite's run()
+        threshold: Allowed slowdown as a fraction, e.g. 0.2 for 20%
+
+    Returns:
+        list: One row per case with status 'regressed', 'improved', 'ok',
+        'new' or 'missing'
+    """
+    rows = []
+    for case in sorted(set(baseline) | set(current)):
+        if case not in current:
+            rows.append({'case': case, 'status': 'missing'})
+            continue
+        if case not in baseline:
+            rows.append({'case': case, 'status': 'new', 'current': current[case]['ns_per_call']})
+            continue
+        before = baseline[case]['ns_per_call']
+        after = current[case]['ns_per_call']
+        ratio = after / before if before else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regressed'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append({'case': case, 'status': status, 'baseline': before,
+                     'current': after, 'ratio': ratio})
+    return rows
+
+def print_report(rows: List[Dict]) -> None:
+    width = max([len(row['case']) for row in rows] + [4])
+    print(f"{'case':<{width}}  {'baseline ns':>12}  {'current ns':>12}  {'ratio':>6}  status")
+    for row in rows:
+        before = f"{row['baseline']:.1f}" if 'baseline' in row else '-'
+        after = f"{row['current']:.1f}" if 'current' in row else '-'
+        ratio = f"{row['ratio']:.2f}" if 'ratio' in row else '-'
+        print(f"{row['case']:<{width}}  {before:>12}  {after:>12}  {ratio:>6}  {row['status']}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline', help='Stored baseline results')
+    parser.add_argument('current', help='Results to check')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown as a fraction (default %(default)s)')
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    print_report(rows)
+    regressed = [row['case'] for row in rows if row['status'] == 'regressed']
+    if regressed:
+        print(f"{len(regressed)} regression(s) over {args.threshold:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main()) 
\ No newline at end of file
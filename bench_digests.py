@@ -0,0 +1,116 @@
+"""
+Outbound consultant notifications with and without digest coalescing.
+
+Replays a stream of consultant booking updates (holds, confirmations,
+cancellations) through DigestBuffer against an in-memory Redis, flushing
+every POLL_INTERVAL seconds of replayed time, and counts the notifications
+queued for the workers. Without coalescing every update is one
+notification. The stream is synthetic by default: a few busy consultants
+and a long tail of quiet ones over one working day. Pass --replay with a
+JSON lines file of {"at", "consultant_id", "kind", "start_time"} (ISO
+times) to replay a recorded one.
+
+Run with: python -m backend.benchmarks.bench_digests --windows 300 900 1800
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+import fakeredis
+from ..services.digests import CANCELLED, CONFIRMED, DEFAULT_WINDOW, HOLD, POLL_INTERVAL, DigestBuffer
+from ..services.notifications import NotificationQueue
+
+DAY_START = datetime(2030, 1, 7, 8, 0)
+HOURS = 10
+CONSULTANTS = 200
+BOOKINGS = 6000
+SEED = 42
+
+# (at, consultant_id, kind, start_time)
+Update = Tuple[datetime, int, str, datetime]
+
+def synthetic_stream(bookings: int = BOOKINGS, consultants: int = CONSULTANTS, seed: int = SEED) -> List[Update]:
+    """
+    One day of booking updates, Zipf-distributed over consultants.
+
+    Each booking is a hold; 85% are confirmed 1-15 minutes later and 8% of
+    those are cancelled later in the day. One slot in ten is the same day.
+    """
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(consultants)]
+    updates = []
+    for _ in range(bookings):
+        consultant_id = rng.choices(range(1, consultants + 1), weights)[0]
+        at = DAY_START + timedelta(seconds=rng.uniform(0, HOURS * 3600))
+        if rng.random() < 0.1:
+            start_time = (at + timedelta(hours=rng.randint(2, 8))).replace(minute=0, second=0, microsecond=0)
+        else:
+            start_time = (DAY_START + timedelta(days=rng.randint(1, 14), hours=rng.randint(1, 9))).replace(minute=0)
+        updates.append((at, consultant_id, HOLD, start_time))
+        if rng.random() < 0.85:
+            confirmed_at = at + timedelta(minutes=rng.uniform(1, 15))
+            updates.append((confirmed_at, consultant_id, CONFIRMED, start_time))
+            if rng.random() < 0.08:
+                cancelled_at = confirmed_at + timedelta(minutes=rng.uniform(5, 240))
+                if cancelled_at < start_time:
+                    updates.append((cancelled_at, consultant_id, CANCELLED, start_time))
+    updates.sort(key=lambda update: update[0])
+    return updates
+
+def load_stream(path: str) -> List[Update]:
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    updates = [(datetime.fromisoformat(row['at']), int(row['consultant_id']), row['kind'],
+                datetime.fromisoformat(row['start_time'])) for row in rows]
+    updates.sort(key=lambda update: update[0])
+    return updates
+
+def replay(updates: List[Update], window: float) -> Dict:
+    """
+    Replay updates through a digest buffer with the given window.
+
+    Returns:
+        dict: Notifications queued, how many were urgent, the reduction
+        against one notification per update and the replay time
+    """
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    queue = NotificationQueue(redis_client)
+    digests = DigestBuffer(redis_client, queue, window)
+    tick = timedelta(seconds=POLL_INTERVAL)
+    next_flush = updates[0][0] + tick
+    urgent = 0
+    started = time.perf_counter()
+    for at, consultant_id, kind, start_time in updates:
+        while next_flush <= at:
+            digests.flush(now=next_flush)
+            next_flush += tick
+        if not digests.add(consultant_id, kind, start_time, now=at):
+            urgent += 1
+    end = updates[-1][0] + timedelta(seconds=window) + tick
+    while next_flush <= end:
+        digests.flush(now=next_flush)
+        next_flush += tick
+    elapsed = time.perf_counter() - started
+
+    queued = redis_client.hlen(queue.events_key)
+    return {
+        'window_s': window,
+        'updates': len(updates),
+        'notifications': queued,
+        'urgent': urgent,
+        'reduction_pct': round(100 * (1 - queued / len(updates)), 1),
+        'replay_s': round(elapsed, 2)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--replay', help='JSON lines file of recorded updates')
+    parser.add_argument('--windows', type=float, nargs='+', default=[DEFAULT_WINDOW])
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args()
+
+    stream = load_stream(args.replay) if args.replay else synthetic_stream(seed=args.seed)
+    for window in args.windows:
+        print(replay(stream, window)) 
\ No newline at end of file
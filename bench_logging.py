@@ -0,0 +1,64 @@
+"""
+Microbenchmark for hot-path logging overhead in the rule engine.
+
+Compares eager f-string logging with LoggingService lazy formatting, with
+and without hot-path rate limiting, at INFO and WARNING level.
+
+Run with: python -m backend.benchmarks.bench_logging
+"""
+import logging
+import timeit
+from datetime import datetime
+from ..services.logging_service import LoggingService
+
+ITERATIONS = 200000
+
+def _measure(stmt, iterations: int) -> float:
+    """Return the per-call cost of stmt in nanoseconds."""
+    best = min(timeit.repeat(stmt, number=iterations, repeat=5))
+    return best / iterations * 1e9
+
+def run(iterations: int = ITERATIONS) -> dict:
+    """
+    Measure per-call logging overhead at INFO and WARNING level.
+
+    Records go to a NullHandler so only the logging machinery is measured,
+    not I/O.
+
+    Args:
+        iterations: Calls per timing run
+
+    Returns:
+        dict: {level_name: {variant: nanoseconds_per_call}}
+    """
+    service = LoggingService('bench.logging')
+    service.logger.propagate = False
+    service.logger.addHandler(logging.NullHandler())
+    std_logger = service.logger
+
+    slot_time = datetime(2023, 1, 2, 10, 0)
+    final_price = 180.0
+
+    variants = {
+        'eager_fstring': lambda: std_logger.info(
+            f"Calculated price: {final_price} for {slot_time} minutes"),
+        'lazy': lambda: service.log_info(
+            "Calculated price: %s for %s minutes", final_price, slot_time),
+        'lazy_hot_path': lambda: service.log_info(
+            "Calculated price: %s for %s minutes", final_price, slot_time, hot_path=True),
+    }
+
+    results = {}
+    for level in (logging.INFO, logging.WARNING):
+        std_logger.setLevel(level)
+        results[logging.getLevelName(level)] = {
+            name: round(_measure(stmt, iterations), 1)
+            for name, stmt in variants.items()
+        }
+    return results
+
+if __name__ == '__main__':
+    for level_name, timings in run().items():
+        print(f"{level_name}:")
+        for name, ns in timings.items():
+            print(f"  {name:<16} {ns:>10.1f} ns/call") 
\ No newline at end of file
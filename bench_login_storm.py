@@ -0,0 +1,87 @@
+"""
+Booking latency during a login storm, with inline vs pooled password hashing.
+
+Models gunicorn sync workers as a fixed set of request threads serving a
+mixed stream of login and booking requests. With inline hashing every login
+pins a request worker for the full hash; with the bounded pool, logins beyond
+its capacity fail fast with 503 and the workers stay free for bookings.
+
+Run with: python -m backend.benchmarks.bench_login_storm
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+from ..services.password_hasher import HashingPoolSaturated, PasswordHasher
+
+REQUEST_WORKERS = 4
+HASH_WORKERS = 1
+HASH_MAX_PENDING = 1
+LOGINS = 100
+BOOKINGS = 100
+BOOKING_WORK_SECONDS = 0.002
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def _booking():
+    # Stand-in for a booking request's own work
+    time.sleep(BOOKING_WORK_SECONDS)
+    return 200
+
+def run(mode: str) -> dict:
+    """
+    Interleave logins and bookings on REQUEST_WORKERS threads.
+
+    Args:
+        mode: 'inline' or 'pool'
+
+    Returns:
+        dict: Booking p50/p99 latency in ms, login 503 count and wall time
+    """
+    stored_hash = generate_password_hash('correct horse battery staple')
+    hasher = None
+    if mode == 'pool':
+        hasher = PasswordHasher(workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING)
+    if hasher:
+        hasher.verify_password(stored_hash, 'warm up')
+
+    def login():
+        try:
+            if hasher:
+                hasher.verify_password(stored_hash, 'wrong password')
+            else:
+                check_password_hash(stored_hash, 'wrong password')
+            return 401
+        except HashingPoolSaturated:
+            return 503
+
+    def timed(func, enqueued):
+        status = func()
+        return func.__name__, status, (time.perf_counter() - enqueued) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=REQUEST_WORKERS) as workers:
+        futures = []
+        for i in range(max(LOGINS, BOOKINGS)):
+            if i < LOGINS:
+                futures.append(workers.submit(timed, login, time.perf_counter()))
+            if i < BOOKINGS:
+                futures.append(workers.submit(timed, _booking, time.perf_counter()))
+        results = [f.result() for f in futures]
+    wall = time.perf_counter() - started
+    if hasher:
+        hasher.shutdown()
+
+    booking_latency = [ms for name, _, ms in results if name == '_booking']
+    return {
+        'booking_p50_ms': round(statistics.median(booking_latency), 2),
+        'booking_p99_ms': round(_percentile(booking_latency, 99), 2),
+        'login_503': sum(1 for name, status, _ in results if name == 'login' and status == 503),
+        'wall_seconds': round(wall, 2)
+    }
+
+if __name__ == '__main__':
+    for mode in ('inline', 'pool'):
+        print(mode, run(mode)) 
\ No newline at end of file
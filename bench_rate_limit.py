@@ -0,0 +1,106 @@
+"""
+Accuracy and overhead of the hybrid rate limit storage vs plain Redis storage.
+
+Accuracy: several storage instances (one per simulated gunicorn worker)
+hammer one key concurrently; the admitted count is compared with the limit
+and with the (workers - 1) * 2 * max_unsynced over-admission bound.
+Overhead: per-request latency of a limiter hit on one worker.
+
+Needs a Redis server at REDIS_URL.
+
+Run with: python -m backend.benchmarks.bench_rate_limit
+"""
+import os
+import statistics
+import threading
+import time
+import uuid
+from limits import parse
+from limits.storage import RedisStorage
+from limits.strategies import FixedWindowRateLimiter
+from ..services.rate_limit_storage import HybridRedisStorage
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+WORKERS = 4
+THREADS_PER_WORKER = 4
+LIMIT = '100 per minute'
+ATTEMPTS_PER_THREAD = 100
+OVERHEAD_HITS = 5000
+SYNC_INTERVAL = 0.5
+MAX_UNSYNCED = 10
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def _storage(mode: str):
+    if mode == 'redis':
+        return RedisStorage(REDIS_URL)
+    return HybridRedisStorage('hybrid+' + REDIS_URL, sync_interval=SYNC_INTERVAL,
+                              max_unsynced=MAX_UNSYNCED)
+
+def accuracy(mode: str) -> dict:
+    """
+    Count admissions for one key hit from WORKERS storages at once.
+
+    Args:
+        mode: 'redis' or 'hybrid'
+
+    Returns:
+        dict: Admitted hits, the limit and the over-admission bound
+    """
+    limit = parse(LIMIT)
+    key = f"bench-{uuid.uuid4().hex}"
+    limiters = [FixedWindowRateLimiter(_storage(mode)) for _ in range(WORKERS)]
+    admitted = []
+    admitted_lock = threading.Lock()
+
+    def hammer(limiter):
+        count = sum(1 for _ in range(ATTEMPTS_PER_THREAD) if limiter.hit(limit, key))
+        with admitted_lock:
+            admitted.append(count)
+
+    threads = [threading.Thread(target=hammer, args=(limiter,))
+               for limiter in limiters for _ in range(THREADS_PER_WORKER)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    limiters[0].clear(limit, key)
+
+    return {
+        'admitted': sum(admitted),
+        'limit': limit.amount,
+        'bound': limit.amount + (0 if mode == 'redis' else (WORKERS - 1) * 2 * MAX_UNSYNCED)
+    }
+
+def overhead(mode: str) -> dict:
+    """
+    Time OVERHEAD_HITS limiter hits spread over a few client keys.
+
+    Args:
+        mode: 'redis' or 'hybrid'
+
+    Returns:
+        dict: p50/p99 per-hit latency in microseconds
+    """
+    limit = parse('1000000 per minute')
+    limiter = FixedWindowRateLimiter(_storage(mode))
+    keys = [f"bench-{uuid.uuid4().hex}" for _ in range(50)]
+    latency = []
+    for i in range(OVERHEAD_HITS):
+        start = time.perf_counter()
+        limiter.hit(limit, keys[i % len(keys)])
+        latency.append((time.perf_counter() - start) * 1e6)
+    for key in keys:
+        limiter.clear(limit, key)
+
+    return {
+        'p50_us': round(statistics.median(latency), 1),
+        'p99_us': round(_percentile(latency, 99), 1)
+    }
+
+if __name__ == '__main__':
+    for mode in ('redis', 'hybrid'):
+        print(mode, 'accuracy', accuracy(mode))
+        print(mode, 'overhead', overhead(mode)) 
\ No newline at end of file
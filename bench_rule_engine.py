@@ -0,0 +1,296 @@
+"""
+Offline microbenchmarks for the rule engine and scheduling paths.
+
+Covers the pure rule functions (is_peak_hour, get_peak_hour_multiplier,
+check_availability, calculate_price, validate_booking, validate_bookings
+over an availability grid), the compiled
+dynamic rules (one booking and a batch), rule lookups from the warm
+RuleEngine cache and from a mapped rule snapshot, and the database-
+backed SchedulingRuleEngine.get_available_slots and match_consultant, each
+at several data sizes. No external services are needed: Postgres is
+replaced by in-memory SQLite and MongoDB by mongomock, and all data comes
+from a seeded generator so runs are comparable. Rule lookups are measured
+warm, i.e. with the RuleEngine cache populated.
+
+Run with: python -m backend.benchmarks.bench_rule_engine --output results.json
+Compare:  python -m backend.benchmarks.bench_rule_engine --baseline baseline.json
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+import mongomock
+from flask import Flask
+from ..rule_engine.rule_peak_hours import is_peak_hour, get_peak_hour_multiplier
+from ..rule_engine.rule_availability import check_availability
+from ..rule_engine.rule_pricing import calculate_price
+from ..rule_engine.rule_validation import validate_booking, validate_bookings, compile_working_hours
+from ..rule_engine.dynamic_rules import CompiledRules
+from ..rule_engine.rule_snapshot import SnapshotRules, publish_snapshot
+from ..models.mongodb.rules import RuleEngine
+from ..models.postgresql.models import db, Appointment, Consultant, SlotHold
+from ..services.rule_engine.scheduling_rules import SchedulingRuleEngine
+from .bench_compare import DEFAULT_THRESHOLD, compare, load_results, print_report, save_results
+
+SEED = 1234
+PEAK_RANGES = (1, 8, 32)
+BOOKINGS = (10, 100, 1000)
+APPOINTMENTS = (1000, 10000, 50000)
+CONSULTANTS = (100, 1000, 10000)
+SLOT_CONSULTANTS = 100
+DYNAMIC_RULES = (10, 1000, 10000)
+DYNAMIC_BATCH = 96
+GRID_SLOTS = 7 * 96
+REPEAT = 5
+SCHEDULING_CASES = ('get_available_slots', 'match_consultant')
+
+SPECIALIZATIONS = ['career', 'finance', 'fitness', 'legal', 'marketing', 'nutrition', 'tech', 'wellness']
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+# A Monday well clear of the seeded data's notice-period checks
+BENCH_DATE = datetime(2030, 1, 7)
+
+def _measure(func: Callable[[], object]) -> Dict:
+    """Time func with an auto-ranged loop; best of REPEAT runs, in ns per call."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=REPEAT, number=number))
+    return {'ns_per_call': best / number * 1e9, 'iterations': number}
+
+def _peak_rules(ranges: int) -> Dict:
+    # Ten-minute peak ranges from midnight; the benchmark slot misses them all
+    peak_hours = {}
+    for day in DAYS:
+        peak_hours[day] = []
+        for i in range(ranges):
+            start = datetime(2000, 1, 1) + timedelta(minutes=20 * i)
+            end = start + timedelta(minutes=10)
+            peak_hours[day].append({'start': start.strftime('%H:%M'), 'end': end.strftime('%H:%M')})
+    return {'peak_hours': peak_hours, 'peak_hour_multiplier': 1.2}
+
+def _bookings(count: int, rng: random.Random):
+    bookings = []
+    for _ in range(count):
+        start = BENCH_DATE - timedelta(days=rng.randrange(30), minutes=15 * rng.randrange(96))
+        bookings.append({'start_time': start, 'end_time': start + timedelta(minutes=60)})
+    return bookings
+
+def bench_pure_rules(seed: int = SEED) -> Dict[str, Dict]:
+    """Benchmark the stateless rule functions."""
+    rng = random.Random(seed)
+    results = {}
+    slot_time = BENCH_DATE.replace(hour=23)
+    consultant_data = {'years_experience': 5}
+
+    for ranges in PEAK_RANGES:
+        rules = _peak_rules(ranges)
+        results[f'is_peak_hour[ranges={ranges}]'] = _measure(
+            lambda: is_peak_hour(slot_time, rules))
+        results[f'get_peak_hour_multiplier[ranges={ranges}]'] = _measure(
+            lambda: get_peak_hour_multiplier(slot_time, rules))
+        results[f'calculate_price[ranges={ranges}]'] = _measure(
+            lambda: calculate_price(100.0, slot_time, 60, consultant_data, rules))
+
+    for count in BOOKINGS:
+        # Slot after every booking, so each call scans the whole list
+        bookings = _bookings(count, rng)
+        results[f'check_availability[bookings={count}]'] = _measure(
+            lambda: check_availability('consultant-1', BENCH_DATE + timedelta(days=1), 60, bookings))
+
+    start = (datetime.now() + timedelta(days=7)).replace(hour=10, minute=0, second=0, microsecond=0)
+    booking_data = {'start_time': start, 'duration': 60}
+    work_hours = {day.lower(): {'start': '08:00', 'end': '18:00'} for day in DAYS}
+    results['validate_booking'] = _measure(
+        lambda: validate_booking(booking_data, {'working_hours': work_hours}, {}))
+
+    # A week of 15-minute candidates, as an availability grid would check them
+    grid = [{'start_time': start.replace(hour=0) + timedelta(minutes=15 * i), 'duration': 60}
+            for i in range(GRID_SLOTS)]
+    consultant = {'working_hours': work_hours}
+    compiled = compile_working_hours(work_hours)
+    results[f'validate_booking_loop[slots={GRID_SLOTS}]'] = _measure(
+        lambda: [validate_booking(candidate, consultant, {}) for candidate in grid])
+    results[f'validate_bookings[slots={GRID_SLOTS}]'] = _measure(
+        lambda: validate_bookings(grid, consultant, {}))
+    results[f'validate_bookings_compiled[slots={GRID_SLOTS}]'] = _measure(
+        lambda: validate_bookings(grid, consultant, {}, working_hours=compiled))
+    return results
+
+def _dynamic_rules(count: int, rng: random.Random):
+    # One rule matches the benchmark booking; the rest are for other
+    # specializations, days or times and should add nothing to evaluation
+    rules = [{'name': 'tech_mornings', 'when': {'start': '08:00', 'end': '12:00', 'specializations': ['tech']},
+              'then': {'multiplier': 1.2}}]
+    for i in range(count - 1):
+        start = rng.randrange(12 * 60, 23 * 60)
+        rules.append({
+            'name': f"rule_{i}", 'priority': rng.randrange(10),
+            'when': {'days': [rng.choice(DAYS)], 'start': f"{start // 60}:{start % 60:02d}",
+                     'end': f"{start // 60 + 1}:{start % 60:02d}",
+                     'specializations': [rng.choice(SPECIALIZATIONS)], 'is_preferred': rng.random() < 0.5},
+            'then': {'multiplier': 1.5}
+        })
+    return rules
+
+def bench_dynamic_rules(seed: int = SEED) -> Dict[str, Dict]:
+    """Benchmark the compiled dynamic rules as the number of declared rules grows."""
+    rng = random.Random(seed)
+    results = {}
+    booking = {'start_time': BENCH_DATE.replace(hour=9), 'duration': 60, 'specialization': 'tech'}
+    batch = [{'start_time': BENCH_DATE + timedelta(minutes=15 * i), 'duration': 60, 'specialization': 'tech'}
+             for i in range(DYNAMIC_BATCH)]
+
+    for count in DYNAMIC_RULES:
+        rules = CompiledRules(_dynamic_rules(count, rng))
+        results[f'dynamic_evaluate[rules={count}]'] = _measure(lambda: rules.evaluate(booking))
+        results[f'dynamic_evaluate_many[rules={count},batch={DYNAMIC_BATCH}]'] = _measure(
+            lambda: rules.evaluate_many(batch))
+    return results
+
+def _rule_engine() -> RuleEngine:
+    engine = RuleEngine('mongodb://localhost:27017', client=mongomock.MongoClient())
+    for day in DAYS:
+        for hour in (9, 12, 17):
+            engine.add_peak_hour_rule(day, f"{hour}:0-{hour + 2}:0", 1.5)
+    for specialization in SPECIALIZATIONS:
+        engine.add_consultant_rule(specialization, False, 900, 8)
+        engine.add_consultant_rule(specialization, True, 1200, 10)
+    return engine
+
+def bench_rule_lookups() -> Dict[str, Dict]:
+    """Benchmark peak hour and hold time lookups: warm RuleEngine cache vs mapped snapshot."""
+    engine = _rule_engine()
+    engine.warm_cache()
+    slot_time = BENCH_DATE.replace(hour=10)
+    results = {
+        'lookup_peak_multiplier[cache]': _measure(lambda: engine.get_peak_hour_multiplier('Monday', slot_time)),
+        'lookup_hold_time[cache]': _measure(lambda: engine.get_consultant_hold_time('tech', True))
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rules.snap')
+        publish_snapshot(path, engine)
+        snapshot = SnapshotRules(path)
+        results['lookup_peak_multiplier[snapshot]'] = _measure(
+            lambda: snapshot.get_peak_hour_multiplier('Monday', slot_time))
+        results['lookup_hold_time[snapshot]'] = _measure(
+            lambda: snapshot.get_consultant_hold_time('tech', True))
+    return results
+
+def _scheduling_app(consultants: int, appointments: int, seed: int) -> Flask:
+    """Create an app bound to a fresh in-memory SQLite database with seeded rows."""
+    rng = random.Random(seed)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.bulk_insert_mappings(Consultant, [
+            {
+                'user_id': i,
+                'specialization': rng.choice(SPECIALIZATIONS),
+                'hourly_rate': rng.choice([60, 80, 100, 150]),
+                'availability': {str(day): {'start': rng.choice([8, 9, 10]), 'end': rng.choice([16, 17, 18])}
+                                 for day in range(5)},
+                'max_daily_sessions': 8,
+                'is_active': rng.random() < 0.9,
+                'is_preferred': rng.random() < 0.2
+            }
+            for i in range(1, consultants + 1)
+        ])
+
+        appointment_rows = []
+        hold_rows = []
+        for _ in range(appointments):
+            start = BENCH_DATE + timedelta(days=rng.randrange(14), hours=rng.randrange(8, 18),
+                                           minutes=15 * rng.randrange(4))
+            row = {
+                'client_id': rng.randrange(1, 100000),
+                'consultant_id': rng.randrange(1, consultants + 1),
+                'start_time': start,
+                'end_time': start + timedelta(minutes=rng.choice([30, 60, 90])),
+                'status': rng.choice(['pending', 'confirmed', 'confirmed', 'completed', 'cancelled']),
+                'payment_status': 'pending'
+            }
+            appointment_rows.append(row)
+            if rng.random() < 0.1:
+                hold_rows.append({
+                    'client_id': row['client_id'],
+                    'consultant_id': row['consultant_id'],
+                    'start_time': row['start_time'] + timedelta(hours=1),
+                    'end_time': row['end_time'] + timedelta(hours=1),
+                    'status': rng.choice(['active', 'expired']),
+                    'expires_at': BENCH_DATE
+                })
+        db.session.bulk_insert_mappings(Appointment, appointment_rows)
+        db.session.bulk_insert_mappings(SlotHold, hold_rows)
+        db.session.commit()
+    return app
+
+def bench_scheduling(seed: int = SEED) -> Dict[str, Dict]:
+    """Benchmark SchedulingRuleEngine against seeded SQLite and mongomock data."""
+    results = {}
+    engine = SchedulingRuleEngine(_rule_engine())
+
+    for count in APPOINTMENTS:
+        app = _scheduling_app(SLOT_CONSULTANTS, count, seed)
+        with app.app_context():
+            results[f'get_available_slots[appointments={count}]'] = _measure(
+                lambda: engine.get_available_slots(1, BENCH_DATE, 60))
+            db.session.remove()
+
+    for count in CONSULTANTS:
+        app = _scheduling_app(count, 0, seed)
+        with app.app_context():
+            results[f'match_consultant[consultants={count}]'] = _measure(
+                lambda: engine.match_consultant('tech'))
+            db.session.remove()
+    return results
+
+def run(seed: int = SEED, only: str = None) -> Dict[str, Dict]:
+    """
+    Run the whole suite.
+
+    Args:
+        seed: Seed for all generated data
+        only: Run only cases whose name contains this substring
+
+    Returns:
+        dict: {case_name: {'ns_per_call', 'iterations'}}
+    """
+    results = bench_pure_rules(seed)
+    results.update(bench_dynamic_rules(seed))
+    results.update(bench_rule_lookups())
+    if only is None or any(only in case or case in only for case in SCHEDULING_CASES):
+        results.update(bench_scheduling(seed))
+    if only is not None:
+        results = {case: result for case, result in results.items() if only in case}
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Offline rule engine and scheduling benchmarks')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against stored results and fail on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown as a fraction (default %(default)s)')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--only', help='Run only cases whose name contains this substring')
+    args = parser.parse_args(argv)
+
+    results = run(args.seed, args.only)
+    if args.output:
+        save_results(args.output, results, seed=args.seed, suite='rule_engine')
+    if args.baseline:
+        rows = compare(load_results(args.baseline), results, args.threshold)
+        print_report(rows)
+        return 1 if any(row['status'] == 'regressed' for row in rows) else 0
+    for case, result in results.items():
+        print(f"{case}: {result['ns_per_call']:.1f} ns")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main()) 
\ No newline at end of file
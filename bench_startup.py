@@ -0,0 +1,139 @@
+"""
+Import time of the pure rule functions, and cold-start time and per-worker
+memory of the gateway app.
+
+Import: `python -c "import <rule package>"` against a bare interpreter
+start; the heavy modules it loaded (Flask, pymongo, ...) are listed, and
+there should be none.
+Cold start: fresh interpreters import the gateway and call create_app();
+median import and create_app times are reported.
+Memory: WORKERS processes each serve a first request. With preload the
+app is built once and the workers are forked from it, as gunicorn
+--preload does; without it every worker imports and builds its own app.
+PSS and private memory per worker come from /proc/<pid>/smaps_rollup, so
+this part needs Linux.
+
+Needs no running services: clients are only built on first use.
+
+Run with: python -m backend.benchmarks.bench_startup
+"""
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+WORKERS = 4
+COLD_STARTS = 5
+IMPORT_RUNS = 15
+PACKAGE = __package__.rsplit('.', 1)[0]
+GATEWAY = PACKAGE + '.api.gateway'
+RULES = PACKAGE + '.rule_engine'
+HEAVY_MODULES = ('flask', 'pymongo', 'mongoengine', 'sqlalchemy', 'redis', 'pythonjsonlogger')
+
+COLD_START_SCRIPT = f"""
+import json, time
+started = time.perf_counter()
+from {GATEWAY} import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - started) * 1000, 'create_app_ms': (created - imported) * 1000}}))
+"""
+
+_app = None
+
+def _build_app():
+    global _app
+    if _app is None:
+        from ..api.gateway import create_app
+        _app = create_app()
+    return _app
+
+def _worker(ready, release) -> None:
+    _build_app().test_client().get('/metrics')
+    ready.put(os.getpid())
+    release.wait()
+
+def _memory_kib(pid: int) -> dict:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    return {'pss_kib': fields['Pss'],
+            'private_kib': fields['Private_Clean'] + fields['Private_Dirty']}
+
+def _interpreter_ms(code: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def import_time(module: str = RULES, runs: int = IMPORT_RUNS) -> dict:
+    """
+    Time `python -c "import module"` in fresh interpreters.
+
+    Returns:
+        dict: Median milliseconds over a bare interpreter start, and the
+        heavy modules the import loaded
+    """
+    bare = _interpreter_ms('pass', runs)
+    loaded = subprocess.run(
+        [sys.executable, '-c', f"import sys, {module}; print(' '.join(sorted(sys.modules)))"],
+        check=True, capture_output=True, text=True).stdout.split()
+    return {'import_ms': round(_interpreter_ms(f"import {module}", runs) - bare, 1),
+            'heavy_modules': [name for name in HEAVY_MODULES if name in loaded]}
+
+def cold_start(runs: int = COLD_STARTS) -> dict:
+    """
+    Import and build the gateway in fresh interpreters.
+
+    Returns:
+        dict: Median import and create_app times in milliseconds
+    """
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT], check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: round(statistics.median(sample[key] for sample in samples), 1)
+            for key in ('import_ms', 'create_app_ms')}
+
+def worker_memory(preload: bool, workers: int = WORKERS) -> dict:
+    """
+    Start workers that each serve one request and measure them side by side.
+
+    Args:
+        preload: Fork the workers from a built app instead of having each build its own
+
+    Returns:
+        dict: Mean PSS and private memory per worker in KiB
+    """
+    if preload:
+        _build_app()
+    context = multiprocessing.get_context('fork' if preload else 'spawn')
+    ready, release = context.Queue(), context.Event()
+    processes = [context.Process(target=_worker, args=(ready, release)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        samples = [_memory_kib(ready.get(timeout=120)) for _ in processes]
+    finally:
+        release.set()
+        for process in processes:
+            process.join()
+    return {key: round(statistics.mean(sample[key] for sample in samples))
+            for key in ('pss_kib', 'private_kib')}
+
+if __name__ == '__main__':
+    print('rule import', import_time())
+    print('cold start', cold_start())
+    # Spawned workers first, so they are not measured against an already built app
+    print('no preload', worker_memory(preload=False))
+    print('preload', worker_memory(preload=True)) 
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Microbenchmark for tracing overhead.
+
+Compares a plain call with a @traced call while tracing is disabled and
+while it exports to the in-process ring buffer.
+
+Run with: python -m backend.benchmarks.bench_tracing
+"""
+import timeit
+from ..services.tracing import RingBufferExporter, configure_tracing, traced
+
+ITERATIONS = 200000
+
+def _work(x):
+    return x + 1
+
+@traced()
+def _traced_work(x):
+    return x + 1
+
+def _measure(stmt, iterations: int) -> float:
+    """Return the per-call cost of stmt in nanoseconds."""
+    best = min(timeit.repeat(stmt, number=iterations, repeat=5))
+    return best / iterations * 1e9
+
+def run(iterations: int = ITERATIONS) -> dict:
+    """
+    Measure per-call overhead of the traced decorator.
+
+    Args:
+        iterations: Calls per timing run
+
+    Returns:
+        dict: {variant: nanoseconds_per_call}
+    """
+    results = {'plain': round(_measure(lambda: _work(1), iterations), 1)}
+
+    configure_tracing(enabled=False)
+    results['traced_disabled'] = round(_measure(lambda: _traced_work(1), iterations), 1)
+
+    configure_tracing(enabled=True, exporter=RingBufferExporter(capacity=1000))
+    results['traced_enabled'] = round(_measure(lambda: _traced_work(1), iterations // 10), 1)
+    configure_tracing(enabled=False)
+    return results
+
+if __name__ == '__main__':
+    for name, ns in run().items():
+        print(f"{name:<16} {ns:>10.1f} ns/call") 
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Throughput and latency of sync vs gevent gunicorn workers under the same load.
+
+For each mode, gunicorn is started with gunicorn.conf.py and WORKER_MODE
+set, and once it answers the ready path, CONCURRENCY keep-alive clients
+request the given paths for DURATION seconds. Reported per mode:
+requests/s, p50/p95/p99 latency, status counts and errors (5xx or
+connection failures).
+
+The app talks to its real data stores, so point DATABASE_URL, MONGODB_URI
+and REDIS_HOST/REDIS_URL at a seeded stack (see generate_dataset.py).
+Sync workers serve one request each at a time, so I/O-bound paths are
+capped at workers / latency; gevent workers are not.
+
+Run with: python -m backend.benchmarks.bench_worker_modes --path '/api/consultant/?specialization=tech' --token $JWT
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('sync', 'gevent')
+CONCURRENCY = 200
+DURATION = 30.0
+WORKERS = 4
+PORT = 5055
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def start_server(mode: str, app: str, port: int, workers: int) -> subprocess.Popen:
+    """Start gunicorn for one worker mode from the backend directory."""
+    return subprocess.Popen(
+        ['gunicorn', '--config', 'gunicorn.conf.py', '--bind', f"127.0.0.1:{port}",
+         '--workers', str(workers), app],
+        cwd=BACKEND_DIR, env={**os.environ, 'WORKER_MODE': mode}
+    )
+
+def wait_ready(port: int, path: str, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', path)
+            if connection.getresponse().status < 500:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server on port {port} not ready after {timeout}s")
+
+def drive(port: int, paths: List[str], headers: Dict[str, str], concurrency: int,
+          duration: float) -> Dict:
+    """
+    Run concurrent keep-alive clients for duration seconds.
+
+    Returns:
+        dict: requests/s, latency percentiles in ms, statuses and errors
+    """
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(index: int) -> None:
+        connection = None
+        sent = 0
+        local_latencies, local_statuses = [], Counter()
+        while time.monotonic() < deadline:
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            path = paths[(index + sent) % len(paths)]
+            sent += 1
+            start = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                local_statuses[response.status] += 1
+            except (OSError, http.client.HTTPException):
+                local_statuses['connection_error'] += 1
+                connection.close()
+                connection = None
+                continue
+            local_latencies.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    return {
+        'requests_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 1) if latencies else None,
+        'p95_ms': round(_percentile(latencies, 95), 1) if latencies else None,
+        'p99_ms': round(_percentile(latencies, 99), 1) if latencies else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'errors': sum(count for status, count in statuses.items()
+                      if status == 'connection_error' or status >= 500)
+    }
+
+def run(paths: List[str], headers: Dict[str, str], app: str = 'app:create_app()',
+        modes=MODES, concurrency: int = CONCURRENCY, duration: float = DURATION,
+        workers: int = WORKERS, port: int = PORT, ready_path: str = '/health/live') -> Dict:
+    """
+    Benchmark each worker mode in turn on the same port.
+
+    Returns:
+        dict: {mode: drive() report}
+    """
+    results = {}
+    for mode in modes:
+        server = start_server(mode, app, port, workers)
+        try:
+            wait_ready(port, ready_path)
+            results[mode] = drive(port, paths, headers, concurrency, duration)
+        finally:
+            server.terminate()
+            server.wait(timeout=60)
+    return results
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Compare sync and gevent gunicorn workers')
+    parser.add_argument('--path', action='append', required=True, help='Path to request; repeatable')
+    parser.add_argument('--token', help='JWT sent as a Bearer token')
+    parser.add_argument('--app', default='app:create_app()', help='gunicorn app spec')
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--duration', type=float, default=DURATION)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--ready-path', default='/health/live')
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args(argv)
+
+    headers = {'Authorization': f"Bearer {args.token}"} if args.token else {}
+    results = run(args.path, headers, args.app, args.modes.split(','), args.concurrency,
+                  args.duration, args.workers, args.port, args.ready_path)
+    for mode, result in results.items():
+        print(mode, result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main() 
\ No newline at end of file
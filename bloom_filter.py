@@ -0,0 +1,103 @@
+import hashlib
+import math
+import os
+import struct
+from typing import Iterable
+
+_HEADER = struct.Struct('<4sQIQd')
+_MAGIC = b'BLM1'
+
+class BloomFilter:
+    def __init__(self, num_bits: int, num_hashes: int):
+        """
+        Set-membership filter with no false negatives.
+
+        Args:
+            num_bits: Size of the bit array
+            num_hashes: Bit positions set per item
+        """
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = max(1, num_hashes)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.built_at = 0.0
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> 'BloomFilter':
+        """
+        Size a filter for capacity items at the given false-positive rate.
+
+        Args:
+            capacity: Expected number of items
+            error_rate: Target false-positive probability
+
+        Returns:
+            BloomFilter: Empty filter
+        """
+        capacity = max(1, capacity)
+        num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        num_hashes = int(round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    @property
+    def capacity(self) -> int:
+        """Items the filter holds before exceeding its design error rate"""
+        return int(self.num_bits * math.log(2) / self.num_hashes)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def save(self, path: str) -> None:
+        """Write the filter to path atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.num_bits, self.num_hashes, self.count, self.built_at))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BloomFilter':
+        """
+        Read a filter written by save().
+
+        Raises:
+            ValueError: If the file is not a valid snapshot
+        """
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise ValueError(f"Truncated Bloom filter snapshot: {path}")
+            magic, num_bits, num_hashes, count, built_at = _HEADER.unpack(header)
+            if magic != _MAGIC:
+                raise ValueError(f"Not a Bloom filter snapshot: {path}")
+            bloom = cls(num_bits, num_hashes)
+            bits = f.read()
+            if len(bits) != len(bloom.bits):
+                raise ValueError(f"Truncated Bloom filter snapshot: {path}")
+        bloom.bits = bytearray(bits)
+        bloom.count = count
+        bloom.built_at = built_at
+        return bloom 
\ No newline at end of file
@@ -0,0 +1,241 @@
+import argparse
+import heapq
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .logging_service import configure_logging, log_info
+
+# Statuses that occupy a consultant's time; cancelled appointments and
+# expired or converted holds cannot conflict with anything
+APPOINTMENT_STATUSES = ('pending', 'confirmed', 'completed')
+HOLD_STATUSES = ('active',)
+
+FETCH_SIZE = 10000
+WATERMARK_LAG = timedelta(minutes=1)
+
+# Row layout shared by the query and the sweep
+TABLE, ID, CONSULTANT_ID, START, END, STATUS, APPOINTMENT_ID, CHANGED = range(8)
+Row = Tuple[str, int, int, datetime, datetime, str, Optional[int], bool]
+
+_COLUMNS = """
+    SELECT 'appointment', a.id, a.consultant_id, a.start_time, a.end_time, a.status, NULL::integer,
+           {appointment_changed}
+    FROM appointments a {appointment_join}
+    WHERE a.status = ANY(%(appointment_statuses)s) AND a.consultant_id %% %(shards)s = %(shard)s
+    UNION ALL
+    SELECT 'hold', h.id, h.consultant_id, h.start_time, h.end_time, h.status, h.appointment_id,
+           {hold_changed}
+    FROM slot_holds h {hold_join}
+    WHERE h.status = ANY(%(hold_statuses)s) AND h.consultant_id %% %(shards)s = %(shard)s
+    ORDER BY 3, 4
+"""
+
+FULL_SCAN = _COLUMNS.format(appointment_changed='true', appointment_join='',
+                            hold_changed='true', hold_join='')
+
+# Only the time span each consultant's changed rows cover is read again
+_WINDOWS = """
+    WITH changed AS (
+        SELECT consultant_id, start_time, end_time FROM appointments WHERE updated_at > %(since)s
+        UNION ALL
+        SELECT consultant_id, start_time, end_time FROM slot_holds WHERE updated_at > %(since)s
+    ), windows AS (
+        SELECT consultant_id, MIN(start_time) AS low, MAX(end_time) AS high
+        FROM changed WHERE consultant_id %% %(shards)s = %(shard)s GROUP BY consultant_id
+    )
+"""
+INCREMENTAL_SCAN = _WINDOWS + _COLUMNS.format(
+    appointment_changed='a.updated_at > %(since)s',
+    appointment_join='JOIN windows w ON w.consultant_id = a.consultant_id '
+                     'AND a.start_time < w.high AND a.end_time > w.low',
+    hold_changed='h.updated_at > %(since)s',
+    hold_join='JOIN windows w ON w.consultant_id = h.consultant_id '
+              'AND h.start_time < w.high AND h.end_time > w.low'
+)
+
+def overlapping_pairs(rows: Iterable[Row]) -> Iterator[Tuple[Row, Row]]:
+    """
+    Sweep rows ordered by (consultant_id, start_time) and yield every overlapping pair.
+
+    A heap keyed on end time holds the rows still running at the current
+    start, so each row is pushed and popped once: O(n log n) plus one step
+    per pair reported. Intervals are half-open; back-to-back rows do not
+    overlap.
+    """
+    active: List[Tuple[datetime, int, Row]] = []
+    consultant = None
+    for sequence, row in enumerate(rows):
+        if row[CONSULTANT_ID] != consultant:
+            consultant = row[CONSULTANT_ID]
+            active.clear()
+        start = row[START]
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, _, other in active:
+            yield other, row
+        heapq.heappush(active, (row[END], sequence, row))
+
+def _kind(first: Row, second: Row) -> str:
+    tables = {first[TABLE], second[TABLE]}
+    if tables == {'appointment'}:
+        return 'double_booking'
+    if tables == {'hold'}:
+        return 'hold_overlap'
+    return 'hold_appointment_overlap'
+
+def _describe(row: Row) -> Dict:
+    return {'table': row[TABLE], 'id': row[ID], 'status': row[STATUS],
+            'start_time': row[START].isoformat(), 'end_time': row[END].isoformat()}
+
+def find_conflicts(rows: Iterable[Row], changed_only: bool = False) -> Iterator[Dict]:
+    """
+    Report each overlapping pair that is a real conflict.
+
+    A hold overlapping the appointment it was converted into is not one.
+
+    Args:
+        rows: Rows ordered by (consultant_id, start_time)
+        changed_only: Only report pairs involving at least one changed row
+
+    Yields:
+        dict: consultant_id, kind, the overlap and both rows with their status
+    """
+    for first, second in overlapping_pairs(rows):
+        if changed_only and not (first[CHANGED] or second[CHANGED]):
+            continue
+        hold, other = (first, second) if first[TABLE] == 'hold' else (second, first)
+        if hold[TABLE] == 'hold' and other[TABLE] == 'appointment' and hold[APPOINTMENT_ID] == other[ID]:
+            continue
+        yield {
+            'consultant_id': first[CONSULTANT_ID],
+            'kind': _kind(first, second),
+            'overlap_start': max(first[START], second[START]).isoformat(),
+            'overlap_end': min(first[END], second[END]).isoformat(),
+            'first': _describe(first),
+            'second': _describe(second)
+        }
+
+def _audit_shard(task: Tuple) -> Tuple[List[Dict], int]:
+    """Stream one consultant shard through a server-side cursor and sweep it"""
+    database_url, shard, shards, since, appointment_statuses, hold_statuses = task
+    import psycopg2
+    connection = psycopg2.connect(database_url)
+    try:
+        with connection:
+            # A named cursor keeps the result on the server; rows arrive FETCH_SIZE at a time
+            with connection.cursor(name=f"conflict_audit_{shard}") as cursor:
+                cursor.itersize = FETCH_SIZE
+                cursor.execute(FULL_SCAN if since is None else INCREMENTAL_SCAN, {
+                    'shard': shard, 'shards': shards, 'since': since,
+                    'appointment_statuses': list(appointment_statuses),
+                    'hold_statuses': list(hold_statuses)
+                })
+                scanned = 0
+
+                def rows():
+                    nonlocal scanned
+                    for row in cursor:
+                        scanned += 1
+                        yield row
+
+                conflicts = list(find_conflicts(rows(), changed_only=since is not None))
+        return conflicts, scanned
+    finally:
+        connection.close()
+
+def audit(database_url: str, shards: int = 1, since: Optional[datetime] = None,
+          appointment_statuses: Sequence[str] = APPOINTMENT_STATUSES,
+          hold_statuses: Sequence[str] = HOLD_STATUSES) -> List[Dict]:
+    """
+    Find overlapping appointments and holds across the whole schedule.
+
+    Consultants are split into shards by consultant_id modulo shards, and
+    each shard is scanned and swept in its own process with its own
+    connection. Rows come from Postgres already ordered by
+    (consultant_id, start_time), so memory holds only the rows still
+    running at the current time plus the conflicts found.
+
+    Args:
+        database_url: Postgres URL
+        shards: Parallel scans
+        since: Incremental mode: only rows updated after this watermark, and
+            the rows overlapping them, are read, and only conflicts involving
+            a changed row are reported
+        appointment_statuses: Appointment statuses that take up time
+        hold_statuses: Hold statuses that take up time
+
+    Returns:
+        list: Conflicts (see find_conflicts), ordered by consultant
+    """
+    started = time.perf_counter()
+    tasks = [(database_url, shard, shards, since, tuple(appointment_statuses), tuple(hold_statuses))
+             for shard in range(shards)]
+    if shards == 1:
+        results = [_audit_shard(tasks[0])]
+    else:
+        with Pool(shards) as pool:
+            results = pool.map(_audit_shard, tasks)
+
+    conflicts = [conflict for shard_conflicts, _ in results for conflict in shard_conflicts]
+    conflicts.sort(key=lambda conflict: (conflict['consultant_id'], conflict['overlap_start']))
+    log_info("Conflict audit scanned %d rows in %d shards%s and found %d conflicts in %.1f s",
+             sum(scanned for _, scanned in results), shards,
+             f" since {since.isoformat()}" if since else "", len(conflicts),
+             time.perf_counter() - started)
+    return conflicts
+
+def database_time(database_url: str) -> datetime:
+    import psycopg2
+    connection = psycopg2.connect(database_url)
+    try:
+        with connection, connection.cursor() as cursor:
+            cursor.execute('SELECT now()')
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+def load_watermark(path: str) -> Optional[datetime]:
+    """Watermark saved by the last incremental run, or None for a full scan"""
+    try:
+        with open(path) as f:
+            return datetime.fromisoformat(json.load(f)['watermark'])
+    except FileNotFoundError:
+        return None
+
+def save_watermark(path: str, watermark: datetime) -> None:
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump({'watermark': watermark.isoformat()}, f)
+    os.replace(temp_path, path)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Find overlapping appointments and slot holds')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'postgresql://localhost/climbup'))
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--state', help='Incremental mode: watermark file read and updated by each run')
+    parser.add_argument('--output', help='Write conflicts as JSON lines here instead of stdout')
+    args = parser.parse_args(argv)
+
+    since = load_watermark(args.state) if args.state else None
+    # Rows updated just before the scan may commit after it; the next run
+    # starts a little earlier so they are not missed
+    next_watermark = database_time(args.database_url) - WATERMARK_LAG
+    conflicts = audit(args.database_url, args.shards, since)
+
+    output = open(args.output, 'w') if args.output else None
+    try:
+        for conflict in conflicts:
+            print(json.dumps(conflict), file=output)
+    finally:
+        if output:
+            output.close()
+    if args.state:
+        save_watermark(args.state, next_watermark)
+    return 1 if conflicts else 0
+
+if __name__ == '__main__':
+    configure_logging()
+    raise SystemExit(main()) 
\ No newline at end of file
@@ -0,0 +1,50 @@
+import pytest
+from contextlib import contextmanager
+from flask import Flask
+from ..models.postgresql.models import db
+from ..services.instrumentation import install_datastore_instrumentation
+from ..services.profiler import QueryRecorder
+
+@pytest.fixture
+def app():
+    """
+    Flask app on an empty in-memory SQLite database, inside an app context.
+
+    Tests seed the rows they need, usually through a fixture of their own.
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def query_budget():
+    """
+    Assert an upper bound on data-store calls made inside a block.
+
+    Uses the same instrumentation hooks as the request profiler. Budgets are
+    given per store (postgresql, mongodb, redis) or as total:
+
+        with query_budget(postgresql=2, redis=1):
+            client.get('/api/availability?consultant_id=1&date=2024-04-01')
+    """
+    install_datastore_instrumentation()
+
+    @contextmanager
+    def budget(**limits):
+        with QueryRecorder(current_thread_only=False) as recorder:
+            yield recorder
+        counts = {
+            store: recorder.count(None if store == 'total' else store)
+            for store in limits
+        }
+        exceeded = {store: counts[store] for store, limit in limits.items() if counts[store] > limit}
+        assert not exceeded, (
+            f"Query budget exceeded: {exceeded} (budget {limits}); "
+            f"slowest: {recorder.summary()['slowest']}"
+        )
+
+    return budget 
\ No newline at end of file
@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict
+
+# 'sync' (one request per worker) or 'gevent' (cooperative, many per worker).
+# gunicorn.conf.py reads the same variable and monkey-patches before the app loads.
+WORKER_MODE = os.getenv('WORKER_MODE', 'sync').lower()
+
+def is_cooperative() -> bool:
+    """True when requests run as greenlets that must never block the event loop"""
+    return WORKER_MODE == 'gevent'
+
+def check_patched() -> None:
+    """
+    Refuse to start a gevent worker whose I/O would still block.
+
+    Redis, pymongo and SQLAlchemy's pool are pure Python and yield once the
+    standard library is monkey-patched; psycopg2 also needs its wait
+    callback (psycogreen). Both are set up by gunicorn.conf.py.
+
+    Raises:
+        RuntimeError: In gevent mode, if either patch is missing
+    """
+    if not is_cooperative():
+        return
+    from gevent import monkey
+    import psycopg2.extensions
+    if not monkey.is_module_patched('socket'):
+        raise RuntimeError("WORKER_MODE=gevent but the standard library is not monkey-patched; "
+                           "start gunicorn with --config gunicorn.conf.py")
+    if psycopg2.extensions.get_wait_callback() is None:
+        raise RuntimeError("WORKER_MODE=gevent but psycopg2 is not patched for gevent (psycogreen)")
+
+def cpu_executor(max_workers: int) -> Executor:
+    """
+    Pool for CPU-bound work such as password hashing.
+
+    Sync workers hand the work to processes. Under gevent, threads are
+    greenlets after monkey-patching, so the work goes to gevent's pool of
+    real OS threads instead; hashlib releases the GIL while hashing, and
+    waiting on the result yields to other requests.
+
+    Args:
+        max_workers: Processes or threads in the pool
+    """
+    if is_cooperative():
+        from gevent.threadpool import ThreadPoolExecutor
+        return ThreadPoolExecutor(max_workers=max_workers)
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+def sqlalchemy_engine_options() -> Dict:
+    """
+    Connection pool sizing for the worker mode.
+
+    A gevent worker has many requests in flight, so it keeps more
+    connections than a sync worker, which uses one at a time. Override with
+    DB_POOL_SIZE and DB_MAX_OVERFLOW; keep workers * (pool + overflow)
+    under Postgres max_connections.
+    """
+    cooperative = is_cooperative()
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 15 if cooperative else 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 5 if cooperative else 10))
+    } 
\ No newline at end of file
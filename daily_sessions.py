@@ -0,0 +1,233 @@
+import argparse
+import calendar
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from redis.commands.core import Script
+from .logging_service import configure_logging, log_info
+
+KEY_PREFIX = 'sessions'
+REBUILD_DAYS = 60
+WRITE_BATCH = 1000
+
+# A session is a pending or confirmed appointment or an active hold; a hold
+# becomes its appointment on confirm, so confirming changes no count
+APPOINTMENT_STATUSES = ('pending', 'confirmed')
+
+# KEYS[1] day counter, KEYS[2] caps hash; ARGV consultant ID, expiry, cap to
+# use when the hash has none ('' for no cap). Returns the new count, or -1
+# when the day is already full.
+_RESERVE = Script(None, b"""
+local cap = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or ARGV[3])
+local count = tonumber(redis.call('GET', KEYS[1]) or '0')
+if cap and cap > 0 and count >= cap then
+    return -1
+end
+count = redis.call('INCR', KEYS[1])
+redis.call('EXPIREAT', KEYS[1], ARGV[2])
+return count
+""")
+
+# Never below zero, so a release after a rebuild cannot leave a negative count
+_RELEASE = Script(None, b"""
+local count = tonumber(redis.call('GET', KEYS[1]) or '0')
+if count <= 0 then
+    return 0
+end
+return redis.call('DECR', KEYS[1])
+""")
+
+_COUNT_SESSIONS = """
+    SELECT consultant_id, (start_time AT TIME ZONE 'UTC')::date, COUNT(*)
+    FROM (
+        SELECT consultant_id, start_time FROM appointments
+        WHERE status = ANY(%(statuses)s) AND start_time >= %(start)s AND start_time < %(end)s
+        UNION ALL
+        SELECT consultant_id, start_time FROM slot_holds
+        WHERE status = 'active' AND expires_at > now() AND start_time >= %(start)s AND start_time < %(end)s
+    ) sessions
+    GROUP BY 1, 2
+"""
+
+_CAPS = """
+    SELECT user_id, specialization, is_preferred, max_daily_sessions
+    FROM consultants WHERE is_active
+"""
+
+def _expires_at(day: date) -> int:
+    # Kept a day past the end of the day, for late releases and cancellations
+    return calendar.timegm((day + timedelta(days=2)).timetuple())
+
+class DailySessionCounter:
+    def __init__(self, redis_client, prefix: str = KEY_PREFIX):
+        """
+        Booked sessions per consultant and day, kept in Redis.
+
+        Holds reserve a session and cancellations, expired holds and failed
+        payments release one, each with a single atomic script call, so the
+        daily cap is enforced without counting rows in Postgres. Caps live
+        in one Redis hash, written by rebuild() from
+        consultants.max_daily_sessions and the consultant rules. Counters
+        can drift (a crash between the database write and the release, a
+        hold that expires unconfirmed); rebuild() run periodically sets
+        them back to what Postgres holds.
+
+        Args:
+            redis_client: Redis client, or a LazyClient around one
+            prefix: Key prefix; counters are {prefix}:{consultant}:{YYYY-MM-DD}
+        """
+        self.redis = redis_client
+        self.prefix = prefix
+        self.caps_key = f'{prefix}:caps'
+
+    def key(self, consultant_id: int, day: date) -> str:
+        return f'{self.prefix}:{consultant_id}:{day.isoformat()}'
+
+    def _reserve_args(self, consultant_id: int, day: date, cap: Optional[int]) -> Tuple[list, list]:
+        return ([self.key(consultant_id, day), self.caps_key],
+                [consultant_id, _expires_at(day), '' if cap is None else cap])
+
+    def reserve(self, consultant_id: int, day: date, cap: Optional[int] = None) -> bool:
+        """
+        Count one more session for the consultant's day unless it is full.
+
+        Args:
+            cap: Cap to apply if none has been published for the consultant
+
+        Returns:
+            bool: False, with nothing counted, if the day is at its cap
+        """
+        keys, args = self._reserve_args(consultant_id, day, cap)
+        return _RESERVE(keys, args, client=self.redis) != -1
+
+    def reserve_many(self, consultant_id: int, days: Iterable[date], cap: Optional[int] = None) -> List[bool]:
+        """Reserve one session on each day (repeats allowed), in one round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        for day in days:
+            keys, args = self._reserve_args(consultant_id, day, cap)
+            _RESERVE(keys, args, client=pipe)
+        return [result != -1 for result in pipe.execute()]
+
+    def release(self, consultant_id: int, day: date) -> None:
+        """Give back a session reserved on the consultant's day"""
+        _RELEASE([self.key(consultant_id, day)], client=self.redis)
+
+    def release_many(self, consultant_id: int, days: Iterable[date]) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        for day in days:
+            _RELEASE([self.key(consultant_id, day)], client=pipe)
+        pipe.execute()
+
+    def count(self, consultant_id: int, day: date) -> int:
+        return int(self.redis.get(self.key(consultant_id, day)) or 0)
+
+    def is_full(self, consultant_id: int, day: date) -> bool:
+        """Whether the consultant's day is at its published cap, in one round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(self.key(consultant_id, day))
+        pipe.hget(self.caps_key, consultant_id)
+        count, cap = pipe.execute()
+        return bool(cap) and int(cap) > 0 and int(count or 0) >= int(cap)
+
+    def rebuild(self, counts: Dict[Tuple[int, date], int], caps: Dict[int, int],
+                start: date, days: int = REBUILD_DAYS) -> int:
+        """
+        Replace the counters for days [start, start + days) and the published caps.
+
+        Counters in the range that counts does not mention are deleted, so
+        drift to a phantom session is repaired too. A booking racing with a
+        rebuild can be lost from its counter until the next one.
+
+        Args:
+            counts: Sessions per (consultant_id, day), from count_sessions
+            caps: Daily cap per consultant, from load_caps
+
+        Returns:
+            int: Counters written
+        """
+        consultant_ids = set(caps) | {consultant_id for consultant_id, _ in counts}
+        window = [start + timedelta(days=offset) for offset in range(days)]
+        # Swapped in one transaction so a reserve never sees the caps missing
+        caps_pipe = self.redis.pipeline()
+        caps_pipe.delete(self.caps_key)
+        if caps:
+            caps_pipe.hset(self.caps_key, mapping=caps)
+        caps_pipe.execute()
+
+        pipe = self.redis.pipeline(transaction=False)
+        written = 0
+        for consultant_id in consultant_ids:
+            for day in window:
+                count = counts.get((consultant_id, day))
+                if count:
+                    pipe.set(self.key(consultant_id, day), count, exat=_expires_at(day))
+                    written += 1
+                else:
+                    pipe.delete(self.key(consultant_id, day))
+                if len(pipe) >= WRITE_BATCH:
+                    pipe.execute()
+        pipe.execute()
+        return written
+
+def count_sessions(connection, start: date, days: int = REBUILD_DAYS) -> Dict[Tuple[int, date], int]:
+    """Sessions per (consultant_id, UTC day) in [start, start + days), from Postgres"""
+    start_at = datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc)
+    with connection.cursor() as cursor:
+        cursor.execute(_COUNT_SESSIONS, {'statuses': list(APPOINTMENT_STATUSES), 'start': start_at,
+                                         'end': start_at + timedelta(days=days)})
+        return {(consultant_id, day): count for consultant_id, day, count in cursor}
+
+def load_caps(connection, rule_caps: Optional[Dict[tuple, int]] = None) -> Dict[int, int]:
+    """
+    Daily cap per active consultant.
+
+    Args:
+        rule_caps: max_daily_sessions per (specialization, is_preferred),
+            from RuleEngine.daily_session_caps; the lower of the rule and the
+            consultant's own cap applies
+    """
+    caps = {}
+    with connection.cursor() as cursor:
+        cursor.execute(_CAPS)
+        for consultant_id, specialization, is_preferred, max_daily_sessions in cursor:
+            limits = [limit for limit in (max_daily_sessions,
+                                          (rule_caps or {}).get((specialization, is_preferred)))
+                      if limit]
+            if limits:
+                caps[consultant_id] = min(limits)
+    return caps
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Rebuild the daily session counters in Redis from Postgres')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'postgresql://localhost/climbup'))
+    parser.add_argument('--redis-url', default=os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    parser.add_argument('--mongodb-uri', default=os.getenv('MONGODB_URI'),
+                        help='Also apply max_daily_sessions from the consultant rules')
+    parser.add_argument('--days', type=int, default=REBUILD_DAYS)
+    args = parser.parse_args(argv)
+
+    import psycopg2
+    from .instrumentation import InstrumentedRedis
+    started = time.perf_counter()
+    rule_caps = None
+    if args.mongodb_uri:
+        from ..models.mongodb.rules import RuleEngine
+        rule_caps = RuleEngine(args.mongodb_uri).daily_session_caps()
+
+    start = datetime.utcnow().date()
+    connection = psycopg2.connect(args.database_url)
+    try:
+        with connection:
+            counts = count_sessions(connection, start, args.days)
+            caps = load_caps(connection, rule_caps)
+    finally:
+        connection.close()
+    counter = DailySessionCounter(InstrumentedRedis.from_url(args.redis_url))
+    written = counter.rebuild(counts, caps, start, args.days)
+    log_info("Rebuilt %d daily session counters and %d caps in %.1f s", written, len(caps),
+             time.perf_counter() - started)
+
+if __name__ == '__main__':
+    configure_logging()
+    main() 
\ No newline at end of file
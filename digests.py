@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from redis.commands.core import Script
+from .logging_service import configure_logging, log_info
+from .notifications import (CONSULTANT_CANCELLED, CONSULTANT_CONFIRMED, CONSULTANT_DIGEST, CONSULTANT_HOLD,
+                            NotificationQueue)
+from .reminders import unix_time
+
+# Update kinds, in the order a slot moves through them
+HOLD = 'hold'
+CONFIRMED = 'confirmed'
+CANCELLED = 'cancelled'
+
+KEY_PREFIX = 'digests'
+DEFAULT_WINDOW = 900.0  # seconds updates are collected before a digest goes out
+BATCH_SIZE = 500  # consultants per flush
+LEASE = 60.0  # seconds a claimed buffer stays with its flush before another may take it
+POLL_INTERVAL = 5.0
+
+_TEMPLATES = {HOLD: CONSULTANT_HOLD, CONFIRMED: CONSULTANT_CONFIRMED, CANCELLED: CONSULTANT_CANCELLED}
+_LABELS = {HOLD: 'held, awaiting confirmation', CONFIRMED: 'confirmed', CANCELLED: 'cancelled'}
+
+# KEYS buffer, due set; ARGV consultant ID, update, flush time. The first
+# update in a window sets the flush time; later ones join it.
+_ADD = Script(None, b"""
+redis.call('RPUSH', KEYS[1], ARGV[2])
+redis.call('ZADD', KEYS[2], 'NX', ARGV[3], ARGV[1])
+return 1
+""")
+
+# KEYS buffer; ARGV slot start time. Drops the buffered updates for a slot
+# whose cancellation went out on its own, so no later digest still reports
+# it held or confirmed.
+_DROP_SLOT = Script(None, b"""
+local dropped = 0
+for _, update in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+    if cjson.decode(update)['start_time'] == ARGV[1] then
+        dropped = dropped + redis.call('LREM', KEYS[1], 0, update)
+    end
+end
+return dropped
+""")
+
+# KEYS due set; ARGV now, lease until, limit, key prefix. Returns
+# consultant ID, updates, ... for each due buffer. The buffer is renamed
+# aside, so updates arriving during the flush start the next window, and a
+# flush that dies before completing hands the same updates (and so the same
+# digest ID) to the next one.
+_CLAIM = Script(None, b"""
+local claimed = {}
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[3])
+for _, id in ipairs(ids) do
+    local flushing = ARGV[4] .. ':flushing:' .. id
+    if redis.call('EXISTS', flushing) == 0 and redis.call('EXISTS', ARGV[4] .. ':buffer:' .. id) == 1 then
+        redis.call('RENAME', ARGV[4] .. ':buffer:' .. id, flushing)
+    end
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[2], id)
+    claimed[#claimed + 1] = id
+    claimed[#claimed + 1] = redis.call('LRANGE', flushing, 0, -1)
+end
+return claimed
+""")
+
+# KEYS flushing buffer, buffer, due set; ARGV consultant ID, next flush time
+_COMPLETE = Script(None, b"""
+redis.call('DEL', KEYS[1])
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('ZADD', KEYS[3], ARGV[2], ARGV[1])
+else
+    redis.call('ZREM', KEYS[3], ARGV[1])
+end
+return 1
+""")
+
+def merge(updates: List[Dict]) -> List[Tuple[str, str]]:
+    """
+    Collapse a consultant's updates to the latest state of each slot.
+
+    A hold that was confirmed, or a booking that was cancelled, within the
+    window is one line, not two.
+
+    Returns:
+        list: (start_time, kind) per slot, earliest slot first
+    """
+    latest: Dict[str, str] = {}
+    for update in updates:
+        latest[update['start_time']] = update['kind']
+    return sorted(latest.items())
+
+def digest_event(consultant_id: int, updates: List[Dict]) -> Dict:
+    """
+    Build the notification for a window's updates; enqueue_many arguments.
+
+    Updates that all concern one slot are sent with that update's own
+    template; more slots become one digest. The event ID comes from the
+    first update, so building it again from the same updates cannot notify
+    twice.
+    """
+    slots = merge(updates)
+    event_id = f"digest:{consultant_id}:{updates[0]['id']}"
+    if len(slots) == 1:
+        start_time, kind = slots[0]
+        return {'event_type': _TEMPLATES[kind], 'user_id': consultant_id,
+                'context': {'start_time': start_time}, 'event_id': event_id}
+    kinds = [kind for _, kind in slots]
+    return {
+        'event_type': CONSULTANT_DIGEST, 'user_id': consultant_id, 'event_id': event_id,
+        'context': {
+            'count': len(slots), 'held': kinds.count(HOLD), 'confirmed': kinds.count(CONFIRMED),
+            'cancelled': kinds.count(CANCELLED),
+            'summary': '\n'.join(f"- {start_time}: {_LABELS[kind]}" for start_time, kind in slots)
+        }
+    }
+
+class DigestBuffer:
+    def __init__(self, redis_client, notifications: NotificationQueue, window: float = DEFAULT_WINDOW,
+                 prefix: str = KEY_PREFIX):
+        """
+        Coalesces consultants' booking updates into periodic digests.
+
+        Holds, confirmations and cancellations are buffered per consultant
+        in a Redis list. The first update in a window schedules the
+        consultant's flush in a sorted set, window seconds later; flush()
+        reads only the due consultants and queues one notification for
+        each, covering every update since the last. Cancellations of slots
+        due before the window would close skip the buffer and are queued
+        at once, and the slot's buffered updates are dropped.
+
+        Args:
+            redis_client: Redis client, or a LazyClient around one
+            notifications: Queue the digests are delivered through
+            window: Seconds updates are collected per consultant
+            prefix: Key prefix
+        """
+        self.redis = redis_client
+        self.notifications = notifications
+        self.window = window
+        self.prefix = prefix
+        self.due_key = f'{prefix}:due'
+
+    def buffer_key(self, consultant_id) -> str:
+        return f'{self.prefix}:buffer:{consultant_id}'
+
+    def flushing_key(self, consultant_id) -> str:
+        return f'{self.prefix}:flushing:{consultant_id}'
+
+    def is_urgent(self, kind: str, start_time: datetime, now: datetime) -> bool:
+        """Same-day cancellations, and any the window would delay past the slot, go out at once"""
+        return kind == CANCELLED and (start_time.date() <= now.date() or
+                                      start_time <= now + timedelta(seconds=self.window))
+
+    def add(self, consultant_id: int, kind: str, start_time: datetime, now: Optional[datetime] = None,
+            event_id: Optional[str] = None) -> bool:
+        """
+        Buffer one update for the consultant's next digest; one Redis call, two if urgent.
+
+        Args:
+            consultant_id: Recipient
+            kind: HOLD, CONFIRMED or CANCELLED
+            start_time: Start of the slot the update is about
+            now: Current time, default utcnow
+            event_id: Stable ID for an urgent update, so a retried producer
+                notifies once
+
+        Returns:
+            bool: False if the update was urgent and queued on its own
+        """
+        now = now or datetime.utcnow()
+        if self.is_urgent(kind, start_time, now):
+            self.notifications.enqueue(_TEMPLATES[kind], consultant_id, {'start_time': start_time.isoformat()},
+                                       event_id=event_id)
+            _DROP_SLOT([self.buffer_key(consultant_id)], [start_time.isoformat()], client=self.redis)
+            return False
+        update = json.dumps({'id': uuid.uuid4().hex, 'kind': kind, 'start_time': start_time.isoformat()})
+        _ADD([self.buffer_key(consultant_id), self.due_key],
+             [consultant_id, update, unix_time(now) + self.window], client=self.redis)
+        return True
+
+    def flush(self, now: Optional[datetime] = None, limit: int = BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Queue a digest for up to limit consultants whose window has closed.
+
+        Returns:
+            tuple: (notifications queued, updates they cover)
+        """
+        now_ts = unix_time(now or datetime.utcnow())
+        claimed = _CLAIM([self.due_key], [now_ts, now_ts + LEASE, limit, self.prefix], client=self.redis)
+        if not claimed:
+            return 0, 0
+
+        consultant_ids, events, covered = [], [], 0
+        for i in range(0, len(claimed), 2):
+            consultant_id = claimed[i].decode() if isinstance(claimed[i], bytes) else claimed[i]
+            consultant_ids.append(consultant_id)
+            updates = [json.loads(update) for update in claimed[i + 1]]
+            if updates:
+                events.append(digest_event(int(consultant_id), updates))
+                covered += len(updates)
+        self.notifications.enqueue_many(events)
+
+        pipe = self.redis.pipeline(transaction=False)
+        for consultant_id in consultant_ids:
+            _COMPLETE([self.flushing_key(consultant_id), self.buffer_key(consultant_id), self.due_key],
+                      [consultant_id, now_ts + self.window], client=pipe)
+        pipe.execute()
+        return len(events), covered
+
+    def run(self, should_stop: Callable[[], bool] = lambda: False) -> None:
+        while not should_stop():
+            queued, covered = self.flush()
+            if queued:
+                log_info("Queued %d consultant digests covering %d updates", queued, covered, hot_path=True)
+            if queued < BATCH_SIZE:
+                time.sleep(POLL_INTERVAL)
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Send consultants digests of their booking updates')
+    parser.add_argument('--redis-url', default=os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    parser.add_argument('--window', type=float, default=float(os.getenv('DIGEST_WINDOW', DEFAULT_WINDOW)))
+    args = parser.parse_args(argv)
+
+    from .instrumentation import InstrumentedRedis
+    redis_client = InstrumentedRedis.from_url(args.redis_url)
+    DigestBuffer(redis_client, NotificationQueue(redis_client), args.window).run()
+
+if __name__ == '__main__':
+    configure_logging()
+    main() 
\ No newline at end of file
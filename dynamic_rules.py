@@ -0,0 +1,306 @@
+import threading
+from datetime import datetime
+from time import monotonic
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from ..services.logging_service import log_info, log_warning
+
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+MINUTES_PER_DAY = 24 * 60
+VERSION_ID = 'dynamic_rules'
+
+class CompiledRule:
+    __slots__ = ('name', 'priority', 'check', 'multiplier', 'hold_time', 'reject')
+
+    def __init__(self, name: str, priority: int, check: Optional[Callable[[Dict[str, Any]], bool]],
+                 multiplier: Optional[float], hold_time: Optional[int], reject: Optional[str]):
+        self.name = name
+        self.priority = priority
+        self.check = check  # Conditions the decision table cannot index; None if there are none
+        self.multiplier = multiplier
+        self.hold_time = hold_time
+        self.reject = reject
+
+class Decision:
+    __slots__ = ('multiplier', 'hold_time', 'reject', 'matched')
+
+    def __init__(self, multiplier: float = 1.0, hold_time: Optional[int] = None,
+                 reject: Optional[str] = None, matched: Tuple[str, ...] = ()):
+        self.multiplier = multiplier
+        self.hold_time = hold_time
+        self.reject = reject
+        self.matched = matched
+
+    @property
+    def allowed(self) -> bool:
+        return self.reject is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'multiplier': self.multiplier, 'hold_time': self.hold_time,
+                'reject': self.reject, 'matched': list(self.matched)}
+
+def _minute_of_day(value: str) -> int:
+    hour, _, minute = value.partition(':')
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time {value!r}")
+    return hour * 60 + minute
+
+def _predicate(when: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Build one closure for the conditions that are not indexed by day, time or specialization"""
+    checks = []
+    if 'is_preferred' in when:
+        preferred = bool(when['is_preferred'])
+        checks.append(lambda booking: bool(booking.get('is_preferred')) is preferred)
+    if 'min_duration' in when:
+        min_duration = int(when['min_duration'])
+        checks.append(lambda booking: booking.get('duration', 0) >= min_duration)
+    if 'max_duration' in when:
+        max_duration = int(when['max_duration'])
+        checks.append(lambda booking: booking.get('duration', 0) <= max_duration)
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda booking: all(check(booking) for check in checks)
+
+def compile_rule(document: Dict[str, Any]):
+    """
+    Compile one rule document.
+
+    A rule document looks like:
+        {"name": "weekday_mornings", "priority": 10, "active": True,
+         "when": {"days": ["Monday"], "start": "09:00", "end": "11:00",
+                  "specializations": ["tech"], "is_preferred": True,
+                  "min_duration": 30, "max_duration": 120},
+         "then": {"multiplier": 1.2, "hold_time": 1200, "reject": "reason"}}
+    Every "when" key is optional; a missing key matches everything. "end" is
+    inclusive; an end before the start (22:00-06:00) covers both ends of each
+    listed day. "then" needs at least one effect.
+
+    Returns:
+        tuple: (CompiledRule, day indexes, (start, end) minutes, specializations or None)
+
+    Raises:
+        ValueError: If the document is malformed
+    """
+    when = document.get('when') or {}
+    then = document.get('then') or {}
+    if not ({'multiplier', 'hold_time', 'reject'} & set(then)):
+        raise ValueError("Rule has no effect")
+
+    days = tuple(DAYS.index(day.capitalize()) for day in when.get('days', DAYS))
+    start = _minute_of_day(when['start']) if 'start' in when else 0
+    end = _minute_of_day(when['end']) if 'end' in when else MINUTES_PER_DAY - 1
+    specializations = when.get('specializations')
+
+    rule = CompiledRule(
+        name=str(document.get('name', document.get('_id'))),
+        priority=int(document.get('priority', 0)),
+        check=_predicate(when),
+        multiplier=float(then['multiplier']) if 'multiplier' in then else None,
+        hold_time=int(then['hold_time']) if 'hold_time' in then else None,
+        reject=str(then['reject']) if 'reject' in then else None
+    )
+    return rule, days, (start, end), tuple(specializations) if specializations is not None else None
+
+class CompiledRules:
+    def __init__(self, documents: Iterable[Dict[str, Any]], version: int = 0):
+        """
+        Decision table built from rule documents.
+
+        For each weekday and minute of the day the table holds the rules
+        whose day and time window cover it, already split by specialization
+        and sorted by priority. Evaluating a booking is two list indexes and
+        a dict lookup, then only the rules in that bucket are looked at, so
+        rules for other days, times or specializations cost nothing.
+        Consecutive minutes covered by the same rules share one bucket.
+
+        Malformed documents are logged and skipped.
+
+        Args:
+            documents: Rule documents (see compile_rule)
+            version: Rules version the documents were loaded at
+        """
+        self.version = version
+        self.rules: List[CompiledRule] = []
+        windows = []
+        for document in documents:
+            if not document.get('active', True):
+                continue
+            try:
+                rule, days, (start, end), specializations = compile_rule(document)
+            except (KeyError, TypeError, ValueError) as e:
+                log_warning("Skipping rule %s: %s", document.get('name', document.get('_id')), e)
+                continue
+            self.rules.append(rule)
+            windows.append((days, start, end, specializations))
+
+        # Highest priority first; name breaks ties so the order is stable across reloads
+        order = sorted(range(len(self.rules)),
+                       key=lambda i: (-self.rules[i].priority, self.rules[i].name))
+        rank = {index: position for position, index in enumerate(order)}
+
+        self.table: List[List[Dict[Optional[str], Tuple[CompiledRule, ...]]]] = []
+        buckets: Dict[frozenset, Dict[Optional[str], Tuple[CompiledRule, ...]]] = {}
+        for day in range(len(DAYS)):
+            # Sweep the day: rules enter at their start minute and leave after their end
+            enter = [[] for _ in range(MINUTES_PER_DAY + 1)]
+            leave = [[] for _ in range(MINUTES_PER_DAY + 1)]
+            for index, (days, start, end, _) in enumerate(windows):
+                if day not in days:
+                    continue
+                if start <= end:
+                    enter[start].append(index)
+                    leave[end + 1].append(index)
+                else:
+                    enter[0].append(index)
+                    leave[end + 1].append(index)
+                    enter[start].append(index)
+            active = set()
+            day_table = []
+            bucket = None
+            for minute in range(MINUTES_PER_DAY):
+                if enter[minute] or leave[minute] or bucket is None:
+                    active.difference_update(leave[minute])
+                    active.update(enter[minute])
+                    key = frozenset(active)
+                    bucket = buckets.get(key)
+                    if bucket is None:
+                        bucket = buckets[key] = self._bucket(sorted(key, key=rank.__getitem__), windows)
+                day_table.append(bucket)
+            self.table.append(day_table)
+
+    def _bucket(self, indexes: List[int], windows) -> Dict[Optional[str], Tuple[CompiledRule, ...]]:
+        """Split rules by specialization; None holds the rules that apply to any"""
+        specializations = {specialization for index in indexes
+                           for specialization in (windows[index][3] or ())}
+        bucket = {None: tuple(self.rules[index] for index in indexes if windows[index][3] is None)}
+        for specialization in specializations:
+            bucket[specialization] = tuple(
+                self.rules[index] for index in indexes
+                if windows[index][3] is None or specialization in windows[index][3])
+        return bucket
+
+    def evaluate(self, booking: Dict[str, Any]) -> Decision:
+        """
+        Evaluate the rules for one booking.
+
+        Args:
+            booking: start_time (datetime) and optionally duration (minutes),
+                specialization and is_preferred
+
+        Returns:
+            Decision: The highest priority matching rule sets each effect;
+            matched lists every rule that matched, highest priority first
+        """
+        start_time: datetime = booking['start_time']
+        bucket = self.table[start_time.weekday()][start_time.hour * 60 + start_time.minute]
+        candidates = bucket.get(booking.get('specialization'), bucket[None])
+        if not candidates:
+            return Decision()
+
+        multiplier = hold_time = reject = None
+        matched = []
+        for rule in candidates:
+            if rule.check is not None and not rule.check(booking):
+                continue
+            matched.append(rule.name)
+            if multiplier is None:
+                multiplier = rule.multiplier
+            if hold_time is None:
+                hold_time = rule.hold_time
+            if reject is None:
+                reject = rule.reject
+        return Decision(1.0 if multiplier is None else multiplier, hold_time, reject, tuple(matched))
+
+    def evaluate_many(self, bookings: Iterable[Dict[str, Any]]) -> List[Decision]:
+        """Evaluate the rules for each booking against this one version of the rules"""
+        evaluate = self.evaluate
+        return [evaluate(booking) for booking in bookings]
+
+class DynamicRuleEngine:
+    def __init__(self, db, check_interval: float = 5.0):
+        """
+        Declarative rules stored in MongoDB, compiled once per rules version.
+
+        Rule documents live in db.dynamic_rules; db.rule_versions holds a
+        counter that every write through this class bumps. The version is
+        checked at most every check_interval seconds and the rules are
+        reloaded and recompiled only when it has changed, so workers pick up
+        rule changes without a restart.
+
+        Args:
+            db: MongoDB database, e.g. RuleEngine(...).db
+            check_interval: Seconds between version checks
+        """
+        self.rules_collection = db.dynamic_rules
+        self.versions = db.rule_versions
+        self.check_interval = check_interval
+        self._compiled: Optional[CompiledRules] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def initialize_collections(self):
+        self.rules_collection.create_index([("name", 1)], unique=True)
+
+    def _version(self) -> int:
+        document = self.versions.find_one({"_id": VERSION_ID}, {"version": 1})
+        return document["version"] if document else 0
+
+    def bump_version(self) -> int:
+        """Mark the rules as changed so every engine reloads them on its next check"""
+        # return_document=True is ReturnDocument.AFTER, without importing pymongo here
+        document = self.versions.find_one_and_update(
+            {"_id": VERSION_ID}, {"$inc": {"version": 1}}, upsert=True, return_document=True)
+        return document["version"]
+
+    def add_rule(self, document: Dict[str, Any]) -> int:
+        """
+        Insert or replace a rule by name.
+
+        Returns:
+            int: The new rules version
+
+        Raises:
+            ValueError: If the rule does not compile
+        """
+        compile_rule(document)
+        self.rules_collection.replace_one({"name": document["name"]}, document, upsert=True)
+        return self.bump_version()
+
+    def remove_rule(self, name: str) -> int:
+        """Delete a rule by name and return the new rules version"""
+        self.rules_collection.delete_one({"name": name})
+        return self.bump_version()
+
+    def reload(self) -> CompiledRules:
+        """Load and compile the current rules now"""
+        with self._lock:
+            # Read the version first: a write racing with the load is then at
+            # worst picked up again on the next check
+            version = self._version()
+            started = monotonic()
+            compiled = CompiledRules(self.rules_collection.find({}, {"_id": 0}), version)
+            self._compiled = compiled
+            self._next_check = monotonic() + self.check_interval
+            log_info("Compiled %s dynamic rules at version %s in %.1f ms", len(compiled.rules),
+                     version, (monotonic() - started) * 1000)
+            return compiled
+
+    def ruleset(self) -> CompiledRules:
+        """Return the compiled rules, reloading them if the version has changed"""
+        compiled = self._compiled
+        if compiled is not None and monotonic() < self._next_check:
+            return compiled
+        if compiled is None or self._version() != compiled.version:
+            return self.reload()
+        self._next_check = monotonic() + self.check_interval
+        return compiled
+
+    def evaluate(self, booking: Dict[str, Any]) -> Decision:
+        """Evaluate the current rules for one booking (see CompiledRules.evaluate)"""
+        return self.ruleset().evaluate(booking)
+
+    def evaluate_many(self, bookings: Iterable[Dict[str, Any]]) -> List[Decision]:
+        """Evaluate a batch of candidate bookings, all against the same rules version"""
+        return self.ruleset().evaluate_many(bookings) 
\ No newline at end of file
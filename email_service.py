@@ -0,0 +1,154 @@
+import queue
+import smtplib
+import threading
+from email.message import EmailMessage
+from time import monotonic
+from typing import List, Optional, Sequence, Tuple
+from .logging_service import log_info, log_warning
+
+def build_message(sender: str, to: str, subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(body)
+    return message
+
+class SMTPPool:
+    def __init__(self, host: str, port: int = 25, username: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = False, timeout: float = 10.0,
+                 size: int = 1, max_idle: float = 30.0):
+        """
+        Open SMTP connections kept for reuse across batches.
+
+        Connecting, the TLS handshake and authentication happen once per
+        connection instead of once per message. A connection idle for more
+        than max_idle seconds is checked with NOOP before it is reused, and
+        one the server has dropped is replaced.
+
+        Args:
+            host, port: SMTP server
+            username, password: Login, if the server needs one
+            starttls: Upgrade the connection with STARTTLS
+            timeout: Socket timeout in seconds
+            size: Connections kept; one per thread sending concurrently
+            max_idle: Seconds a connection may sit unused before it is checked
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> smtplib.SMTP:
+        started = monotonic()
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or '')
+        log_info("Connected to SMTP server %s:%s in %.1f ms", self.host, self.port,
+                 (monotonic() - started) * 1000)
+        return connection
+
+    def _acquire(self) -> smtplib.SMTP:
+        self._slots.acquire()
+        try:
+            try:
+                connection, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if monotonic() - last_used > self.max_idle:
+                try:
+                    if connection.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected("NOOP failed")
+                except OSError:
+                    self._quit(connection)
+                    return self._connect()
+            return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, connection: Optional[smtplib.SMTP]) -> None:
+        if connection is not None:
+            self._idle.put_nowait((connection, monotonic()))
+        self._slots.release()
+
+    @staticmethod
+    def _quit(connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except OSError:
+            connection.close()
+
+    def _send(self, connection: smtplib.SMTP, message: EmailMessage) -> Tuple[Optional[smtplib.SMTP], Optional[Exception]]:
+        """Send one message, reconnecting once if the connection has dropped; returns (connection, error)"""
+        for attempt in range(2):
+            try:
+                connection.send_message(message)
+                return connection, None
+            except smtplib.SMTPServerDisconnected as e:
+                error = e
+            except smtplib.SMTPException as e:
+                # Refused by the server (SMTPException is an OSError, so this
+                # comes first); the connection is still good
+                try:
+                    connection.rset()
+                except OSError:
+                    pass
+                return connection, e
+            except OSError as e:
+                error = e
+            self._quit(connection)
+            if attempt:
+                return None, error
+            try:
+                connection = self._connect()
+            except OSError as e:
+                return None, e
+        return None, error
+
+    def send_batch(self, messages: Sequence[EmailMessage]) -> List[Optional[Exception]]:
+        """
+        Send messages over one pooled connection.
+
+        A dropped connection is reopened once and the message retried; a
+        message the server refuses fails alone and the batch carries on.
+
+        Returns:
+            list: None for each message sent, or the exception it failed with
+        """
+        results: List[Optional[Exception]] = []
+        if not messages:
+            return results
+        try:
+            connection = self._acquire()
+        except OSError as e:
+            log_warning("Cannot connect to SMTP server %s:%s: %s", self.host, self.port, e)
+            return [e] * len(messages)
+
+        try:
+            for message in messages:
+                connection, error = self._send(connection, message)
+                results.append(error)
+                if connection is None:
+                    # Could not reconnect; the rest of the batch fails the same way
+                    results.extend([error] * (len(messages) - len(results)))
+                    break
+        finally:
+            self._release(connection)
+        return results
+
+    def close(self) -> None:
+        """Quit every idle connection"""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._quit(connection) 
\ No newline at end of file
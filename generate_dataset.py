@@ -0,0 +1,483 @@
+"""
+Seeded synthetic dataset generator for scale testing.
+
+Bulk-loads users, consultants (with varied availability and
+specializations), appointments, slot holds and payments into Postgres with
+COPY, and peak hour, consultant and consultant preference rules into MongoDB
+with batched insert_many. Rows are generated lazily and streamed, so memory
+stays flat at any scale.
+
+Every table is generated in fixed-size chunks, each with its own random
+source derived from (seed, table, chunk), and every ID is computed from
+the spec rather than assigned by a sequence. The same seed and spec
+therefore always produce byte-identical data, whatever --jobs is.
+
+Usage:
+    python generate_dataset.py --scale large --jobs 8 --truncate --defer-indexes
+    python generate_dataset.py --consultants 500 --clients 5000 --appointments 100000
+    python generate_dataset.py --scale small --csv-dir /tmp/dataset   # files only
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCALES = {
+    'small': {'consultants': 100, 'clients': 2000, 'appointments': 20000},
+    'medium': {'consultants': 10000, 'clients': 200000, 'appointments': 5000000},
+    'large': {'consultants': 100000, 'clients': 1000000, 'appointments': 50000000},
+}
+
+START_DATE = datetime(2024, 1, 1)
+# Appointments before this date are in the past (completed or cancelled)
+AS_OF = START_DATE + timedelta(days=180)
+USERS_PER_CHUNK = 50000
+CONSULTANTS_PER_CHUNK = 200
+MONGO_BATCH_SIZE = 10000
+PBKDF2_ITERATIONS = 600000
+
+SPECIALIZATIONS = ['career', 'finance', 'fitness', 'legal', 'marketing', 'nutrition', 'tech', 'wellness']
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+PEAK_HOURS = {9, 10, 17, 18}
+FIRST_NAMES = ['Amara', 'Ben', 'Chen', 'Dara', 'Eli', 'Fatima', 'Grace', 'Hugo', 'Ines', 'Jomo',
+               'Kofi', 'Lena', 'Mateo', 'Nia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sami', 'Tariq']
+LAST_NAMES = ['Adeyemi', 'Brown', 'Costa', 'Dubois', 'Eze', 'Fischer', 'Garcia', 'Hansen', 'Ito',
+              'Jones', 'Kim', 'Lopez', 'Mensah', 'Novak', 'Okafor', 'Patel', 'Rossi', 'Smith']
+
+# Indexes from schema.sql that are cheaper to build once after a bulk load
+DEFERRED_INDEXES = {
+    'idx_appointments_client': 'CREATE INDEX idx_appointments_client ON appointments(client_id)',
+    'idx_appointments_consultant': 'CREATE INDEX idx_appointments_consultant ON appointments(consultant_id)',
+    'idx_appointments_time': 'CREATE INDEX idx_appointments_time ON appointments(start_time, end_time)',
+    'idx_slot_holds_time': 'CREATE INDEX idx_slot_holds_time ON slot_holds(start_time, end_time)',
+    'idx_appointments_consultant_start':
+        'CREATE INDEX idx_appointments_consultant_start ON appointments(consultant_id, start_time)',
+    'idx_slot_holds_consultant_start':
+        'CREATE INDEX idx_slot_holds_consultant_start ON slot_holds(consultant_id, start_time)',
+    'idx_appointments_updated_at': 'CREATE INDEX idx_appointments_updated_at ON appointments(updated_at)',
+    'idx_slot_holds_updated_at': 'CREATE INDEX idx_slot_holds_updated_at ON slot_holds(updated_at)',
+    'idx_appointments_confirmed_start':
+        "CREATE INDEX idx_appointments_confirmed_start ON appointments(start_time) WHERE status = 'confirmed'",
+    'idx_payments_appointment': 'CREATE INDEX idx_payments_appointment ON payments(appointment_id)',
+}
+
+COLUMNS = {
+    'users': ('id', 'email', 'password_hash', 'first_name', 'last_name', 'role', 'is_preferred',
+              'created_at', 'updated_at'),
+    'consultants': ('user_id', 'specialization', 'hourly_rate', 'availability', 'max_daily_sessions',
+                    'is_active'),
+    'appointments': ('id', 'client_id', 'consultant_id', 'start_time', 'end_time', 'status',
+                     'payment_status', 'payment_proof_url', 'is_peak_hour', 'created_at', 'updated_at'),
+    'slot_holds': ('id', 'appointment_id', 'client_id', 'consultant_id', 'start_time', 'end_time',
+                   'status', 'created_at', 'updated_at', 'expires_at'),
+    'payments': ('id', 'appointment_id', 'amount', 'status', 'payment_proof_url', 'verified_at',
+                 'created_at', 'updated_at'),
+}
+
+class DatasetSpec:
+    def __init__(self, consultants: int, clients: int, appointments: int, seed: int = 42,
+                 days: int = 365, hold_ratio: float = 0.05, preference_rules: int = 50,
+                 password: str = 'password123'):
+        """
+        Size and shape of a generated dataset.
+
+        Args:
+            consultants: Consultant accounts (user IDs 1..consultants)
+            clients: Client accounts (user IDs after the consultants)
+            appointments: Appointments in total, spread evenly over consultants
+            seed: Seed for every random choice
+            days: Days from START_DATE that appointments fall in
+            hold_ratio: Share of appointments that also get a slot hold
+            preference_rules: ConsultantPreferenceRule documents
+            password: Password of every generated account
+        """
+        self.consultants = consultants
+        self.clients = clients
+        self.appointments = appointments
+        self.seed = seed
+        self.days = days
+        self.hold_ratio = hold_ratio
+        self.preference_rules = preference_rules
+        self.password = password
+
+    @property
+    def users(self) -> int:
+        return self.consultants + self.clients
+
+    def appointment_count(self, consultant_id: int) -> int:
+        base, extra = divmod(self.appointments, self.consultants)
+        return base + (1 if consultant_id <= extra else 0)
+
+    def first_appointment_id(self, consultant_id: int) -> int:
+        base, extra = divmod(self.appointments, self.consultants)
+        return (consultant_id - 1) * base + min(consultant_id - 1, extra) + 1
+
+def _rng(spec: DatasetSpec, table: str, chunk: int) -> random.Random:
+    return random.Random(f"{spec.seed}:{table}:{chunk}")
+
+def _ts(value: datetime) -> str:
+    return value.strftime('%Y-%m-%d %H:%M:%S+00')
+
+def _csv(row: Iterable) -> str:
+    fields = []
+    for value in row:
+        if value is None:
+            fields.append('')
+        elif isinstance(value, bool):
+            fields.append('t' if value else 'f')
+        elif isinstance(value, str) and any(c in value for c in ',"\n'):
+            fields.append('"' + value.replace('"', '""') + '"')
+        else:
+            fields.append(str(value))
+    return ','.join(fields) + '\n'
+
+def _password_hash(spec: DatasetSpec) -> str:
+    """
+    One werkzeug-compatible hash shared by every account.
+
+    Hashing per row would dominate the run, and generate_password_hash
+    salts randomly, so the salt is derived from the seed instead.
+    """
+    salt = hashlib.sha256(f"{spec.seed}:salt".encode()).hexdigest()[:16]
+    digest = hashlib.pbkdf2_hmac('sha256', spec.password.encode(), salt.encode(), PBKDF2_ITERATIONS)
+    return f"pbkdf2:sha256:{PBKDF2_ITERATIONS}${salt}${digest.hex()}"
+
+def user_rows(spec: DatasetSpec, chunk: int, password_hash: str) -> Iterator[Tuple]:
+    """Rows for users with IDs in the chunk'th block of USERS_PER_CHUNK."""
+    rng = _rng(spec, 'users', chunk)
+    first_id = chunk * USERS_PER_CHUNK + 1
+    for user_id in range(first_id, min(first_id + USERS_PER_CHUNK, spec.users + 1)):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        is_consultant = user_id <= spec.consultants
+        created_at = START_DATE - timedelta(days=rng.randrange(730), seconds=rng.randrange(86400))
+        yield (user_id, f"{first_name.lower()}.{last_name.lower()}{user_id}@example.com", password_hash,
+               first_name, last_name, 'consultant' if is_consultant else 'client',
+               is_consultant and rng.random() < 0.2, _ts(created_at), _ts(created_at))
+
+def consultant_profiles(spec: DatasetSpec, chunk: int) -> List[Dict]:
+    """Consultants with IDs in the chunk'th block of CONSULTANTS_PER_CHUNK."""
+    rng = _rng(spec, 'consultants', chunk)
+    first_id = chunk * CONSULTANTS_PER_CHUNK + 1
+    profiles = []
+    for consultant_id in range(first_id, min(first_id + CONSULTANTS_PER_CHUNK, spec.consultants + 1)):
+        working_days = sorted(rng.sample(range(7), rng.choice([4, 5, 5, 5, 6])))
+        start = rng.choice([7, 8, 9, 9, 10])
+        end = rng.choice([15, 16, 17, 17, 18, 19])
+        profiles.append({
+            'user_id': consultant_id,
+            'specialization': rng.choice(SPECIALIZATIONS),
+            'hourly_rate': rng.choice([50, 60, 75, 80, 100, 120, 150, 200]),
+            'availability': {str(day): {'start': start, 'end': end} for day in working_days},
+            'max_daily_sessions': rng.choice([6, 8, 8, 10]),
+            'is_active': rng.random() < 0.95
+        })
+    return profiles
+
+def consultant_rows(spec: DatasetSpec, chunk: int) -> Iterator[Tuple]:
+    for profile in consultant_profiles(spec, chunk):
+        yield (profile['user_id'], profile['specialization'], profile['hourly_rate'],
+               json.dumps(profile['availability'], separators=(',', ':')),
+               profile['max_daily_sessions'], profile['is_active'])
+
+def _appointment_status(rng: random.Random, start: datetime) -> Tuple[str, str]:
+    if start < AS_OF:
+        if rng.random() < 0.85:
+            return 'completed', 'verified'
+        return 'cancelled', rng.choice(['failed', 'pending'])
+    roll = rng.random()
+    if roll < 0.6:
+        return 'confirmed', rng.choice(['paid', 'verified'])
+    if roll < 0.9:
+        return 'pending', 'pending'
+    return 'cancelled', rng.choice(['failed', 'pending'])
+
+def booking_rows(spec: DatasetSpec, chunk: int) -> Iterator[Tuple[str, Tuple]]:
+    """
+    Appointments, slot holds and payments for the chunk's consultants.
+
+    Each consultant's appointments sit on distinct hourly slots inside their
+    availability, so no two overlap. Holds and payments reuse their
+    appointment's ID.
+
+    Yields:
+        tuple: (table, row)
+    """
+    rng = _rng(spec, 'appointments', chunk)
+    for profile in consultant_profiles(spec, chunk):
+        consultant_id = profile['user_id']
+        slots = []
+        for day in range(spec.days):
+            date = START_DATE + timedelta(days=day)
+            hours = profile['availability'].get(str(date.weekday()))
+            if hours:
+                slots.extend(date + timedelta(hours=hour) for hour in range(hours['start'], hours['end']))
+        count = min(spec.appointment_count(consultant_id), len(slots))
+        appointment_id = spec.first_appointment_id(consultant_id)
+
+        for index in sorted(rng.sample(range(len(slots)), count)):
+            start = slots[index]
+            end = start + timedelta(minutes=rng.choice([30, 45, 60, 60]))
+            status, payment_status = _appointment_status(rng, start)
+            is_peak = start.weekday() < 5 and start.hour in PEAK_HOURS
+            client_id = spec.consultants + 1 + rng.randrange(spec.clients)
+            created_at = start - timedelta(days=rng.randint(1, 30), minutes=rng.randrange(1440))
+            proof_url = None
+            if payment_status in ('paid', 'verified'):
+                proof_url = f"https://payments.example.com/proof/{appointment_id}"
+            yield 'appointments', (appointment_id, client_id, consultant_id, _ts(start), _ts(end), status,
+                                   payment_status, proof_url, is_peak, _ts(created_at), _ts(created_at))
+
+            if rng.random() < spec.hold_ratio:
+                hold_status = 'converted' if status != 'cancelled' else 'expired'
+                yield 'slot_holds', (appointment_id, appointment_id if hold_status == 'converted' else None,
+                                     client_id, consultant_id, _ts(start), _ts(end), hold_status,
+                                     _ts(created_at), _ts(created_at), _ts(created_at + timedelta(minutes=15)))
+
+            if proof_url:
+                amount = profile['hourly_rate'] * (end - start).seconds / 3600 * (1.2 if is_peak else 1.0)
+                verified_at = created_at + timedelta(hours=rng.randint(1, 48))
+                yield 'payments', (appointment_id, appointment_id, f"{amount:.2f}",
+                                   'verified' if payment_status == 'verified' else 'pending', proof_url,
+                                   _ts(verified_at) if payment_status == 'verified' else None,
+                                   _ts(created_at), _ts(verified_at))
+            appointment_id += 1
+
+def _object_id(spec: DatasetSpec, collection: str, index: int):
+    from bson import ObjectId
+    return ObjectId(hashlib.sha256(f"{spec.seed}:{collection}:{index}".encode()).digest()[:12])
+
+def rule_documents(spec: DatasetSpec) -> Iterator[Tuple[str, str, Dict]]:
+    """
+    Mongo rule documents.
+
+    Yields:
+        tuple: (database, collection, document); database is 'rules' for the
+        RuleEngine store and 'app' for the mongoengine models
+    """
+    rng = _rng(spec, 'rules', 0)
+    index = 0
+    for day in DAY_NAMES:
+        for start, end in ((9, 11), (17, 19)) if day not in ('Saturday', 'Sunday') else ((10, 13),):
+            multiplier = rng.choice([1.2, 1.25, 1.5])
+            for hour in range(start, end):
+                for minute in (0, 15, 30, 45):
+                    # RuleEngine matches time_range on "^{hour}:{minute}"
+                    yield 'rules', 'peak_hours', {
+                        '_id': _object_id(spec, 'peak_hours', index), 'day': day,
+                        'time_range': f"{hour}:{minute}-{end}:0", 'multiplier': multiplier,
+                        'created_at': START_DATE
+                    }
+                    index += 1
+            yield 'app', 'peak_hour_rule', {
+                '_id': _object_id(spec, 'peak_hour_rule', index), 'day': day,
+                'start_time': f"{start:02d}:00", 'end_time': f"{end:02d}:00", 'multiplier': multiplier,
+                'is_active': True, 'created_at': START_DATE, 'updated_at': START_DATE
+            }
+            index += 1
+
+    for specialization in SPECIALIZATIONS:
+        for is_preferred in (False, True):
+            yield 'rules', 'consultant_rules', {
+                '_id': _object_id(spec, 'consultant_rules', index), 'specialization': specialization,
+                'is_preferred': is_preferred, 'hold_time': 1200 if is_preferred else 900,
+                'max_daily_sessions': rng.choice([6, 8, 10]), 'created_at': START_DATE
+            }
+            index += 1
+
+    for i in range(spec.preference_rules):
+        preference_type = rng.choice(['specialization', 'specialization', 'rating', 'language'])
+        value = {
+            'specialization': lambda: rng.choice(SPECIALIZATIONS),
+            'rating': lambda: str(rng.choice([3, 4, 5])),
+            'language': lambda: rng.choice(['en', 'fr', 'sw', 'es', 'pt'])
+        }[preference_type]()
+        yield 'app', 'consultant_preference_rule', {
+            '_id': _object_id(spec, 'consultant_preference_rule', i), 'preference_type': preference_type,
+            'value': value, 'weight': round(rng.uniform(0.5, 3.0), 2), 'is_active': rng.random() < 0.9,
+            'created_at': START_DATE, 'updated_at': START_DATE
+        }
+
+class _CopyStream:
+    """File-like view over lazily generated CSV lines, for COPY ... FROM STDIN."""
+
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self._buffer = ''
+
+    def read(self, size: int = -1) -> str:
+        parts = [self._buffer]
+        length = len(self._buffer)
+        for line in self._lines:
+            parts.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+        data = ''.join(parts)
+        if size < 0:
+            self._buffer = ''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+def _copy(cursor, table: str, rows: Iterable[Tuple]) -> None:
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(COLUMNS[table])}) FROM STDIN WITH (FORMAT csv)",
+        _CopyStream(_csv(row) for row in rows), size=1 << 20)
+
+def _chunks(spec: DatasetSpec, table: str) -> int:
+    if table == 'users':
+        return -(-spec.users // USERS_PER_CHUNK)
+    return -(-spec.consultants // CONSULTANTS_PER_CHUNK)
+
+def _load_chunk(task: Tuple) -> Tuple[str, int]:
+    """Generate one chunk and COPY it into Postgres, or write it as CSV."""
+    spec, table, chunk, password_hash, database_url, csv_dir = task
+    if table == 'users':
+        streams = {'users': user_rows(spec, chunk, password_hash)}
+    elif table == 'consultants':
+        streams = {'consultants': consultant_rows(spec, chunk)}
+    else:
+        # Holds and payments reference the appointments, so they load after them
+        buffered = {'appointments': [], 'slot_holds': [], 'payments': []}
+        for target, row in booking_rows(spec, chunk):
+            buffered[target].append(row)
+        streams = buffered
+
+    if csv_dir:
+        for target, rows in streams.items():
+            with open(os.path.join(csv_dir, f"{target}.{chunk:05d}.csv"), 'w') as f:
+                f.writelines(_csv(row) for row in rows)
+        return table, chunk
+
+    import psycopg2
+    connection = psycopg2.connect(database_url)
+    try:
+        with connection, connection.cursor() as cursor:
+            for target, rows in streams.items():
+                _copy(cursor, target, rows)
+    finally:
+        connection.close()
+    return table, chunk
+
+def _run_phase(pool, spec: DatasetSpec, table: str, password_hash: str, database_url: str,
+               csv_dir: str) -> None:
+    tasks = [(spec, table, chunk, password_hash, database_url, csv_dir)
+             for chunk in range(_chunks(spec, table))]
+    for done, _ in enumerate(pool.imap_unordered(_load_chunk, tasks), 1):
+        if done % 10 == 0 or done == len(tasks):
+            logger.info("%s: %d/%d chunks", table, done, len(tasks))
+
+def load_mongo(spec: DatasetSpec, mongo_uri: str, csv_dir: str = None) -> None:
+    """Stream rule documents into MongoDB with batched insert_many, or to JSON lines."""
+    batches: Dict[Tuple[str, str], List[Dict]] = {}
+    if csv_dir:
+        from bson import json_util
+        files = {}
+        for database, collection, document in rule_documents(spec):
+            if collection not in files:
+                files[collection] = open(os.path.join(csv_dir, f"{collection}.jsonl"), 'w')
+            files[collection].write(json_util.dumps(document, sort_keys=True) + '\n')
+        for f in files.values():
+            f.close()
+        return
+
+    from pymongo import MongoClient
+    client = MongoClient(mongo_uri)
+    databases = {'rules': client.climbup_rules, 'app': client.get_database()}
+    for database, collection, document in rule_documents(spec):
+        batch = batches.setdefault((database, collection), [])
+        batch.append(document)
+        if len(batch) >= MONGO_BATCH_SIZE:
+            databases[database][collection].insert_many(batch, ordered=False)
+            batch.clear()
+    for (database, collection), batch in batches.items():
+        if batch:
+            databases[database][collection].insert_many(batch, ordered=False)
+    client.close()
+
+def generate(spec: DatasetSpec, database_url: str, mongo_uri: str, jobs: int = 1,
+             truncate: bool = False, defer_indexes: bool = False, csv_dir: str = None) -> None:
+    """
+    Generate and load the whole dataset.
+
+    Users load first, then consultants, then appointments with their holds
+    and payments, so foreign keys hold at every step. Chunks within a phase
+    load in parallel on jobs processes.
+    """
+    password_hash = _password_hash(spec)
+
+    if csv_dir:
+        os.makedirs(csv_dir, exist_ok=True)
+    else:
+        import psycopg2
+        connection = psycopg2.connect(database_url)
+        with connection, connection.cursor() as cursor:
+            if truncate:
+                cursor.execute('TRUNCATE payments, slot_holds, appointments, consultants, users CASCADE')
+            if defer_indexes:
+                for name in DEFERRED_INDEXES:
+                    cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        connection.close()
+
+    with Pool(jobs) as pool:
+        for table in ('users', 'consultants', 'appointments'):
+            _run_phase(pool, spec, table, password_hash, database_url, csv_dir)
+
+    if not csv_dir:
+        connection = psycopg2.connect(database_url)
+        with connection, connection.cursor() as cursor:
+            if defer_indexes:
+                for name, ddl in DEFERRED_INDEXES.items():
+                    logger.info("Building %s", name)
+                    cursor.execute(ddl)
+            # IDs were assigned explicitly; move the sequences past them
+            for table in ('users', 'appointments', 'slot_holds', 'payments'):
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                               f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)")
+            cursor.execute('ANALYZE')
+        connection.close()
+
+    load_mongo(spec, mongo_uri, csv_dir)
+    logger.info("Generated %d users, %d consultants, up to %d appointments (seed %d)",
+                spec.users, spec.consultants, spec.appointments, spec.seed)
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Seeded synthetic dataset generator')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--consultants', type=int, help='Overrides the scale preset')
+    parser.add_argument('--clients', type=int, help='Overrides the scale preset')
+    parser.add_argument('--appointments', type=int, help='Overrides the scale preset')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--hold-ratio', type=float, default=0.05)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--truncate', action='store_true', help='Empty the tables first')
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help='Drop bulk-loaded tables\' indexes and rebuild them after the load')
+    parser.add_argument('--csv-dir', help='Write CSV/JSON lines files here instead of loading')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'postgresql://localhost/climbup'))
+    parser.add_argument('--mongodb-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017/climbup'))
+    args = parser.parse_args(argv)
+
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+    spec = DatasetSpec(seed=args.seed, days=args.days, hold_ratio=args.hold_ratio, **sizes)
+    generate(spec, args.database_url, args.mongodb_uri, args.jobs, args.truncate,
+             args.defer_indexes, args.csv_dir)
+
+if __name__ == '__main__':
+    # Run as a script from the backend directory, like app.py
+    from services.logging_service import configure_logging
+    configure_logging()
+    main() 
\ No newline at end of file
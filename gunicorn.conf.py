@@ -0,0 +1,41 @@
+import os
+import shutil
+
+# 'sync' or 'gevent'; the app reads the same variable (services/cooperative.py)
+worker_mode = os.getenv('WORKER_MODE', 'sync').lower()
+if worker_mode == 'gevent':
+    # Patch before the app is preloaded, so every module it imports gets
+    # cooperative sockets, locks and sleeps; psycopg2 is a C extension and
+    # needs psycogreen to yield while waiting on Postgres
+    from gevent import monkey
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+bind = '0.0.0.0:5000'
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+if worker_mode == 'gevent':
+    worker_class = 'gevent'
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = 120
+# Import and build the app once in the master; workers share its pages
+# copy-on-write. Safe because create_app() opens no connections.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+def on_starting(server):
+    """Start each deployment with an empty Prometheus multiprocess directory"""
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauge files so /metrics stays accurate"""
+    from services.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
+
+def post_worker_init(worker):
+    """Open the new worker's connections and load rule caches before it takes traffic"""
+    warm_up = getattr(worker.wsgi, 'extensions', {}).get('warm_up')
+    if warm_up is not None:
+        warm_up() 
\ No newline at end of file
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+class HealthMonitor:
+    def __init__(self, probes: Dict[str, Callable[[], Any]], timeout: float = 2.0,
+                 cache_ttl: float = 5.0):
+        """
+        Run dependency probes concurrently and cache the combined report.
+
+        Args:
+            probes: Mapping of service name to a callable that raises when unhealthy
+            timeout: Seconds to wait for all probes before reporting stragglers unhealthy
+            cache_ttl: Seconds a report is served before a background refresh starts
+        """
+        self.probes = probes
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._report: Optional[Dict] = None
+        self._checked_at = 0.0
+        self._refreshing = False
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so each forked worker gets its own threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, len(self.probes)) * 2,
+                thread_name_prefix='health-probe'
+            )
+        return self._executor
+
+    @staticmethod
+    def _run_probe(probe: Callable[[], Any]) -> float:
+        start = time.perf_counter()
+        probe()
+        return (time.perf_counter() - start) * 1000
+
+    def check(self) -> Dict:
+        """
+        Probe every dependency concurrently, bounded by the timeout.
+
+        A probe that is still running from an earlier check is not started
+        again, so a hung dependency cannot pile up blocked threads.
+
+        Returns:
+            dict: Health report with overall status and per-service results
+        """
+        started = time.perf_counter()
+        futures = {}
+        with self._lock:
+            executor = self._get_executor()
+            for name, probe in self.probes.items():
+                future = self._pending.get(name)
+                if future is None or future.done():
+                    future = executor.submit(self._run_probe, probe)
+                    self._pending[name] = future
+                futures[name] = future
+
+        report = {
+            'status': 'healthy',
+            'timestamp': time.time(),
+            'services': {}
+        }
+        deadline = started + self.timeout
+        for name, future in futures.items():
+            try:
+                latency = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                report['services'][name] = {
+                    'status': 'healthy',
+                    'latency_ms': round(latency, 2)
+                }
+            except FutureTimeout:
+                report['services'][name] = {
+                    'status': 'unhealthy',
+                    'error': f'Probe timed out after {self.timeout}s',
+                    'latency_ms': round((time.perf_counter() - started) * 1000, 2)
+                }
+                report['status'] = 'degraded'
+            except Exception as e:
+                report['services'][name] = {
+                    'status': 'unhealthy',
+                    'error': str(e),
+                    'latency_ms': round((time.perf_counter() - started) * 1000, 2)
+                }
+                report['status'] = 'degraded'
+        return report
+
+    def refresh(self) -> Dict:
+        """Run a check now and cache its report"""
+        report = self.check()
+        with self._lock:
+            self._report = report
+            self._checked_at = time.monotonic()
+            self._refreshing = False
+        return report
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name='health-refresh', daemon=True).start()
+
+    def get_report(self) -> Dict:
+        """
+        Return the cached health report, refreshing it in the background once stale.
+
+        Only the very first call in a process waits for the probes.
+
+        Returns:
+            dict: Health report with overall status and per-service results
+        """
+        with self._lock:
+            report = self._report
+            age = time.monotonic() - self._checked_at
+        if report is None:
+            return self.refresh()
+        if age >= self.cache_ttl:
+            self._refresh_in_background()
+        return report 
\ No newline at end of file
@@ -0,0 +1,102 @@
+import time
+from typing import Callable, List
+import redis
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Listeners are called as listener(store, operation, statement, duration, error)
+# in the thread that issued the call; duration is in seconds.
+_listeners: List[Callable] = []
+_installed = False
+
+def add_datastore_listener(listener: Callable) -> None:
+    """
+    Subscribe to every instrumented Postgres, Mongo and Redis call.
+
+    Args:
+        listener: Callable receiving (store, operation, statement, duration, error)
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def remove_datastore_listener(listener: Callable) -> None:
+    """Unsubscribe a listener added with add_datastore_listener."""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def notify_datastore_call(store: str, operation: str, statement: str,
+                          duration: float, error: bool = False) -> None:
+    """Dispatch one completed data-store call to all listeners."""
+    # Iterate over a snapshot; per-request recorders subscribe and leave concurrently
+    for listener in tuple(_listeners):
+        try:
+            listener(store, operation, statement, duration, error)
+        except Exception:
+            # Instrumentation must never break the call being measured
+            pass
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info['query_start_time'].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+    notify_datastore_call('postgresql', operation, statement, time.perf_counter() - start)
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get('query_start_time') if exception_context.connection else None
+    if starts:
+        statement = exception_context.statement or ''
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+        notify_datastore_call('postgresql', operation, statement,
+                              time.perf_counter() - starts.pop(), error=True)
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Report every MongoDB command to the data-store listeners."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        notify_datastore_call('mongodb', event.command_name,
+                              f"{event.database_name}.{event.command_name}",
+                              event.duration_micros / 1e6)
+
+    def failed(self, event):
+        notify_datastore_call('mongodb', event.command_name,
+                              f"{event.database_name}.{event.command_name}",
+                              event.duration_micros / 1e6, error=True)
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that reports every command to the data-store listeners."""
+
+    def execute_command(self, *args, **options):
+        command = str(args[0]).upper() if args else 'UNKNOWN'
+        statement = f"{command} {args[1]}" if len(args) > 1 else command
+        start = time.perf_counter()
+        try:
+            result = super().execute_command(*args, **options)
+        except Exception:
+            notify_datastore_call('redis', command, statement,
+                                  time.perf_counter() - start, error=True)
+            raise
+        notify_datastore_call('redis', command, statement, time.perf_counter() - start)
+        return result
+
+def install_datastore_instrumentation() -> None:
+    """
+    Hook SQLAlchemy and pymongo so their calls reach the listeners.
+
+    Must run before MongoClient instances are created, since pymongo only
+    picks up globally registered listeners at client construction. Redis
+    calls are instrumented by constructing clients as InstrumentedRedis.
+    """
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+    monitoring.register(MongoCommandListener())
+    _installed = True 
\ No newline at end of file
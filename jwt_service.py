@@ -0,0 +1,177 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from flask_jwt_extended import JWTManager
+from .instrumentation import InstrumentedRedis
+from .logging_service import log_info, log_warning
+
+REVOKED_KEY = 'jwt:revoked'
+REVOKED_CHANNEL = 'jwt:revoked:events'
+
+class CachingJWTManager(JWTManager):
+    def __init__(self, app=None, cache_size: Optional[int] = None, **kwargs):
+        """
+        JWTManager that remembers verified tokens until they expire.
+
+        Claims are cached under the SHA-256 digest of the encoded token, so a
+        repeat request skips signature verification and claim decoding.
+        Revocation is still checked on every request through the blocklist
+        loader, which reads a local mirror and makes no Redis call.
+
+        Args:
+            app: Flask application
+            cache_size: Verified tokens kept, defaults to JWT_CACHE_SIZE or 10000
+        """
+        self.cache_size = cache_size or int(os.getenv('JWT_CACHE_SIZE', 10000))
+        self._verified: OrderedDict = OrderedDict()
+        self._verified_lock = threading.Lock()
+        super().__init__(app, **kwargs)
+
+    def _decode_jwt_from_config(self, encoded_token: str, csrf_value=None,
+                                allow_expired: bool = False) -> dict:
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        digest = hashlib.sha256(encoded_token.encode('utf-8')).digest()
+        with self._verified_lock:
+            entry = self._verified.get(digest)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._verified.move_to_end(digest)
+                    return dict(entry[1])
+                del self._verified[digest]
+
+        claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        expires_at = claims.get('exp')
+        if expires_at is not None:
+            with self._verified_lock:
+                self._verified[digest] = (expires_at, dict(claims))
+                if len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+        return claims
+
+class RevocationList:
+    def __init__(self, redis_url: Optional[str] = None, resync_interval: Optional[float] = None):
+        """
+        Revoked token IDs, kept in Redis and mirrored into each worker.
+
+        Redis holds a sorted set of revoked JTIs scored by token expiry. Each
+        worker loads it once, then follows new revocations over pub/sub and
+        resyncs in the background, so is_revoked() never touches Redis.
+
+        Args:
+            redis_url: Redis server, defaults to REDIS_URL
+            resync_interval: Seconds between full resyncs, defaults to JWT_REVOCATION_RESYNC_SECONDS or 60
+        """
+        self.redis_url = redis_url or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.resync_interval = resync_interval if resync_interval is not None else float(
+            os.getenv('JWT_REVOCATION_RESYNC_SECONDS', 60))
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._redis = None
+
+    def _ensure_started(self) -> None:
+        # Started lazily, and again after a fork, so each worker has its listener
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._redis = InstrumentedRedis.from_url(self.redis_url, decode_responses=True)
+        self._sync()
+        threading.Thread(target=self._listen, name='jwt-revocations', daemon=True).start()
+
+    def _sync(self) -> None:
+        """Replace the local mirror with the unexpired JTIs in Redis"""
+        now = time.time()
+        try:
+            pipe = self._redis.pipeline()
+            pipe.zremrangebyscore(REVOKED_KEY, '-inf', now)
+            pipe.zrangebyscore(REVOKED_KEY, now, '+inf', withscores=True)
+            _, members = pipe.execute()
+        except Exception as e:
+            log_warning("Failed to sync revoked tokens: %s", e)
+            return
+        with self._lock:
+            # Keep local revocations that may not have reached Redis
+            local = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            local.update({jti: exp for jti, exp in members})
+            self._revoked = local
+
+    def _listen(self) -> None:
+        last_sync = time.monotonic()
+        backoff = 1.0
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REVOKED_CHANNEL)
+                backoff = 1.0
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        jti, _, expires_at = message['data'].rpartition(':')
+                        with self._lock:
+                            self._revoked[jti] = float(expires_at)
+                    if time.monotonic() - last_sync >= self.resync_interval:
+                        self._sync()
+                        last_sync = time.monotonic()
+            except Exception as e:
+                log_warning("Revoked token listener disconnected: %s", e)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                self._sync()
+                last_sync = time.monotonic()
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check a token ID against the local mirror"""
+        self._ensure_started()
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """
+        Revoke a token until it would have expired anyway.
+
+        Takes effect in this worker immediately and in the others as soon as
+        the pub/sub message arrives.
+
+        Args:
+            jti: Token ID claim
+            expires_at: Token exp claim (epoch seconds)
+        """
+        self._ensure_started()
+        with self._lock:
+            self._revoked[jti] = float(expires_at)
+        try:
+            pipe = self._redis.pipeline()
+            pipe.zadd(REVOKED_KEY, {jti: expires_at})
+            pipe.publish(REVOKED_CHANNEL, f"{jti}:{expires_at}")
+            pipe.execute()
+            log_info("Revoked token %s", jti)
+        except Exception as e:
+            log_warning("Failed to publish token revocation, revoked locally only: %s", e)
+
+revocation_list = RevocationList()
+
+def init_jwt(app) -> CachingJWTManager:
+    """
+    Set up JWT handling with the verified-token cache and revocation checks.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        CachingJWTManager: The app's JWT manager
+    """
+    jwt = CachingJWTManager(app)
+
+    @jwt.token_in_blocklist_loader
+    def is_token_revoked(jwt_header, jwt_payload):
+        return revocation_list.is_revoked(jwt_payload['jti'])
+
+    return jwt 
\ No newline at end of file
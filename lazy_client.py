@@ -0,0 +1,57 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+from .logging_service import log_info
+
+class LazyClient:
+    def __init__(self, factory: Callable[[], Any], name: str):
+        """
+        Stand-in for a data-store client that is built on first use.
+
+        The client is built again in every process, so a client created
+        before gunicorn forks (e.g. with --preload) is never shared by the
+        workers. Attribute access is forwarded to the real client.
+
+        Args:
+            factory: Builds the client; called once per process
+            name: Client name for startup logs
+
+        LazyClient's own methods are named so they cannot shadow the client's
+        (Redis has get, so this uses resolve).
+        """
+        self._factory = factory
+        self._name = name
+        self._client = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Any:
+        """Return this process's client, building it if needed"""
+        if self._pid == os.getpid():
+            return self._client
+        with self._lock:
+            if self._pid != os.getpid():
+                started = time.perf_counter()
+                self._client = self._factory()
+                self._pid = os.getpid()
+                log_info("Created %s client in %.1f ms", self._name,
+                         (time.perf_counter() - started) * 1000)
+        return self._client
+
+    def override(self, client: Any) -> None:
+        """Use client in this process instead of building one, e.g. a fake in tests"""
+        with self._lock:
+            self._client = client
+            self._pid = os.getpid()
+
+    @property
+    def started(self) -> bool:
+        return self._pid == os.getpid()
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called for attributes LazyClient lacks; private ones are never
+        # forwarded so copy/pickle of a half-built instance cannot recurse
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr) 
\ No newline at end of file
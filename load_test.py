@@ -1,45 +1,358 @@
-from locust import HttpUser, task, between
-import random
+"""
+Contention-aware load scenario for the booking gateway.
+
+Virtual users log in, then loop over three journeys:
+
+- browse: GET /api/availability for a consultant and day
+- book: POST /api/book (slot hold) -> POST /api/confirm-booking ->
+  POST /api/verify-payment (payment webhook)
+- login: POST /api/auth/login
+
+Consultants and slots are drawn with a Zipf-like skew (--skew, 0 = uniform)
+so hot consultant-slots see concurrent hold and confirm races, and a burst
+of concurrent logins fires halfway through the run.
+
+Headless, in-process (SQLite, mongomock and fakeredis stand-ins, seeded):
+
+    python -m backend.tests.load_test --users 50 --duration 30 --skew 1.2
+
+Reports p50/p95/p99 latency per step, the conflict rate (holds and confirms
+rejected), double-booked consultant-slots found after the run, requests shed
+with 503, and throughput. The same journeys run against a deployed stack with Locust:
+
+    locust -f backend/tests/load_test.py --host https://staging.example.com
+"""
+import argparse
 import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+SEED = 42
+PASSWORD = 'loadtest-password'
+SCENARIO_DATE = datetime(2030, 1, 7)
+SLOT_HOURS = list(range(9, 17))
+SPECIALIZATIONS = ['career', 'finance', 'fitness', 'legal', 'marketing', 'nutrition', 'tech', 'wellness']
+JOURNEY_WEIGHTS = {'browse': 6, 'book': 3, 'login': 1}
+
+def user_email(index: int) -> str:
+    return f"loadtest{index}@example.com"
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    """Weight of the i-th most popular item; skew 0 is uniform."""
+    return [1.0 / (rank ** skew) for rank in range(1, count + 1)]
+
+class Scenario:
+    def __init__(self, send: Callable[..., Tuple[int, Optional[Dict]]], rng: random.Random,
+                 consultants: int, clients: int, skew: float, days: int = 5):
+        """
+        One virtual user's journeys, independent of how requests are sent.
+
+        Args:
+            send: send(step, method, path, json=None, headers=None) -> (status, body)
+            rng: Per-user random source
+            consultants: Consultant IDs run from 1 to this
+            clients: Client accounts run from 0 to this - 1
+            skew: Popularity skew for consultants and slots
+            days: Days from SCENARIO_DATE that slots are drawn from
+        """
+        self.send = send
+        self.rng = rng
+        self.clients = clients
+        self.consultant_ids = list(range(1, consultants + 1))
+        self.consultant_weights = zipf_weights(consultants, skew)
+        self.slot_starts = [SCENARIO_DATE + timedelta(days=day, hours=hour)
+                            for day in range(days) for hour in SLOT_HOURS]
+        self.slot_weights = zipf_weights(len(self.slot_starts), skew)
+        self.headers: Dict[str, str] = {}
 
-class ClimbupUser(HttpUser):
-    wait_time = between(1, 5)
-    
-    def on_start(self):
-        # Login and get JWT token
-        response = self.client.post("/api/auth/login", json={
-            "email": "test@example.com",
-            "password": "test123"
+    def _consultant(self) -> int:
+        return self.rng.choices(self.consultant_ids, self.consultant_weights)[0]
+
+    def _slot(self) -> datetime:
+        return self.rng.choices(self.slot_starts, self.slot_weights)[0]
+
+    def login(self, step: str = 'login') -> bool:
+        status, body = self.send(step, 'POST', '/api/auth/login', json={
+            'email': user_email(self.rng.randrange(self.clients)),
+            'password': PASSWORD
         })
-        self.token = response.json()["access_token"]
-        self.headers = {"Authorization": f"Bearer {self.token}"}
-    
-    @task(3)
-    def view_availability(self):
-        self.client.get("/api/availability", headers=self.headers)
-    
-    @task(2)
-    def create_booking(self):
-        booking_data = {
-            "consultant_id": random.randint(1, 10),
-            "slot_time": "2024-04-01T10:00:00Z",
-            "service_type": "consultation"
-        }
-        self.client.post("/api/booking", 
-                        json=booking_data,
-                        headers=self.headers)
-    
-    @task(1)
-    def process_payment(self):
-        payment_data = {
-            "booking_id": random.randint(1, 100),
-            "amount": 100.00,
-            "payment_method": "card"
+        if status == 200 and body:
+            self.headers = {'Authorization': f"Bearer {body['tokens']['access_token']}"}
+            return True
+        return False
+
+    def browse(self) -> None:
+        slot = self._slot()
+        self.send('availability', 'GET',
+                  f"/api/availability?consultant_id={self._consultant()}"
+                  f"&date={slot:%Y-%m-%d}&duration=60",
+                  headers=self.headers)
+
+    def book(self) -> None:
+        start = self._slot()
+        status, body = self.send('hold', 'POST', '/api/book', headers=self.headers, json={
+            'consultant_id': self._consultant(),
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(minutes=60)).isoformat()
+        })
+        if status != 200 or not body:
+            return
+        status, body = self.send('confirm', 'POST', '/api/confirm-booking', headers=self.headers,
+                                 json={'slot_hold_id': body['slot_hold_id']})
+        if status != 200 or not body:
+            return
+        self.send('webhook', 'POST', '/api/verify-payment', headers=self.headers, json={
+            'appointment_id': body['appointment_id'],
+            'payment_proof_url': f"https://payments.example.com/proof/{body['appointment_id']}"
+        })
+
+    def run_journey(self) -> None:
+        journey = self.rng.choices(list(JOURNEY_WEIGHTS), list(JOURNEY_WEIGHTS.values()))[0]
+        getattr(self, journey)()
+
+class Recorder:
+    """Thread-safe latency and status bookkeeping per step."""
+
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, step: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self.latency[step].append(seconds * 1000)
+            self.statuses[step][status] += 1
+
+    def report(self, wall_seconds: float, double_booked: int) -> Dict:
+        steps = {}
+        for step, values in sorted(self.latency.items()):
+            values = sorted(values)
+            pick = lambda pct: round(values[min(len(values) - 1, int(len(values) * pct / 100))], 2)
+            steps[step] = {
+                'count': len(values),
+                'p50_ms': round(statistics.median(values), 2),
+                'p95_ms': pick(95),
+                'p99_ms': pick(99),
+                'statuses': dict(sorted(self.statuses[step].items()))
+            }
+        attempts = sum(steps[s]['count'] for s in ('hold', 'confirm') if s in steps)
+        rejected = sum(count for s in ('hold', 'confirm') if s in steps
+                       for status, count in steps[s]['statuses'].items() if 400 <= status < 500)
+        total = sum(step['count'] for step in steps.values())
+        return {
+            'steps': steps,
+            'conflict_rate': round(rejected / attempts, 4) if attempts else 0.0,
+            'double_booked_slots': double_booked,
+            'requests': total,
+            'errors': sum(count for step in steps.values()
+                          for status, count in step['statuses'].items() if status >= 500 and status != 503),
+            'shed': sum(step['statuses'].get(503, 0) for step in steps.values()),
+            'throughput_rps': round(total / wall_seconds, 1) if wall_seconds else 0.0,
+            'wall_seconds': round(wall_seconds, 2)
         }
-        self.client.post("/api/payment", 
-                        json=payment_data,
-                        headers=self.headers)
-    
-    @task(1)
-    def view_bookings(self):
-        self.client.get("/api/booking", headers=self.headers) 
\ No newline at end of file
+
+def build_app(workdir: str, consultants: int, clients: int, seed: int = SEED):
+    """
+    Set up the gateway in-process on local stand-ins with seeded data.
+
+    Postgres becomes a SQLite file in workdir (so request threads get their
+    own connections), Redis becomes fakeredis and the rule store mongomock.
+
+    Returns:
+        Flask: The gateway app, with the auth blueprint mounted at /api/auth
+    """
+    import fakeredis
+    import mongomock
+    from werkzeug.security import generate_password_hash
+    from ..api import gateway
+    from ..models.mongodb.rules import RuleEngine
+    from ..models.postgresql.models import db, Consultant, User
+    from ..routes.auth import bp as auth_bp
+    from ..services.user_email_index import user_email_index
+
+    rng = random.Random(seed)
+    app = gateway.create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'load_test.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30, 'check_same_thread': False}}
+    })
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+
+    gateway.redis_client.override(fakeredis.FakeRedis())
+    rule_engine = RuleEngine('mongodb://localhost:27017', client=mongomock.MongoClient())
+    for day in ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'):
+        rule_engine.add_peak_hour_rule(day, '12:0-14:0', 1.5)
+    gateway.rule_engine.override(rule_engine)
+    user_email_index.snapshot_path = os.path.join(workdir, 'user_emails.bloom')
+
+    password_hash = generate_password_hash(PASSWORD)
+    with app.app_context():
+        db.create_all()
+        db.session.bulk_insert_mappings(User, [
+            {'email': user_email(i), 'password': password_hash, 'name': f"Load Test {i}"}
+            for i in range(clients)
+        ])
+        db.session.bulk_insert_mappings(Consultant, [
+            {
+                'user_id': i,
+                'specialization': rng.choice(SPECIALIZATIONS),
+                'hourly_rate': rng.choice([60, 80, 100, 150]),
+                'availability': {str(day): {'start': 9, 'end': 17} for day in range(5)},
+                'is_active': True,
+                'is_preferred': rng.random() < 0.2
+            }
+            for i in range(1, consultants + 1)
+        ])
+        db.session.commit()
+    return app
+
+def count_double_bookings(app) -> int:
+    """Count consultant-slots holding more than one live appointment."""
+    from ..models.postgresql.models import Appointment
+
+    with app.app_context():
+        rows = Appointment.query.filter(Appointment.status != 'cancelled').order_by(
+            Appointment.consultant_id, Appointment.start_time).all()
+    double_booked = 0
+    previous = None
+    for row in rows:
+        if previous is not None and previous.consultant_id == row.consultant_id \
+                and row.start_time < previous.end_time:
+            double_booked += 1
+        if previous is None or previous.consultant_id != row.consultant_id \
+                or row.end_time > previous.end_time:
+            previous = row
+    return double_booked
+
+def run(users: int = 20, duration: float = 20.0, skew: float = 1.2, consultants: int = 20,
+        clients: int = 500, login_burst: int = 50, seed: int = SEED) -> Dict:
+    """
+    Run the scenario headless against an in-process gateway.
+
+    Args:
+        users: Concurrent virtual users
+        duration: Seconds to run
+        skew: Popularity skew for consultants and slots (0 = uniform)
+        consultants: Seeded consultants
+        clients: Seeded client accounts
+        login_burst: Concurrent logins fired halfway through (0 to disable)
+        seed: Seed for data and every user's choices
+
+    Returns:
+        dict: Per-step latency percentiles and statuses, conflict rate,
+        double-booked slots and throughput
+    """
+    recorder = Recorder()
+    with tempfile.TemporaryDirectory() as workdir:
+        app = build_app(workdir, consultants, clients, seed)
+        local = threading.local()
+
+        def send(step, method, path, json=None, headers=None):
+            if not hasattr(local, 'client'):
+                local.client = app.test_client()
+            start = time.perf_counter()
+            response = local.client.open(path, method=method, json=json, headers=headers)
+            recorder.record(step, response.status_code, time.perf_counter() - start)
+            return response.status_code, response.get_json(silent=True)
+
+        deadline = time.monotonic() + duration
+
+        def virtual_user(index):
+            scenario = Scenario(send, random.Random(seed * 1000 + index), consultants, clients, skew)
+            # Retry the initial login while hashing sheds load (503)
+            while not scenario.login() and time.monotonic() < deadline:
+                time.sleep(0.1)
+            while time.monotonic() < deadline:
+                scenario.run_journey()
+
+        def burst_login(index):
+            Scenario(send, random.Random(-index), consultants, clients, skew).login('login_burst')
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=virtual_user, args=(i,)) for i in range(users)]
+        for thread in threads:
+            thread.start()
+        if login_burst:
+            time.sleep(duration / 2)
+            burst = [threading.Thread(target=burst_login, args=(i,)) for i in range(login_burst)]
+            for thread in burst:
+                thread.start()
+            threads.extend(burst)
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        return recorder.report(wall, count_double_bookings(app))
+
+def print_report(report: Dict) -> None:
+    print(f"{'step':<14}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for step, stats in report['steps'].items():
+        print(f"{step:<14}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}  {stats['statuses']}")
+    print(f"conflict rate {report['conflict_rate']:.2%}, double-booked slots "
+          f"{report['double_booked_slots']}, {report['errors']} errors, {report['shed']} shed (503), "
+          f"{report['throughput_rps']} req/s over {report['wall_seconds']}s")
+
+try:
+    from locust import HttpUser, between, task
+
+    class ClimbupUser(HttpUser):
+        """Locust user running the same journeys against a deployed, seeded stack."""
+        wait_time = between(1, 5)
+        consultants = int(os.getenv('LOAD_TEST_CONSULTANTS', 20))
+        clients = int(os.getenv('LOAD_TEST_CLIENTS', 500))
+        skew = float(os.getenv('LOAD_TEST_SKEW', 1.2))
+
+        def _send(self, step, method, path, json=None, headers=None):
+            response = self.client.request(method, path, name=step, json=json, headers=headers)
+            try:
+                return response.status_code, response.json()
+            except ValueError:
+                return response.status_code, None
+
+        def on_start(self):
+            self.scenario = Scenario(self._send, random.Random(), self.consultants, self.clients, self.skew)
+            self.scenario.login()
+
+        @task(JOURNEY_WEIGHTS['browse'])
+        def browse(self):
+            self.scenario.browse()
+
+        @task(JOURNEY_WEIGHTS['book'])
+        def book(self):
+            self.scenario.book()
+
+        @task(JOURNEY_WEIGHTS['login'])
+        def login(self):
+            self.scenario.login()
+except ImportError:
+    pass
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Headless in-process booking load scenario')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to run')
+    parser.add_argument('--skew', type=float, default=1.2, help='Hot consultant/slot skew, 0 = uniform')
+    parser.add_argument('--consultants', type=int, default=20)
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--login-burst', type=int, default=50, help='Concurrent logins halfway through')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args.users, args.duration, args.skew, args.consultants, args.clients,
+                 args.login_burst, args.seed)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main()) 
\ No newline at end of file
@@ -1,52 +1,155 @@
 import logging
-from typing import Optional
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
 from datetime import datetime
-from ..models.mongodb.models import db as mongo_db
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
-)
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+JSON_FORMAT = '%(asctime)s %(name)s %(levelname)s %(message)s'
+
+# Defaults applied to hot-path call sites (hot_path=True)
+HOT_PATH_SAMPLE_RATE = float(os.getenv('LOG_HOT_PATH_SAMPLE_RATE', 1.0))
+HOT_PATH_RATE_LIMIT = int(os.getenv('LOG_HOT_PATH_RATE_LIMIT', 20))
+HOT_PATH_INTERVAL = float(os.getenv('LOG_HOT_PATH_INTERVAL', 1.0))
+
+_configured = False
+
+def configure_logging(level: Optional[str] = None, json_output: Optional[bool] = None,
+                      log_file: Optional[str] = None, force: bool = False) -> None:
+    """
+    Configure the root logger for the whole process.
+    
+    This is the single place handlers and formatters are installed; entry
+    points call it instead of logging.basicConfig. Later calls are no-ops
+    unless force is set.
+    
+    Args:
+        level: Log level name, defaults to LOG_LEVEL or INFO
+        json_output: Emit one JSON object per record, defaults to LOG_FORMAT == 'json'
+        log_file: Optional path of a rotating log file
+        force: Replace handlers even if logging is already configured
+    """
+    global _configured
+    if _configured and not force:
+        return
+    
+    if level is None:
+        level = os.getenv('LOG_LEVEL', 'INFO')
+    if json_output is None:
+        json_output = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
+    
+    if json_output:
+        from pythonjsonlogger import jsonlogger
+        formatter = jsonlogger.JsonFormatter(JSON_FORMAT)
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT)
+    
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        from logging.handlers import RotatingFileHandler
+        handlers.append(RotatingFileHandler(log_file, maxBytes=10000000, backupCount=5))
+    
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    
+    _configured = True
 
 class LoggingService:
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
+    def __init__(self, name: str = __name__):
+        self.logger = logging.getLogger(name)
+        # message template -> [window_start, emitted, suppressed]
+        self._windows: Dict[str, List] = {}
+        self._lock = threading.Lock()
+    
+    def _should_emit(self, key: str, sample_rate: Optional[float],
+                     rate_limit: Optional[int], interval: float) -> bool:
+        """
+        Apply sampling and per-call-site rate limiting.
         
-    def log_error(self, message: str, error_code: Optional[str] = None) -> None:
+        Call sites are identified by their message template, which is a
+        literal at each call site when messages use lazy %-style arguments.
+        """
+        if sample_rate is not None and sample_rate < 1.0 and random.random() >= sample_rate:
+            return False
+        if rate_limit is None:
+            return True
+        
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    self.logger.warning("Suppressed %d messages like %r in the last %.1fs",
+                                        suppressed, key, interval)
+                return True
+            if window[1] >= rate_limit:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+    
+    def _log(self, level: int, message: str, args: tuple, error_code: Optional[str] = None,
+             sample_rate: Optional[float] = None, rate_limit: Optional[int] = None,
+             interval: Optional[float] = None, hot_path: bool = False) -> None:
+        # Bail out before any formatting or sampling work when the level is off
+        if not self.logger.isEnabledFor(level):
+            return
+        if hot_path:
+            sample_rate = HOT_PATH_SAMPLE_RATE if sample_rate is None else sample_rate
+            rate_limit = HOT_PATH_RATE_LIMIT if rate_limit is None else rate_limit
+        if sample_rate is not None or rate_limit is not None:
+            if not self._should_emit(message, sample_rate, rate_limit,
+                                     interval or HOT_PATH_INTERVAL):
+                return
+        if error_code:
+            message = f"[{error_code}] {message}"
+        self.logger.log(level, message, *args)
+        
+    def log_error(self, message: str, error_code: Optional[str] = None, *args, **kwargs) -> None:
         """
         Log error messages with optional error code.
         
         Args:
-            message: Error message to log
+            message: Error message to log, optionally with %-style placeholders
             error_code: Optional error code for categorization
+            *args: Arguments merged into message only if the record is emitted
+            **kwargs: sample_rate, rate_limit, interval or hot_path
         """
-        if error_code:
-            self.logger.error(f"[{error_code}] {message}")
-        else:
-            self.logger.error(message)
+        self._log(logging.ERROR, message, args, error_code, **kwargs)
 
-    def log_info(self, message: str) -> None:
+    def log_info(self, message: str, *args, **kwargs) -> None:
         """
         Log informational messages.
         
         Args:
-            message: Info message to log
+            message: Info message to log, optionally with %-style placeholders
+            *args: Arguments merged into message only if the record is emitted
+            **kwargs: sample_rate, rate_limit, interval or hot_path
         """
-        self.logger.info(message)
+        self._log(logging.INFO, message, args, **kwargs)
 
-    def log_warning(self, message: str) -> None:
+    def log_warning(self, message: str, *args, **kwargs) -> None:
         """
         Log warning messages.
         
         Args:
-            message: Warning message to log
+            message: Warning message to log, optionally with %-style placeholders
+            *args: Arguments merged into message only if the record is emitted
+            **kwargs: sample_rate, rate_limit, interval or hot_path
         """
-        self.logger.warning(message)
+        self._log(logging.WARNING, message, args, **kwargs)
 
     def get_user_friendly_message(self, error_code: str) -> str:
         """
@@ -70,14 +173,20 @@ class LoggingService:
 logging_service = LoggingService()
 
 # Convenience functions
-def log_error(message: str, error_code: Optional[str] = None) -> None:
-    logging_service.log_error(message, error_code)
+def log_error(message: str, error_code: Optional[str] = None, *args, **kwargs) -> None:
+    logging_service.log_error(message, error_code, *args, **kwargs)
+
+def log_info(message: str, *args, **kwargs) -> None:
+    logging_service.log_info(message, *args, **kwargs)
 
-def log_info(message: str) -> None:
-    logging_service.log_info(message)
+def log_warning(message: str, *args, **kwargs) -> None:
+    logging_service.log_warning(message, *args, **kwargs)
 
-def log_warning(message: str) -> None:
-    logging_service.log_warning(message)
+def _event_store():
+    # Imported on first use: the pure rule functions log through this module
+    # and must import without pulling in Mongo, Flask or SQLAlchemy
+    from ..models.mongodb.models import db
+    return db
 
 def log_event(event_type, data):
     """
@@ -88,21 +197,25 @@ def log_event(event_type, data):
         data (dict): Event-specific data
     """
     try:
+        from .tracing import current_trace_id
         log_entry = {
             'event_type': event_type,
             'data': data,
             'timestamp': datetime.utcnow()
         }
+        trace_id = current_trace_id()
+        if trace_id:
+            log_entry['trace_id'] = trace_id
         
-        mongo_db.logs.insert_one(log_entry)
+        _event_store().logs.insert_one(log_entry)
         
         # Also log to application logger
         logger = logging.getLogger(__name__)
-        logger.info(f"{event_type}: {data}")
+        logger.info("%s: %s", event_type, data, extra={'trace_id': trace_id})
         
     except Exception as e:
         logger = logging.getLogger(__name__)
-        logger.error(f"Failed to log event: {str(e)}")
+        logger.error("Failed to log event: %s", e)
         
 def get_event_logs(event_type=None, start_date=None, end_date=None, limit=100):
     """
@@ -130,7 +243,7 @@ def get_event_logs(event_type=None, start_date=None, end_date=None, limit=100):
             if end_date:
                 query['timestamp']['$lte'] = end_date
                 
-        logs = mongo_db.logs.find(query).sort('timestamp', -1).limit(limit)
+        logs = _event_store().logs.find(query).sort('timestamp', -1).limit(limit)
         
         return [{
             'event_type': log['event_type'],
@@ -0,0 +1,103 @@
+import os
+import time
+from flask import Blueprint, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess
+)
+from .instrumentation import add_datastore_listener, install_datastore_instrumentation
+
+# Multiprocess mode is selected by prometheus_client itself when
+# PROMETHEUS_MULTIPROC_DIR is set before it is first imported; each gunicorn
+# worker then writes its samples to memory-mapped files in that directory.
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+DATASTORE_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by blueprint and route',
+    ['blueprint', 'route', 'method', 'status']
+)
+
+DATASTORE_LATENCY = Histogram(
+    'datastore_call_duration_seconds',
+    'Postgres, Mongo and Redis call latency',
+    ['store', 'operation'],
+    buckets=DATASTORE_BUCKETS
+)
+
+DATASTORE_ERRORS = Counter(
+    'datastore_call_errors_total',
+    'Failed Postgres, Mongo and Redis calls',
+    ['store', 'operation']
+)
+
+RULE_CACHE_LOOKUPS = Counter(
+    'rule_cache_lookups_total',
+    'Rule engine cache lookups; hit ratio is hit / (hit + miss)',
+    ['cache', 'result']
+)
+
+bp = Blueprint('metrics', __name__)
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Count a rule engine cache lookup.
+
+    Args:
+        cache: Name of the cache (e.g. 'peak_hours')
+        hit: Whether the lookup was served from cache
+    """
+    RULE_CACHE_LOOKUPS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+def _observe_datastore_call(store, operation, statement, duration, error):
+    DATASTORE_LATENCY.labels(store=store, operation=operation).observe(duration)
+    if error:
+        DATASTORE_ERRORS.labels(store=store, operation=operation).inc()
+
+def _start_timer():
+    g._metrics_start = time.perf_counter()
+
+def _record_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(
+            blueprint=request.blueprint or 'app',
+            route=route,
+            method=request.method,
+            status=response.status_code
+        ).observe(time.perf_counter() - start)
+    return response
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose all metrics in Prometheus text format"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+def init_metrics(app) -> None:
+    """
+    Record request and data-store latency for an app and serve /metrics.
+
+    Call before any MongoClient is created so pymongo picks up the
+    command listener.
+
+    Args:
+        app: Flask application to instrument
+    """
+    install_datastore_instrumentation()
+    add_datastore_listener(_observe_datastore_call)
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.register_blueprint(bp)
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop a dead gunicorn worker's live gauges in multiprocess mode."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid) 
\ No newline at end of file
@@ -0,0 +1,502 @@
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+from multiprocessing import Process
+from string import Template
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from redis.commands.core import Script
+from .email_service import SMTPPool, build_message
+from .logging_service import configure_logging, log_error, log_info, log_warning
+from .sms_service import SMSTransport, load_transport
+
+# Event types
+BOOKING_CONFIRMED = 'booking_confirmed'
+PAYMENT_FAILED = 'payment_failed'
+HOLD_EXPIRING = 'hold_expiring'
+APPOINTMENT_REMINDER = 'appointment_reminder'
+CONSULTANT_HOLD = 'consultant_hold'
+CONSULTANT_CONFIRMED = 'consultant_confirmed'
+CONSULTANT_CANCELLED = 'consultant_cancelled'
+CONSULTANT_DIGEST = 'consultant_digest'
+
+KEY_PREFIX = 'notifications'
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_BASE = 30.0  # seconds before the first retry, doubled for each one after
+RETRY_MAX = 3600.0
+SENT_TTL = 7 * 24 * 3600  # How long a delivered event ID is remembered, to drop duplicates
+TEMPLATE_CHECK_INTERVAL = 60.0
+
+# Template documents; a stored document with the same name and a higher
+# version replaces one of these. Placeholders are $name, filled from the
+# event context.
+DEFAULT_TEMPLATES = [
+    {'name': BOOKING_CONFIRMED, 'version': 1,
+     'subject': 'Your appointment is confirmed',
+     'email': 'Your appointment on $start_time is confirmed.\n\nSee you then!\n',
+     'sms': 'ClimbUp: your appointment on $start_time is confirmed.'},
+    {'name': PAYMENT_FAILED, 'version': 1,
+     'subject': 'Payment failed',
+     'email': ('We could not process the payment for your appointment on $start_time, '
+               'so the booking has been cancelled.\n\nPlease book again with another payment method.\n'),
+     'sms': 'ClimbUp: payment for your appointment on $start_time failed; the booking was cancelled.'},
+    {'name': HOLD_EXPIRING, 'version': 1,
+     'subject': 'Your held slot is about to expire',
+     'email': 'The slot on $start_time held for you expires at $expires_at.\n\nConfirm your booking to keep it.\n',
+     'sms': 'ClimbUp: your held slot on $start_time expires at $expires_at. Confirm to keep it.'},
+    {'name': APPOINTMENT_REMINDER, 'version': 1,
+     'subject': 'Reminder: your appointment starts in $lead_time',
+     'email': 'This is a reminder that your appointment on $start_time starts in $lead_time.\n',
+     'sms': 'ClimbUp reminder: your appointment on $start_time starts in $lead_time.'},
+    {'name': CONSULTANT_HOLD, 'version': 1,
+     'subject': 'New hold on $start_time',
+     'email': 'A client is holding your slot on $start_time while they confirm.\n'},
+    {'name': CONSULTANT_CONFIRMED, 'version': 1,
+     'subject': 'New booking on $start_time',
+     'email': 'Your appointment on $start_time is confirmed.\n',
+     'sms': 'ClimbUp: new booking on $start_time.'},
+    {'name': CONSULTANT_CANCELLED, 'version': 1,
+     'subject': 'Cancelled: $start_time',
+     'email': 'Your appointment on $start_time has been cancelled.\n',
+     'sms': 'ClimbUp: your appointment on $start_time was cancelled.'},
+    {'name': CONSULTANT_DIGEST, 'version': 1,
+     'subject': '$count updates to your schedule',
+     'email': 'Changes to your schedule since the last summary:\n\n$summary\n',
+     'sms': 'ClimbUp: $confirmed new bookings, $cancelled cancellations. Details by email.'},
+]
+
+# KEYS events hash, queue, delayed set, sent marker; ARGV id, payload,
+# deliver-at ('' for now). Returns 0 for an ID already queued or delivered.
+_ENQUEUE = Script(None, b"""
+if redis.call('EXISTS', KEYS[4]) == 1 or redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[2]) == 0 then
+    return 0
+end
+if ARGV[3] == '' then
+    redis.call('LPUSH', KEYS[2], ARGV[1])
+else
+    redis.call('ZADD', KEYS[3], ARGV[3], ARGV[1])
+end
+return 1
+""")
+
+# KEYS delayed set, queue; ARGV now, limit. Moves due events to the queue.
+_PROMOTE = Script(None, b"""
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(ids) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('LPUSH', KEYS[2], id)
+end
+return #ids
+""")
+
+# KEYS events hash, queue, delayed set; ARGV id. Drops an undelivered event.
+_CANCEL = Script(None, b"""
+local removed = redis.call('ZREM', KEYS[3], ARGV[1]) + redis.call('LREM', KEYS[2], 0, ARGV[1])
+if removed > 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+end
+return removed
+""")
+
+class NotificationQueue:
+    def __init__(self, redis_client, prefix: str = KEY_PREFIX):
+        """
+        Notification events queued in Redis for the worker processes.
+
+        Event payloads live in one hash keyed by event ID; the queue, the
+        delayed set (scheduled and retried events, scored by due time),
+        each worker's processing list and the dead letter list hold IDs.
+        An event stays in its worker's processing list until it is
+        acknowledged, so a crashed worker's batch is recovered on restart.
+        Enqueueing an ID that is still pending or was delivered in the last
+        SENT_TTL seconds does nothing, so producers that retry (payment
+        webhooks) cannot notify twice.
+
+        Args:
+            redis_client: Redis client, or a LazyClient around one
+            prefix: Key prefix
+        """
+        self.redis = redis_client
+        self.prefix = prefix
+        self.events_key = f'{prefix}:events'
+        self.queue_key = f'{prefix}:queue'
+        self.delayed_key = f'{prefix}:delayed'
+        self.dead_key = f'{prefix}:dead'
+
+    def processing_key(self, worker: str) -> str:
+        return f'{self.prefix}:processing:{worker}'
+
+    def sent_key(self, event_id: str) -> str:
+        return f'{self.prefix}:sent:{event_id}'
+
+    def enqueue(self, event_type: str, user_id: Optional[int] = None, context: Optional[Dict[str, Any]] = None,
+                event_id: Optional[str] = None, deliver_at: Optional[float] = None,
+                email: Optional[str] = None, phone: Optional[str] = None,
+                channels: Iterable[str] = ('email', 'sms')) -> bool:
+        """
+        Queue a notification; one Redis call.
+
+        Args:
+            event_type: BOOKING_CONFIRMED, PAYMENT_FAILED, HOLD_EXPIRING or
+                another template name
+            user_id: Recipient; their email is looked up by the worker
+                unless email is given
+            context: Template values; must be JSON serializable
+            event_id: Stable ID for deduplication (e.g. 'booking_confirmed:42');
+                random by default
+            deliver_at: Unix time to send at, default now
+            email, phone: Recipient addresses; SMS is only sent with a phone
+            channels: Channels to send on, if the template has them
+
+        Returns:
+            bool: False if the event ID was already queued or delivered
+        """
+        return bool(self._enqueue(self.redis, event_type, user_id, context, event_id, deliver_at,
+                                  email, phone, channels))
+
+    def enqueue_many(self, events: Iterable[Dict[str, Any]]) -> List[bool]:
+        """Queue several notifications in one round trip; each dict holds enqueue's arguments"""
+        pipe = self.redis.pipeline(transaction=False)
+        for event in events:
+            self._enqueue(pipe, **event)
+        return [bool(queued) for queued in pipe.execute()]
+
+    def _enqueue(self, client, event_type: str, user_id: Optional[int] = None,
+                 context: Optional[Dict[str, Any]] = None, event_id: Optional[str] = None,
+                 deliver_at: Optional[float] = None, email: Optional[str] = None,
+                 phone: Optional[str] = None, channels: Iterable[str] = ('email', 'sms')):
+        event_id = event_id or uuid.uuid4().hex
+        payload = json.dumps({
+            'id': event_id, 'type': event_type, 'user_id': None if user_id is None else int(user_id),
+            'context': context or {},
+            'email': email, 'phone': phone, 'channels': list(channels), 'delivered': [], 'attempts': 0
+        })
+        return _ENQUEUE([self.events_key, self.queue_key, self.delayed_key, self.sent_key(event_id)],
+                        [event_id, payload, '' if deliver_at is None else deliver_at], client=client)
+
+    def cancel(self, event_id: str) -> bool:
+        """Drop an event that has not been claimed yet, e.g. a hold warning once the hold is confirmed"""
+        return bool(_CANCEL([self.events_key, self.queue_key, self.delayed_key], [event_id], client=self.redis))
+
+    def claim(self, worker: str, count: int = BATCH_SIZE, timeout: float = 1.0) -> List[Dict]:
+        """
+        Move up to count events into the worker's processing list.
+
+        Due delayed events are queued first. Waits up to timeout seconds
+        for the first event, then takes whatever else is queued.
+
+        Returns:
+            list: Event dicts
+        """
+        processing = self.processing_key(worker)
+        _PROMOTE([self.delayed_key, self.queue_key], [time.time(), count], client=self.redis)
+        first = self.redis.blmove(self.queue_key, processing, timeout, 'RIGHT', 'LEFT')
+        if first is None:
+            return []
+        ids = [first]
+        if count > 1:
+            pipe = self.redis.pipeline(transaction=False)
+            for _ in range(count - 1):
+                pipe.lmove(self.queue_key, processing, 'RIGHT', 'LEFT')
+            ids.extend(event_id for event_id in pipe.execute() if event_id is not None)
+
+        events = []
+        for event_id, payload in zip(ids, self.redis.hmget(self.events_key, ids)):
+            if payload is None:
+                # Cancelled between the move and the read
+                self.redis.lrem(processing, 1, event_id)
+                continue
+            events.append(json.loads(payload))
+        return events
+
+    def ack(self, worker: str, events: Iterable[Dict]) -> None:
+        """Mark events delivered and forget them, in one round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        for event in events:
+            pipe.lrem(self.processing_key(worker), 1, event['id'])
+            pipe.hdel(self.events_key, event['id'])
+            pipe.set(self.sent_key(event['id']), 1, ex=SENT_TTL)
+        pipe.execute()
+
+    def retry(self, worker: str, event: Dict, error: str, permanent: bool = False) -> bool:
+        """
+        Schedule another attempt with exponential backoff and jitter.
+
+        After MAX_ATTEMPTS, or at once for a permanent error, the event
+        goes to the dead letter list instead; its payload is kept for
+        inspection.
+
+        Returns:
+            bool: True if it will be retried
+        """
+        event['attempts'] += 1
+        event['last_error'] = error
+        dead = permanent or event['attempts'] >= MAX_ATTEMPTS
+        pipe = self.redis.pipeline()
+        pipe.hset(self.events_key, event['id'], json.dumps(event))
+        pipe.lrem(self.processing_key(worker), 1, event['id'])
+        if dead:
+            pipe.lpush(self.dead_key, event['id'])
+        else:
+            delay = min(RETRY_MAX, RETRY_BASE * 2 ** (event['attempts'] - 1))
+            pipe.zadd(self.delayed_key, {event['id']: time.time() + delay * random.uniform(1.0, 1.1)})
+        pipe.execute()
+        return not dead
+
+    def recover(self, worker: str) -> int:
+        """Queue again the events a previous run of this worker claimed but never finished"""
+        recovered = 0
+        while self.redis.lmove(self.processing_key(worker), self.queue_key, 'RIGHT', 'RIGHT') is not None:
+            recovered += 1
+        return recovered
+
+class CompiledTemplate:
+    __slots__ = ('name', 'version', 'subject', 'email', 'sms')
+
+    def __init__(self, document: Dict[str, Any]):
+        self.name = document['name']
+        self.version = int(document.get('version', 1))
+        self.subject = Template(document.get('subject', ''))
+        self.email = Template(document['email']) if document.get('email') else None
+        self.sms = Template(document['sms']) if document.get('sms') else None
+
+class TemplateRegistry:
+    def __init__(self, documents: Iterable[Dict[str, Any]] = DEFAULT_TEMPLATES, collection=None):
+        """
+        Notification templates, compiled once per template version.
+
+        Args:
+            documents: Built-in template documents
+                ({'name', 'version', 'subject', 'email', 'sms'})
+            collection: Optional MongoDB collection of template documents;
+                one with a higher version than the compiled template
+                replaces it on the next refresh()
+        """
+        self.collection = collection
+        self._templates: Dict[str, CompiledTemplate] = {}
+        self._next_check = 0.0
+        self.update(documents)
+
+    def update(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """Compile the documents newer than the current templates; returns how many were compiled"""
+        compiled = 0
+        for document in documents:
+            current = self._templates.get(document.get('name'))
+            if current is not None and current.version >= int(document.get('version', 1)):
+                continue
+            try:
+                self._templates[document['name']] = CompiledTemplate(document)
+            except (KeyError, TypeError, ValueError) as e:
+                log_warning("Skipping notification template %s: %s", document.get('name'), e)
+                continue
+            compiled += 1
+        return compiled
+
+    def refresh(self) -> None:
+        """Pick up stored template changes, at most every TEMPLATE_CHECK_INTERVAL seconds"""
+        if self.collection is None or time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + TEMPLATE_CHECK_INTERVAL
+        compiled = self.update(self.collection.find({}, {'_id': 0}))
+        if compiled:
+            log_info("Compiled %d notification templates", compiled)
+
+    def render(self, event: Dict) -> Dict[str, Tuple[str, str]]:
+        """
+        Render an event for each channel its template has.
+
+        Returns:
+            dict: {'email': (subject, body), 'sms': ('', text)}
+
+        Raises:
+            KeyError: If there is no template or the context lacks a placeholder
+        """
+        template = self._templates[event['type']]
+        context = event['context']
+        rendered = {}
+        if template.email is not None:
+            rendered['email'] = (template.subject.substitute(context), template.email.substitute(context))
+        if template.sms is not None:
+            rendered['sms'] = ('', template.sms.substitute(context))
+        return rendered
+
+Contacts = Callable[[List[int]], Dict[int, Dict[str, Optional[str]]]]
+
+def postgres_contacts(database_url: str) -> Contacts:
+    """
+    Look up users' email addresses with one query per batch.
+
+    The connection is opened on first use and again after an
+    OperationalError, so a database restart fails only the batch that
+    hit it; that batch is retried.
+    """
+    import psycopg2
+    connection = None
+
+    def contacts(user_ids: List[int]) -> Dict[int, Dict[str, Optional[str]]]:
+        nonlocal connection
+        if connection is None or connection.closed:
+            connection = psycopg2.connect(database_url)
+            connection.autocommit = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT id, email FROM users WHERE id = ANY(%s)', (user_ids,))
+                return {user_id: {'email': email} for user_id, email in cursor}
+        except psycopg2.OperationalError:
+            connection.close()
+            connection = None
+            raise
+    return contacts
+
+class NotificationWorker:
+    def __init__(self, queue: NotificationQueue, templates: TemplateRegistry, mailer: SMTPPool,
+                 sms: SMSTransport, sender: str, contacts: Optional[Contacts] = None,
+                 worker: str = '0', batch_size: int = BATCH_SIZE):
+        """
+        Delivers queued notifications in batches.
+
+        Each batch resolves missing email addresses with one contacts call,
+        sends every email over one pooled SMTP connection and hands the SMS
+        to the transport together. Channels that went out are remembered on
+        the event, so a retry only resends the ones that failed. If the
+        contacts call fails, emails still missing an address are retried
+        too; an event is acked only once each channel went out or the user
+        has no address for it.
+
+        Args:
+            queue: Queue to claim events from
+            templates: Compiled templates
+            mailer: SMTP connection pool
+            sms: SMS transport
+            sender: From address
+            contacts: Looks up {'email'} per user ID for events without one
+            worker: Worker name; a restarted worker with the same name
+                recovers the events its previous run left unfinished
+            batch_size: Events claimed at a time
+        """
+        self.queue = queue
+        self.templates = templates
+        self.mailer = mailer
+        self.sms = sms
+        self.sender = sender
+        self.contacts = contacts
+        self.worker = worker
+        self.batch_size = batch_size
+
+    def process_batch(self, timeout: float = 1.0) -> int:
+        """Claim and deliver one batch; returns the number of events claimed"""
+        self.templates.refresh()
+        events = self.queue.claim(self.worker, self.batch_size, timeout)
+        if not events:
+            return 0
+
+        missing = list({event['user_id'] for event in events if not event['email'] and event['user_id'] is not None})
+        lookup_error = None
+        if missing and self.contacts is not None:
+            try:
+                found = self.contacts(missing)
+            except Exception as e:
+                log_error("Contact lookup failed: %s", "NOTIFICATION_ERROR", e)
+                lookup_error = e
+                found = {}
+            for event in events:
+                if not event['email'] and event['user_id'] in found:
+                    event['email'] = found[event['user_id']].get('email')
+
+        emails, texts = [], []
+        failures: Dict[str, List[str]] = {}
+        permanent = set()
+        for event in events:
+            try:
+                rendered = self.templates.render(event)
+            except (KeyError, ValueError) as e:
+                failures[event['id']] = [f"render: {e!r}"]
+                permanent.add(event['id'])
+                continue
+            for channel, (subject, body) in rendered.items():
+                if channel not in event['channels'] or channel in event['delivered']:
+                    continue
+                if channel == 'email' and event['email']:
+                    emails.append((event, build_message(self.sender, event['email'], subject, body)))
+                elif channel == 'email' and lookup_error is not None and event['user_id'] is not None:
+                    # The address is unknown, not absent; try again once the lookup works
+                    failures.setdefault(event['id'], []).append(f"email: contact lookup failed: {lookup_error!r}")
+                elif channel == 'sms' and event['phone']:
+                    texts.append((event, (event['phone'], body)))
+
+        for channel, deliveries, results in (
+                ('email', emails, self.mailer.send_batch([message for _, message in emails])),
+                ('sms', texts, self.sms.send_batch([text for _, text in texts]))):
+            for (event, _), error in zip(deliveries, results):
+                if error is None:
+                    event['delivered'].append(channel)
+                else:
+                    failures.setdefault(event['id'], []).append(f"{channel}: {error!r}")
+
+        delivered = [event for event in events if event['id'] not in failures]
+        self.queue.ack(self.worker, delivered)
+        for event in events:
+            if event['id'] in failures:
+                if not self.queue.retry(self.worker, event, '; '.join(failures[event['id']]),
+                                        permanent=event['id'] in permanent):
+                    log_error("Notification %s dead after %d attempts: %s", "NOTIFICATION_ERROR",
+                              event['id'], event['attempts'], event['last_error'])
+        log_info("Worker %s delivered %d of %d notifications (%d emails, %d SMS)", self.worker,
+                 len(delivered), len(events), len(emails), len(texts), hot_path=True)
+        return len(events)
+
+    def run(self, should_stop: Callable[[], bool] = lambda: False) -> None:
+        recovered = self.queue.recover(self.worker)
+        if recovered:
+            log_warning("Worker %s recovered %d unfinished notifications", self.worker, recovered)
+        try:
+            while not should_stop():
+                self.process_batch()
+        finally:
+            self.mailer.close()
+            self.sms.close()
+
+def _worker_from_env(index: int) -> NotificationWorker:
+    from .instrumentation import InstrumentedRedis
+    collection = None
+    if os.getenv('MONGODB_URI'):
+        from pymongo import MongoClient
+        collection = MongoClient(os.environ['MONGODB_URI']).climbup_rules.notification_templates
+    return NotificationWorker(
+        NotificationQueue(InstrumentedRedis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+                                                     decode_responses=True)),
+        TemplateRegistry(collection=collection),
+        SMTPPool(os.getenv('SMTP_HOST', 'localhost'), int(os.getenv('SMTP_PORT', 25)),
+                 os.getenv('SMTP_USERNAME'), os.getenv('SMTP_PASSWORD'),
+                 starttls=os.getenv('SMTP_STARTTLS', 'false').lower() == 'true'),
+        load_transport(os.getenv('SMS_TRANSPORT')),
+        os.getenv('MAIL_SENDER', 'ClimbUp <no-reply@climbup.local>'),
+        contacts=postgres_contacts(os.getenv('DATABASE_URL', 'postgresql://localhost/climbup')),
+        worker=f"{os.getenv('NOTIFICATION_WORKER_NAME', 'worker')}-{index}",
+        batch_size=int(os.getenv('NOTIFICATION_BATCH_SIZE', BATCH_SIZE))
+    )
+
+def _run_worker(index: int) -> None:
+    configure_logging()
+    _worker_from_env(index).run()
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Deliver queued email and SMS notifications')
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.processes == 1:
+        _run_worker(0)
+        return
+    processes = [Process(target=_run_worker, args=(index,), daemon=True) for index in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+if __name__ == '__main__':
+    configure_logging()
+    main() 
\ No newline at end of file
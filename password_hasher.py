@@ -0,0 +1,109 @@
+import os
+import threading
+from concurrent.futures import Executor, TimeoutError as FutureTimeoutError
+from typing import Optional
+from werkzeug.security import check_password_hash, generate_password_hash
+from .cooperative import cpu_executor
+
+class HashingPoolSaturated(Exception):
+    """Raised when no hashing slot frees up in time; callers should answer 503"""
+
+class PasswordHasher:
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 queue_timeout: Optional[float] = None, hash_timeout: Optional[float] = None):
+        """
+        Hash and verify passwords on a dedicated, bounded pool.
+
+        The pool is processes for sync workers and native threads under
+        gevent (see cpu_executor), so hashing never runs on a request worker
+        or blocks the event loop.
+
+        At most max_pending operations are queued or running at once. A caller
+        that cannot get a slot within queue_timeout, or whose result takes
+        longer than hash_timeout, gets HashingPoolSaturated instead of tying
+        up its request worker behind a login burst.
+
+        Args:
+            workers: Hashing processes or threads, defaults to PASSWORD_HASH_WORKERS or 2
+            max_pending: Operations admitted at once, defaults to PASSWORD_HASH_MAX_PENDING or workers
+            queue_timeout: Seconds to wait for a slot, defaults to PASSWORD_HASH_QUEUE_TIMEOUT or 0.05
+            hash_timeout: Seconds to wait for a result, defaults to PASSWORD_HASH_TIMEOUT or 5
+        """
+        self.workers = workers or int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+        self.max_pending = max_pending or int(os.getenv('PASSWORD_HASH_MAX_PENDING', self.workers))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(
+            os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 0.05))
+        self.hash_timeout = hash_timeout if hash_timeout is not None else float(
+            os.getenv('PASSWORD_HASH_TIMEOUT', 5.0))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self._pid: Optional[int] = None
+        self._dummy_hash: Optional[str] = None
+
+    def _get_executor(self) -> Executor:
+        # Created lazily, and again after a fork, so each worker owns its pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = cpu_executor(self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingPoolSaturated("Password hashing pool is saturated")
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the work itself finishes, not until this
+        # caller stops waiting, so abandoned hashes still count against max_pending
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.hash_timeout)
+        except FutureTimeoutError:
+            raise HashingPoolSaturated(f"Password hashing took longer than {self.hash_timeout} s") from None
+
+    def hash_password(self, password: str) -> str:
+        """
+        Hash a password off the request worker.
+
+        Raises:
+            HashingPoolSaturated: If the pool is full or the hash timed out
+        """
+        return self._run(generate_password_hash, password)
+
+    def verify_password(self, password_hash: Optional[str], password: str) -> bool:
+        """
+        Check a password against its hash off the request worker.
+
+        With no hash (unknown user) a dummy hash is verified instead, so
+        the response takes as long as for a real account.
+
+        Raises:
+            HashingPoolSaturated: If the pool is full or the check timed out
+        """
+        if password_hash is None:
+            self._run(check_password_hash, self._get_dummy_hash(), password)
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def _get_dummy_hash(self) -> str:
+        if self._dummy_hash is None:
+            self._dummy_hash = self._run(generate_password_hash, os.urandom(16).hex())
+        return self._dummy_hash
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+password_hasher = PasswordHasher()
+
+def hash_password(password: str) -> str:
+    return password_hasher.hash_password(password)
+
+def verify_password(password_hash: Optional[str], password: str) -> bool:
+    return password_hasher.verify_password(password_hash, password) 
\ No newline at end of file
@@ -1,20 +1,30 @@
 from flask import Blueprint, request, jsonify, current_app
-from models import Payment, Appointment
+from models import db, Payment, Appointment
 from datetime import datetime, timedelta
-import redis
 import logging
 import json
+from services.daily_sessions import DailySessionCounter
+from services.digests import CANCELLED, CONFIRMED, DEFAULT_WINDOW, DigestBuffer
+from services.instrumentation import InstrumentedRedis
+from services.lazy_client import LazyClient
+from services.notifications import BOOKING_CONFIRMED, PAYMENT_FAILED, NotificationQueue
+from services.reminders import ReminderScheduler
 
 bp = Blueprint('payment', __name__)
 logger = logging.getLogger(__name__)
 
-# Initialize Redis client
-redis_client = redis.Redis(
+# Built on first use, inside a request, so current_app is available
+redis_client = LazyClient(lambda: InstrumentedRedis(
     host=current_app.config['REDIS_HOST'],
     port=current_app.config['REDIS_PORT'],
     db=0,
     decode_responses=True
-)
+), 'payment redis')
+session_counter = DailySessionCounter(redis_client)
+notification_queue = NotificationQueue(redis_client)
+reminder_scheduler = ReminderScheduler(redis_client, notification_queue)
+digests = LazyClient(lambda: DigestBuffer(redis_client, notification_queue,
+                                          current_app.config.get('DIGEST_WINDOW', DEFAULT_WINDOW)), 'payment digests')
 
 @bp.route('/verify-payment', methods=['POST'])
 def verify_payment():
@@ -63,12 +73,37 @@ def verify_payment():
         
         # Update appointment status based on payment
         appointment = Appointment.query.get(payment.appointment_id)
+        was_cancelled = appointment.status == 'cancelled'
         if status == 'completed':
             appointment.status = 'confirmed'
-            logger.info(f"Appointment {appointment.id} confirmed after payment")
         elif status == 'failed':
             appointment.status = 'cancelled'
+        
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        # Side effects only once the new status is saved, so a retried webhook sees it
+        if status == 'completed':
+            logger.info(f"Appointment {appointment.id} confirmed after payment")
+            notification_queue.enqueue(BOOKING_CONFIRMED, appointment.client_id,
+                                       {'start_time': appointment.start_time.isoformat()},
+                                       event_id=f"booking_confirmed:{appointment.id}")
+            reminder_scheduler.schedule(appointment.id, appointment.client_id, appointment.start_time)
+            digests.add(appointment.consultant_id, CONFIRMED, appointment.start_time)
+        elif status == 'failed':
+            # Only the first failure frees the session; webhook retries must not release it again
+            if not was_cancelled:
+                session_counter.release(appointment.consultant_id, appointment.start_time.date())
+                digests.add(appointment.consultant_id, CANCELLED, appointment.start_time,
+                            event_id=f"consultant_cancelled:{appointment.id}")
+            reminder_scheduler.cancel(appointment.id)
             logger.warning(f"Appointment {appointment.id} cancelled due to failed payment")
+            notification_queue.enqueue(PAYMENT_FAILED, appointment.client_id,
+                                       {'start_time': appointment.start_time.isoformat()},
+                                       event_id=f"payment_failed:{payment_id}")
         
         # Clear cache after status update
         redis_client.delete(cache_key)
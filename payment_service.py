@@ -1,12 +1,12 @@
-import redis
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 import json
 from ..logging_service import log_error, log_info
+from ..instrumentation import InstrumentedRedis
 
 class PaymentService:
     def __init__(self, redis_host: str = 'localhost', redis_port: int = 6379):
-        self.redis_client = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
+        self.redis_client = InstrumentedRedis(host=redis_host, port=redis_port, decode_responses=True)
         self.payment_expiry = 900  # 15 minutes in seconds
 
     def store_payment_data(self, payment_id: str, data: Dict) -> bool:
@@ -0,0 +1,211 @@
+import cProfile
+import heapq
+import io
+import itertools
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from flask import g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from .instrumentation import (
+    add_datastore_listener, install_datastore_instrumentation, remove_datastore_listener
+)
+from .logging_service import log_error, log_info
+
+PROFILE_HEADER = 'X-Profile-Token'
+TOKEN_SALT = 'request-profiler'
+
+class QueryRecorder:
+    def __init__(self, slowest: int = 10, current_thread_only: bool = True):
+        """
+        Count and time the Postgres, Mongo and Redis calls made while active.
+
+        Use as a context manager. Listeners run in the thread that issued the
+        call, so by default only calls from the entering thread are recorded,
+        which keeps concurrent requests apart.
+
+        Args:
+            slowest: Number of slowest statements to keep
+            current_thread_only: Ignore calls made by other threads
+        """
+        self.slowest = slowest
+        self.current_thread_only = current_thread_only
+        self.stores: Dict[str, Dict] = {}
+        self._slowest: List[tuple] = []
+        self._sequence = itertools.count()
+        self._thread_id: Optional[int] = None
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident() if self.current_thread_only else None
+        add_datastore_listener(self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        remove_datastore_listener(self._record)
+        return False
+
+    def _record(self, store, operation, statement, duration, error):
+        if self._thread_id is not None and threading.get_ident() != self._thread_id:
+            return
+        stats = self.stores.setdefault(store, {'count': 0, 'total_ms': 0.0, 'errors': 0})
+        stats['count'] += 1
+        stats['total_ms'] += duration * 1000
+        if error:
+            stats['errors'] += 1
+
+        # Keep a bounded min-heap of the slowest statements
+        entry = (duration, next(self._sequence), store, statement)
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def count(self, store: Optional[str] = None) -> int:
+        """
+        Number of calls recorded.
+
+        Args:
+            store: 'postgresql', 'mongodb' or 'redis'; all stores if omitted
+
+        Returns:
+            int: Call count
+        """
+        if store is not None:
+            return self.stores.get(store, {}).get('count', 0)
+        return sum(stats['count'] for stats in self.stores.values())
+
+    def summary(self) -> Dict:
+        """Per-store counts and timings plus the slowest statements"""
+        return {
+            'stores': {
+                store: dict(stats, total_ms=round(stats['total_ms'], 3))
+                for store, stats in self.stores.items()
+            },
+            'slowest': [
+                {'store': store, 'duration_ms': round(duration * 1000, 3), 'statement': statement}
+                for duration, _, store, statement in sorted(self._slowest, reverse=True)
+            ]
+        }
+
+def make_profile_token(secret: str) -> str:
+    """
+    Create a signed token that enables profiling for requests carrying it.
+
+    Args:
+        secret: The PROFILER_SECRET configured on the app
+
+    Returns:
+        str: Value for the X-Profile-Token header
+    """
+    return URLSafeTimedSerializer(secret, salt=TOKEN_SALT).dumps({'profile': True})
+
+class RequestProfiler:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Enable opt-in per-request profiling for an app.
+
+        A request is profiled when it carries a valid X-Profile-Token signed
+        with PROFILER_SECRET, or when it is picked by PROFILER_SAMPLE_RATE.
+        Both are off unless configured.
+        """
+        app.config.setdefault('PROFILER_SECRET', os.getenv('PROFILER_SECRET'))
+        app.config.setdefault('PROFILER_SAMPLE_RATE', float(os.getenv('PROFILER_SAMPLE_RATE', 0.0)))
+        app.config.setdefault('PROFILER_OUTPUT_DIR', os.getenv('PROFILER_OUTPUT_DIR', 'profiles'))
+        app.config.setdefault('PROFILER_TOKEN_MAX_AGE', int(os.getenv('PROFILER_TOKEN_MAX_AGE', 3600)))
+        app.config.setdefault('PROFILER_SLOWEST_STATEMENTS', 10)
+
+        self.secret = app.config['PROFILER_SECRET']
+        self.sample_rate = app.config['PROFILER_SAMPLE_RATE']
+        self.output_dir = app.config['PROFILER_OUTPUT_DIR']
+        self.token_max_age = app.config['PROFILER_TOKEN_MAX_AGE']
+        self.slowest = app.config['PROFILER_SLOWEST_STATEMENTS']
+
+        install_datastore_instrumentation()
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+
+    def _token_is_valid(self, token: str) -> bool:
+        if not self.secret:
+            return False
+        try:
+            URLSafeTimedSerializer(self.secret, salt=TOKEN_SALT).loads(token, max_age=self.token_max_age)
+            return True
+        except BadSignature:
+            return False
+
+    def _should_profile(self) -> bool:
+        token = request.headers.get(PROFILE_HEADER)
+        if token:
+            return self._token_is_valid(token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start(self):
+        if not self._should_profile():
+            return
+        recorder = QueryRecorder(slowest=self.slowest).__enter__()
+        profile = cProfile.Profile()
+        g._profiling = (profile, recorder, time.perf_counter())
+        profile.enable()
+
+    def _finish(self, response):
+        state = g.pop('_profiling', None)
+        if state is None:
+            return response
+        profile, recorder, started = state
+        profile.disable()
+        recorder.__exit__(None, None, None)
+        try:
+            report_name = self._write_report(profile, recorder, started, response.status_code)
+            response.headers['X-Profile-Report'] = report_name
+        except Exception as e:
+            log_error("Failed to write profile report: %s", "PROFILER_ERROR", e)
+        return response
+
+    def _teardown(self, exc):
+        # after_request is skipped on unhandled errors; make sure nothing leaks
+        state = g.pop('_profiling', None)
+        if state is not None:
+            state[0].disable()
+            state[1].__exit__(None, None, None)
+
+    def _write_report(self, profile, recorder, started, status_code) -> str:
+        duration_ms = (time.perf_counter() - started) * 1000
+        stats_text = io.StringIO()
+        pstats.Stats(profile, stream=stats_text).sort_stats('cumulative').print_stats(40)
+
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+        base_name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{request.method}-{slug}"
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        report = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': status_code,
+            'duration_ms': round(duration_ms, 3),
+            'queries': recorder.summary(),
+            'profile': stats_text.getvalue()
+        }
+        with open(os.path.join(self.output_dir, base_name + '.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+        # Raw stats for snakeviz / pstats
+        profile.dump_stats(os.path.join(self.output_dir, base_name + '.prof'))
+
+        log_info("Profiled %s %s in %.1fms with %d data-store calls",
+                 request.method, request.path, duration_ms, recorder.count())
+        return base_name
+
+def init_profiler(app) -> RequestProfiler:
+    """Attach a RequestProfiler to an app"""
+    return RequestProfiler(app) 
\ No newline at end of file
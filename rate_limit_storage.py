@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+from limits.storage import Storage
+from .instrumentation import InstrumentedRedis
+from .logging_service import log_info, log_warning
+
+# Seconds a flush may wait on Redis; keeps a slow Redis from stalling the
+# flusher, and with it any request waiting to flush inline
+SOCKET_TIMEOUT = 0.25
+
+class _Window:
+    __slots__ = ('expires_at', 'expiry', 'elastic', 'synced', 'in_flight', 'pending')
+
+    def __init__(self, expires_at: float, expiry: int, elastic: bool):
+        self.expires_at = expires_at
+        self.expiry = expiry
+        self.elastic = elastic
+        self.synced = 0     # Cluster-wide count as of the last reconciliation
+        self.in_flight = 0  # Hits being written to Redis right now
+        self.pending = 0    # Hits admitted here and not yet sent
+
+    @property
+    def count(self) -> int:
+        return self.synced + self.in_flight + self.pending
+
+class HybridRedisStorage(Storage):
+    """
+    Flask-Limiter storage that counts hits in process memory and
+    reconciles with Redis in the background.
+
+    Each worker keeps a fixed-window counter per rate limit key and decides
+    locally. A flusher thread periodically sends the hits admitted since the
+    last flush to Redis as one pipelined INCRBY per key and reads back the
+    cluster-wide counts. A key that collects max_unsynced local hits is
+    flushed inline, unless a flush is already running; then the request
+    goes on and the running flusher picks the hits up. Flushes are
+    serialised, so each worker holds back about one batch in flight plus
+    max_unsynced pending hits per key (more while a flush waits on a slow
+    Redis, for at most SOCKET_TIMEOUT), and the cluster over-admits by about
+    (workers - 1) * 2 * max_unsynced per window.
+
+    If Redis is unreachable, limits are enforced per worker until the next
+    successful flush, which writes the hits counted in the meantime.
+
+    Use with a URI of the form hybrid+redis://host:port/db.
+    """
+
+    STORAGE_SCHEME = ['hybrid+redis', 'hybrid+rediss']
+
+    def __init__(self, uri: str, sync_interval: Optional[float] = None,
+                 max_unsynced: Optional[int] = None, **options):
+        """
+        Args:
+            uri: hybrid+redis:// URI; the part after "hybrid+" is passed to Redis
+            sync_interval: Seconds between flushes, defaults to RATELIMIT_SYNC_INTERVAL or 0.5
+            max_unsynced: Local hits per key before an inline flush, defaults to RATELIMIT_MAX_UNSYNCED or 10
+        """
+        super().__init__(uri, **options)
+        self.redis_url = uri.split('+', 1)[1]
+        self.sync_interval = sync_interval if sync_interval is not None else float(
+            os.getenv('RATELIMIT_SYNC_INTERVAL', 0.5))
+        self.max_unsynced = int(max_unsynced or os.getenv('RATELIMIT_MAX_UNSYNCED', 10))
+        self.redis_options = dict(options)
+        self.redis_options.setdefault('socket_timeout', SOCKET_TIMEOUT)
+        self.redis_options.setdefault('socket_connect_timeout', SOCKET_TIMEOUT)
+        self._windows: Dict[str, _Window] = {}
+        self._redis = None
+        self._redis_available = True
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        # Started lazily, and again after a fork, so each worker has its flusher
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._redis = InstrumentedRedis.from_url(self.redis_url, **self.redis_options)
+            self._windows = {}
+            self._pid = os.getpid()
+        threading.Thread(target=self._run_flusher, name='rate-limit-sync', daemon=True).start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            time.sleep(self.sync_interval)
+            self.flush()
+
+    def _window(self, key: str, now: float) -> Optional[_Window]:
+        window = self._windows.get(key)
+        if window is not None and window.expires_at <= now:
+            del self._windows[key]
+            return None
+        return window
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        self._ensure_started()
+        now = time.time()
+        with self.lock:
+            window = self._window(key, now)
+            if window is None:
+                window = self._windows[key] = _Window(now + expiry, expiry, elastic_expiry)
+            elif elastic_expiry:
+                window.expires_at = now + expiry
+            window.pending += amount
+            count = window.count
+            flush_now = window.pending >= self.max_unsynced and self._redis_available
+        # Never wait behind another flush on the request thread
+        if flush_now and self._flush_lock.acquire(blocking=False):
+            try:
+                self._flush([key])
+            finally:
+                self._flush_lock.release()
+            with self.lock:
+                count = max(count, window.count)
+        return count
+
+    def get(self, key: str) -> int:
+        self._ensure_started()
+        with self.lock:
+            window = self._window(key, time.time())
+            return 0 if window is None else window.count
+
+    def get_expiry(self, key: str) -> int:
+        self._ensure_started()
+        with self.lock:
+            window = self._window(key, time.time())
+            return int(window.expires_at if window is not None else time.time())
+
+    def flush(self, keys=None) -> None:
+        """
+        Send locally admitted hits to Redis and refresh cluster-wide counts.
+
+        Args:
+            keys: Keys to reconcile, defaults to every live key
+        """
+        self._ensure_started()
+        with self._flush_lock:
+            self._flush(keys)
+
+    def _flush(self, keys) -> None:
+        now = time.time()
+        with self.lock:
+            if keys is None:
+                for key in [k for k, w in self._windows.items() if w.expires_at <= now]:
+                    del self._windows[key]
+                keys = list(self._windows)
+            batch = []
+            for key in keys:
+                window = self._windows.get(key)
+                if window is not None:
+                    batch.append((key, window, window.pending))
+                    window.in_flight, window.pending = window.pending, 0
+        if not batch:
+            return
+
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for key, window, sent in batch:
+                if sent:
+                    pipe.set(key, 0, ex=window.expiry, nx=True)
+                    pipe.incrby(key, sent)
+                    if window.elastic:
+                        pipe.expire(key, window.expiry)
+                else:
+                    pipe.get(key)
+                pipe.pttl(key)
+            results = iter(pipe.execute())
+        except Exception as e:
+            with self.lock:
+                # Keep the hits so they are sent once Redis is back
+                for key, window, sent in batch:
+                    window.in_flight = 0
+                    window.pending += sent
+            if self._redis_available:
+                self._redis_available = False
+                log_warning("Rate limit storage unreachable, limiting per worker: %s", e)
+            return
+
+        if not self._redis_available:
+            self._redis_available = True
+            log_info("Rate limit storage reachable again, resuming shared limits")
+        with self.lock:
+            for key, window, sent in batch:
+                if sent:
+                    next(results)
+                    count = next(results)
+                    if window.elastic:
+                        next(results)
+                else:
+                    count = next(results)
+                ttl_ms = next(results)
+                window.in_flight = 0
+                window.synced = int(count or 0)
+                if ttl_ms and ttl_ms > 0:
+                    # Redis owns the window boundaries across workers
+                    window.expires_at = now + ttl_ms / 1000.0
+
+    def check(self) -> bool:
+        """Always healthy: limits fall back to per-worker counts without Redis"""
+        return True
+
+    def reset(self) -> Optional[int]:
+        self._ensure_started()
+        with self.lock:
+            keys = list(self._windows)
+            self._windows.clear()
+        try:
+            cleared = 0
+            for key in self._redis.scan_iter(match='LIMITER*'):
+                cleared += self._redis.delete(key)
+            return cleared
+        except Exception as e:
+            log_warning("Failed to reset rate limits in Redis: %s", e)
+            return len(keys)
+
+    def clear(self, key: str) -> None:
+        self._ensure_started()
+        with self.lock:
+            self._windows.pop(key, None)
+        try:
+            self._redis.delete(key)
+        except Exception as e:
+            log_warning("Failed to clear rate limit %s in Redis: %s", key, e) 
\ No newline at end of file
@@ -0,0 +1,225 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert, literal
+from ..models.postgresql.models import db, Appointment, Consultant, SlotHold
+from .logging_service import log_info
+from .tracing import traced
+
+ACTIVE_STATUSES = ('pending', 'confirmed')  # Same statuses check_availability treats as taken
+FREQUENCIES = {'daily': timedelta(days=1), 'weekly': timedelta(weeks=1)}
+MAX_OCCURRENCES = 52
+
+Interval = Tuple[datetime, datetime]
+
+class Recurrence:
+    __slots__ = ('start_time', 'duration', 'frequency', 'interval', 'count', 'until')
+
+    def __init__(self, start_time: datetime, duration: timedelta, frequency: str = 'weekly',
+                 interval: int = 1, count: Optional[int] = None, until: Optional[datetime] = None):
+        """
+        A repeating slot: the first occurrence, how often it repeats and when it stops.
+
+        Args:
+            start_time: Start of the first occurrence
+            duration: Length of every occurrence
+            frequency: 'daily' or 'weekly'
+            interval: Repeat every interval days or weeks
+            count: Number of occurrences
+            until: No occurrence starts after this; count or until is required
+
+        Raises:
+            ValueError: If the rule is malformed or expands past MAX_OCCURRENCES
+        """
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unsupported frequency {frequency!r}")
+        if duration <= timedelta(0):
+            raise ValueError("Duration must be positive")
+        if interval < 1:
+            raise ValueError("Interval must be at least 1")
+        if count is None and until is None:
+            raise ValueError("count or until is required")
+        if until is not None and until < start_time:
+            raise ValueError("until is before the first occurrence")
+        if count is not None and not 1 <= count <= MAX_OCCURRENCES:
+            raise ValueError(f"count must be between 1 and {MAX_OCCURRENCES}")
+        if FREQUENCIES[frequency] * interval < duration:
+            raise ValueError("Occurrences would overlap each other")
+        self.start_time = start_time
+        self.duration = duration
+        self.frequency = frequency
+        self.interval = interval
+        self.count = count
+        self.until = until
+
+    def occurrences(self) -> List[Interval]:
+        """(start, end) of every occurrence, earliest first"""
+        step = FREQUENCIES[self.frequency] * self.interval
+        occurrences = []
+        start = self.start_time
+        while ((self.count is None or len(occurrences) < self.count) and
+               (self.until is None or start <= self.until)):
+            if len(occurrences) == MAX_OCCURRENCES:
+                raise ValueError(f"Series has more than {MAX_OCCURRENCES} occurrences")
+            occurrences.append((start, start + self.duration))
+            start += step
+        return occurrences
+
+def load_busy(consultant_id: int, window: Interval, now: datetime) -> List[Tuple[str, int, datetime, datetime]]:
+    """
+    Every appointment and active hold of the consultant overlapping window, in one query.
+
+    Returns:
+        list: (kind, id, start, end) ordered by start; kind is 'appointment' or 'hold'
+    """
+    appointments = db.session.query(
+        literal('appointment').label('kind'), Appointment.id, Appointment.start_time, Appointment.end_time
+    ).filter(
+        Appointment.consultant_id == consultant_id,
+        Appointment.status.in_(ACTIVE_STATUSES),
+        Appointment.start_time < window[1],
+        Appointment.end_time > window[0]
+    )
+    holds = db.session.query(
+        literal('hold').label('kind'), SlotHold.id, SlotHold.start_time, SlotHold.end_time
+    ).filter(
+        SlotHold.consultant_id == consultant_id,
+        SlotHold.status == 'active',
+        SlotHold.expires_at > now,
+        SlotHold.start_time < window[1],
+        SlotHold.end_time > window[0]
+    )
+    return sorted((tuple(row) for row in appointments.union_all(holds)), key=lambda row: row[2])
+
+def find_conflicts(occurrences: List[Interval], busy: List[Tuple[str, int, datetime, datetime]]) -> List[List[Dict]]:
+    """
+    The busy rows each occurrence overlaps.
+
+    busy is sorted by start, so only the rows starting between
+    (occurrence start - longest busy row) and the occurrence end are looked
+    at for each occurrence.
+
+    Returns:
+        list: One list of {'type', 'id'} per occurrence, empty if it is free
+    """
+    starts = [row[2] for row in busy]
+    longest = max((row[3] - row[2] for row in busy), default=timedelta(0))
+    conflicts = []
+    for start, end in occurrences:
+        first = bisect_left(starts, start - longest)
+        last = bisect_left(starts, end)
+        conflicts.append([{'type': kind, 'id': row_id}
+                          for kind, row_id, busy_start, busy_end in busy[first:last]
+                          if busy_start < end and busy_end > start])
+    return conflicts
+
+@traced()
+def book_series(rule_engine, consultant_id: int, client_id: int, recurrence: Recurrence,
+                skip_conflicts: bool = False, now: Optional[datetime] = None,
+                session_counter=None) -> Dict:
+    """
+    Check, price and book every occurrence of a recurring series at once.
+
+    The consultant row is locked so concurrent series for the same
+    consultant are checked one after another. All occurrences are then
+    checked against the consultant's appointments and active holds with a
+    single range query, priced with one batch peak hour lookup, and
+    inserted with one bulk insert in the same transaction. Either every
+    bookable occurrence is created or none is. With a session counter, each
+    free occurrence also reserves a session on its day, in one Redis round
+    trip, and one on a day at its cap is reported as a daily_cap conflict.
+
+    Args:
+        rule_engine: RuleEngine or SnapshotRules for peak hour multipliers
+        consultant_id: Consultant to book
+        client_id: Client booking the series
+        recurrence: Occurrences to book
+        skip_conflicts: Book the free occurrences and report the rest;
+            by default any conflict books nothing
+        now: Reference time for past occurrences and hold expiry, default utcnow
+        session_counter: DailySessionCounter enforcing daily session caps
+
+    Returns:
+        dict: occurrences (start_time, end_time, multiplier, price and either
+        appointment_id or the conflicts found), booked (count), total_price
+        of the booked occurrences and conflicts (count)
+
+    Raises:
+        ValueError: If the consultant does not exist, is inactive or an
+            occurrence starts in the past
+    """
+    now = now or datetime.utcnow()
+    occurrences = recurrence.occurrences()
+    if occurrences[0][0] < now:
+        raise ValueError("Series cannot start in the past")
+    consultant = Consultant.query.filter_by(user_id=consultant_id).with_for_update().first()
+    if consultant is None or not consultant.is_active:
+        db.session.rollback()
+        raise ValueError(f"Consultant {consultant_id} not found")
+
+    busy = load_busy(consultant_id, (occurrences[0][0], occurrences[-1][1]), now)
+    conflicts = find_conflicts(occurrences, busy)
+    # Priced before any session is reserved, so a failed rule lookup leaves no reservations behind
+    try:
+        multipliers = rule_engine.get_peak_hour_multipliers([start for start, _ in occurrences])
+        hourly_rate = Decimal(consultant.hourly_rate)
+    except Exception:
+        db.session.rollback()
+        raise
+    reserved = []
+    if session_counter is not None:
+        free = [index for index, conflicting in enumerate(conflicts) if not conflicting]
+        granted = session_counter.reserve_many(consultant_id, [occurrences[index][0].date() for index in free],
+                                               consultant.max_daily_sessions)
+        for index, ok in zip(free, granted):
+            if ok:
+                reserved.append(occurrences[index][0].date())
+            else:
+                conflicts[index] = [{'type': 'daily_cap', 'id': None}]
+
+    results, rows = [], []
+    for (start, end), conflicting, multiplier in zip(occurrences, conflicts, multipliers):
+        hours = Decimal((end - start).total_seconds()) / 3600
+        results.append({
+            'start_time': start.isoformat(),
+            'end_time': end.isoformat(),
+            'multiplier': multiplier,
+            'price': float(round(hourly_rate * hours * Decimal(str(multiplier)), 2)),
+            'conflicts': conflicting
+        })
+        if not conflicting:
+            rows.append({'consultant_id': consultant_id, 'client_id': client_id,
+                         'start_time': start, 'end_time': end, 'status': 'pending',
+                         'payment_status': 'pending', 'is_peak_hour': multiplier > 1.0})
+
+    conflict_count = len(occurrences) - len(rows)
+    if rows and (skip_conflicts or not conflict_count):
+        try:
+            # Postgres sends this as one INSERT ... RETURNING, ids in the order of rows
+            ids = iter(db.session.scalars(
+                insert(Appointment).returning(Appointment.id, sort_by_parameter_order=True), rows).all())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if reserved:
+                session_counter.release_many(consultant_id, reserved)
+            raise
+        for result in results:
+            if not result['conflicts']:
+                result['appointment_id'] = next(ids)
+        booked = len(rows)
+    else:
+        db.session.rollback()
+        if reserved:
+            session_counter.release_many(consultant_id, reserved)
+        booked = 0
+
+    log_info("Booked %d of %d occurrences for consultant %s and client %s (%d conflicts)",
+             booked, len(occurrences), consultant_id, client_id, conflict_count)
+    return {
+        'occurrences': results,
+        'booked': booked,
+        'total_price': round(sum(result['price'] for result in results if 'appointment_id' in result), 2),
+        'conflicts': conflict_count
+    } 
\ No newline at end of file
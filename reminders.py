@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+from redis.commands.core import Script
+from .logging_service import configure_logging, log_info
+from .notifications import APPOINTMENT_REMINDER, NotificationQueue
+
+KEY_PREFIX = 'reminders'
+# (name, lead time, lead time as shown to the client); the name is part of the reminder IDs
+REMINDERS = (('24h', timedelta(hours=24), '24 hours'), ('1h', timedelta(hours=1), '1 hour'))
+BATCH_SIZE = 500
+LEASE = 60.0  # seconds a drained reminder stays claimed before another drain may take it again
+MISSED_GRACE = timedelta(minutes=15)  # On rebuild, reminders overdue by up to this still go out
+POLL_INTERVAL = 1.0
+FETCH_SIZE = 10000
+
+# (appointment_id, client_id, start_time)
+Appointment = Tuple[int, int, datetime]
+
+# KEYS due set; ARGV now, lease until, limit. Returns the due members and
+# pushes their score to the lease expiry, so a drain that dies before
+# finishing leaves them to be taken again rather than lost.
+_CLAIM = Script(None, b"""
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[3])
+for _, member in ipairs(members) do
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[2], member)
+end
+return members
+""")
+
+# KEYS due set, context hash; ARGV lease until, members. Removes each
+# drained member only while it still holds the lease _CLAIM gave it, so a
+# reminder scheduled again meanwhile (a reschedule) keeps its new due time
+# and context.
+_COMPLETE = Script(None, b"""
+local removed = 0
+for i = 2, #ARGV do
+    if tonumber(redis.call('ZSCORE', KEYS[1], ARGV[i])) == tonumber(ARGV[1]) then
+        redis.call('ZREM', KEYS[1], ARGV[i])
+        redis.call('HDEL', KEYS[2], ARGV[i])
+        removed = removed + 1
+    end
+end
+return removed
+""")
+
+_UPCOMING = """
+    SELECT id, client_id, start_time FROM appointments
+    WHERE status = 'confirmed' AND start_time > %(after)s
+    ORDER BY start_time
+"""
+
+def unix_time(value: datetime) -> float:
+    """Unix time of a datetime; naive values are UTC, as stored by the app"""
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+def _naive_utc(value: datetime) -> datetime:
+    # TIMESTAMPTZ rows come back aware, app code uses naive UTC; reminders must not tell them apart
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+class ReminderScheduler:
+    def __init__(self, redis_client, notifications: NotificationQueue, prefix: str = KEY_PREFIX):
+        """
+        Upcoming appointment reminders, indexed by due time in a Redis sorted set.
+
+        Each confirmed appointment has one member per reminder
+        ('{appointment_id}:{name}') scored by the time it is due, and its
+        template context in a hash. Draining reads only the due members
+        with one range query, however many appointments are scheduled, and
+        hands them to the notification queue under a stable event ID
+        ('reminder:{appointment_id}:{name}:{unix start time}'), so a reminder
+        drained twice after a crash is still delivered once, while one for
+        a rescheduled time goes out again.
+
+        Args:
+            redis_client: Redis client, or a LazyClient around one
+            notifications: Queue the due reminders are delivered through
+            prefix: Key prefix
+        """
+        self.redis = redis_client
+        self.notifications = notifications
+        self.due_key = f'{prefix}:due'
+        self.context_key = f'{prefix}:context'
+
+    def schedule_many(self, appointments: Iterable[Appointment], now: Optional[datetime] = None,
+                      grace: timedelta = timedelta(0)) -> int:
+        """
+        Schedule (or move) the reminders of confirmed appointments, in one round trip.
+
+        Reminders already overdue by more than grace are skipped.
+
+        Returns:
+            int: Reminders scheduled
+        """
+        cutoff = unix_time(now or datetime.utcnow()) - grace.total_seconds()
+        pipe = self.redis.pipeline(transaction=False)
+        scheduled = 0
+        for appointment_id, client_id, start_time in appointments:
+            start_time = _naive_utc(start_time)
+            for name, lead, lead_text in REMINDERS:
+                member = f'{appointment_id}:{name}'
+                due = unix_time(start_time - lead)
+                if due < cutoff:
+                    # Moved closer than this reminder's lead time; drop any earlier schedule
+                    pipe.zrem(self.due_key, member)
+                    pipe.hdel(self.context_key, member)
+                    continue
+                pipe.zadd(self.due_key, {member: due})
+                pipe.hset(self.context_key, member, json.dumps({
+                    'client_id': client_id, 'starts_at': int(unix_time(start_time)),
+                    'start_time': start_time.isoformat(), 'lead_time': lead_text}))
+                scheduled += 1
+        pipe.execute()
+        return scheduled
+
+    def schedule(self, appointment_id: int, client_id: int, start_time: datetime,
+                 now: Optional[datetime] = None) -> int:
+        """Schedule the reminders of one confirmed appointment; call again after a reschedule"""
+        return self.schedule_many([(appointment_id, client_id, start_time)], now)
+
+    def cancel(self, appointment_id: int) -> None:
+        """Drop an appointment's pending reminders"""
+        members = [f'{appointment_id}:{name}' for name, _, _ in REMINDERS]
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrem(self.due_key, *members)
+        pipe.hdel(self.context_key, *members)
+        pipe.execute()
+
+    def drain(self, now: Optional[datetime] = None, limit: int = BATCH_SIZE) -> int:
+        """
+        Queue up to limit due reminders for delivery.
+
+        Returns:
+            int: Reminders queued
+        """
+        now_ts = unix_time(now or datetime.utcnow())
+        lease = now_ts + LEASE
+        members = _CLAIM([self.due_key], [now_ts, lease, limit], client=self.redis)
+        if not members:
+            return 0
+        members = [member.decode() if isinstance(member, bytes) else member for member in members]
+        contexts = self.redis.hmget(self.context_key, members)
+
+        events = []
+        for member, context in zip(members, contexts):
+            if context is None:
+                continue
+            context = json.loads(context)
+            starts_at = context.pop('starts_at')
+            events.append({'event_type': APPOINTMENT_REMINDER, 'user_id': context.pop('client_id'),
+                           'context': context, 'event_id': f"reminder:{member}:{starts_at}"})
+        self.notifications.enqueue_many(events)
+
+        _COMPLETE([self.due_key, self.context_key], [lease, *members], client=self.redis)
+        return len(events)
+
+    def rebuild(self, appointments: Iterable[Appointment], now: Optional[datetime] = None,
+                batch_size: int = FETCH_SIZE) -> int:
+        """
+        Schedule the reminders of every upcoming confirmed appointment.
+
+        Run on startup to restore reminders Redis lost. Members already in
+        the set are rescheduled in place; reminders overdue by up to
+        MISSED_GRACE are included, and any that were delivered before are
+        dropped by the notification queue's deduplication.
+
+        Returns:
+            int: Reminders scheduled
+        """
+        scheduled = 0
+        batch = []
+        for appointment in appointments:
+            batch.append(appointment)
+            if len(batch) >= batch_size:
+                scheduled += self.schedule_many(batch, now, MISSED_GRACE)
+                batch = []
+        if batch:
+            scheduled += self.schedule_many(batch, now, MISSED_GRACE)
+        return scheduled
+
+    def run(self, should_stop: Callable[[], bool] = lambda: False) -> None:
+        while not should_stop():
+            if self.drain() < BATCH_SIZE:
+                time.sleep(POLL_INTERVAL)
+
+def upcoming_confirmed(connection, now: datetime) -> Iterator[Appointment]:
+    """
+    Stream confirmed appointments whose reminders can still be due.
+
+    A range scan on idx_appointments_confirmed_start through a server-side
+    cursor, FETCH_SIZE rows at a time.
+    """
+    after = now.replace(tzinfo=timezone.utc) if now.tzinfo is None else now
+    with connection.cursor(name='reminder_rebuild') as cursor:
+        cursor.itersize = FETCH_SIZE
+        cursor.execute(_UPCOMING, {'after': after - MISSED_GRACE})
+        yield from cursor
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Queue appointment reminders as they fall due')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL', 'postgresql://localhost/climbup'))
+    parser.add_argument('--redis-url', default=os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    parser.add_argument('--skip-rebuild', action='store_true', help='Trust the index already in Redis')
+    args = parser.parse_args(argv)
+
+    from .instrumentation import InstrumentedRedis
+    redis_client = InstrumentedRedis.from_url(args.redis_url)
+    scheduler = ReminderScheduler(redis_client, NotificationQueue(redis_client))
+    if not args.skip_rebuild:
+        import psycopg2
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        connection = psycopg2.connect(args.database_url)
+        try:
+            with connection:
+                scheduled = scheduler.rebuild(upcoming_confirmed(connection, now), now)
+        finally:
+            connection.close()
+        log_info("Rebuilt %d appointment reminders in %.1f s", scheduled, time.perf_counter() - started)
+    scheduler.run()
+
+if __name__ == '__main__':
+    configure_logging()
+    main() 
\ No newline at end of file
@@ -0,0 +1,270 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import or_
+from ..models.postgresql.models import db, Appointment, Consultant, SlotHold
+from .logging_service import log_info
+from .tracing import traced
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+SLOT_STEP = timedelta(minutes=15)  # Same grid as SchedulingRuleEngine.get_available_slots
+SEARCH_DAYS = 14
+DEFAULT_HOURS = {'start': 9, 'end': 17}
+
+Interval = Tuple[datetime, datetime]
+
+class ConsultantNotFound(ValueError):
+    """Raised when the consultant to reschedule does not exist"""
+
+class Occupancy:
+    def __init__(self):
+        """Busy intervals per consultant and per client, indexed by day"""
+        self._busy: Dict[tuple, List[Interval]] = defaultdict(list)
+
+    def add(self, owner: tuple, start: datetime, end: datetime) -> None:
+        day = start.date()
+        while day <= end.date():
+            self._busy[(owner, day)].append((start, end))
+            day += timedelta(days=1)
+
+    def remove(self, owner: tuple, start: datetime, end: datetime) -> None:
+        day = start.date()
+        while day <= end.date():
+            self._busy[(owner, day)].remove((start, end))
+            day += timedelta(days=1)
+
+    def is_free(self, owner: tuple, start: datetime, end: datetime) -> bool:
+        # Slots never cross midnight, so the start day holds everything they can overlap
+        return all(end <= busy_start or start >= busy_end
+                   for busy_start, busy_end in self._busy.get((owner, start.date()), ()))
+
+def _hours_table(availability: Optional[Dict]) -> Tuple[Tuple[int, int], ...]:
+    """
+    Working hours per weekday as (start, end) seconds after midnight.
+
+    Days missing from availability get the 9-17 default, as in
+    SchedulingRuleEngine.get_available_slots; use a day-off window for days
+    a consultant does not work.
+    """
+    table = []
+    for weekday in range(7):
+        hours = (availability or {}).get(str(weekday), {})
+        table.append((hours.get('start', DEFAULT_HOURS['start']) * 3600,
+                      hours.get('end', DEFAULT_HOURS['end']) * 3600))
+    return tuple(table)
+
+def _fits_hours(table: Tuple[Tuple[int, int], ...], start: datetime, end: datetime) -> bool:
+    day_start, day_end = table[start.weekday()]
+    offset = start.hour * 3600 + start.minute * 60 + start.second
+    return (end.date() == start.date() and day_start <= offset and
+            offset + (end - start).total_seconds() <= day_end)
+
+def _candidate_starts(original: datetime, earliest: datetime, search_days: int) -> Iterator[datetime]:
+    """Slot starts on the grid, nearest to the original start first (later wins a tie)"""
+    for step in range(search_days * 24 * 4 + 1):
+        for start in ((original + SLOT_STEP * step, original - SLOT_STEP * step) if step else (original,)):
+            if start >= earliest:
+                yield start
+
+def find_affected(consultant_id: int, unavailable: Optional[Interval] = None,
+                  availability: Optional[Dict] = None, now: Optional[datetime] = None) -> List[Appointment]:
+    """
+    Upcoming active appointments a day off or new working hours displace, in one query.
+
+    Args:
+        unavailable: (start, end) the consultant can no longer work
+        availability: New availability JSON; appointments outside it are displaced
+
+    Returns:
+        list: Appointments, locked for update, earliest first
+    """
+    now = now or datetime.utcnow()
+    query = Appointment.query.filter(
+        Appointment.consultant_id == consultant_id,
+        Appointment.status.in_(ACTIVE_STATUSES),
+        Appointment.start_time >= now
+    )
+    if availability is None:
+        if unavailable is None:
+            return []
+        query = query.filter(Appointment.start_time < unavailable[1], Appointment.end_time > unavailable[0])
+    appointments = query.order_by(Appointment.start_time).with_for_update().all()
+    hours = _hours_table(availability) if availability is not None else None
+
+    def displaced(appointment: Appointment) -> bool:
+        if unavailable and appointment.start_time < unavailable[1] and appointment.end_time > unavailable[0]:
+            return True
+        return hours is not None and not _fits_hours(hours, appointment.start_time, appointment.end_time)
+    return [appointment for appointment in appointments if displaced(appointment)]
+
+def _release(session_counter, sessions: List[Tuple[int, date]]) -> None:
+    """Give back sessions per (consultant_id, day), one round trip per consultant"""
+    if session_counter is None:
+        return
+    days: Dict[int, List[date]] = defaultdict(list)
+    for consultant_id, day in sessions:
+        days[consultant_id].append(day)
+    for consultant_id, consultant_days in days.items():
+        session_counter.release_many(consultant_id, consultant_days)
+
+@traced()
+def reschedule(consultant_id: int, unavailable: Optional[Interval] = None,
+               availability: Optional[Dict] = None, search_days: int = SEARCH_DAYS,
+               dry_run: bool = False, now: Optional[datetime] = None, session_counter=None) -> Dict:
+    """
+    Move every appointment a consultant can no longer take, all at once.
+
+    Affected appointments are found in one query. Then one occupancy
+    snapshot is loaded for the consultant, the active consultants with the
+    same specialization, and the affected clients, over the whole search
+    window. Each appointment, earliest first, gets the slot nearest its
+    original time on the same consultant, or failing that on another
+    consultant of the same specialization. The snapshot is updated as slots
+    are assigned, so proposals never overlap each other, existing
+    appointments, active holds or the client's other appointments. Slots keep
+    the appointment's duration, start on the 15-minute grid and fall within
+    the consultant's working hours. With a session counter, a day at the
+    target consultant's daily cap counts as unavailable; each move reserves
+    a session on its new day and, once saved, releases the one on its old
+    day.
+
+    Args:
+        consultant_id: Consultant becoming unavailable
+        unavailable: (start, end) the consultant can no longer work
+        availability: New availability JSON for the consultant; saved with the moves
+        search_days: How far either side of the original time to look
+        dry_run: Return the proposals without saving anything
+        now: Earliest allowed start, default utcnow
+        session_counter: DailySessionCounter enforcing daily session caps
+
+    Returns:
+        dict: rescheduled (appointment_id, client_id, status, from and to
+        consultant and times)
+        and unresolved (appointment IDs with no free slot, left unchanged)
+
+    Raises:
+        ConsultantNotFound: If the consultant does not exist
+    """
+    now = now or datetime.utcnow()
+    consultant = Consultant.query.get(consultant_id)
+    if consultant is None:
+        raise ConsultantNotFound(f"Consultant {consultant_id} not found")
+
+    affected = find_affected(consultant_id, unavailable, availability, now)
+    if not affected:
+        if availability is not None and not dry_run:
+            consultant.availability = availability
+            db.session.commit()
+        return {'rescheduled': [], 'unresolved': []}
+
+    others = Consultant.query.filter(
+        Consultant.specialization == consultant.specialization,
+        Consultant.is_active == True,
+        Consultant.user_id != consultant_id
+    ).order_by(Consultant.user_id).all()
+    hours = {other.user_id: _hours_table(other.availability) for other in others}
+    hours[consultant_id] = _hours_table(availability if availability is not None else consultant.availability)
+
+    window_start = max(now, min(a.start_time for a in affected) - timedelta(days=search_days))
+    window_end = max(a.end_time for a in affected) + timedelta(days=search_days + 1)
+    consultant_ids = list(hours)
+    client_ids = list({a.client_id for a in affected})
+
+    occupancy = Occupancy()
+    for row in db.session.query(Appointment.consultant_id, Appointment.client_id,
+                                Appointment.start_time, Appointment.end_time).filter(
+            Appointment.status.in_(ACTIVE_STATUSES),
+            Appointment.start_time < window_end,
+            Appointment.end_time > window_start,
+            or_(Appointment.consultant_id.in_(consultant_ids), Appointment.client_id.in_(client_ids))):
+        occupancy.add(('consultant', row.consultant_id), row.start_time, row.end_time)
+        occupancy.add(('client', row.client_id), row.start_time, row.end_time)
+    for row in db.session.query(SlotHold.consultant_id, SlotHold.start_time, SlotHold.end_time).filter(
+            SlotHold.status == 'active',
+            SlotHold.expires_at > now,
+            SlotHold.consultant_id.in_(consultant_ids),
+            SlotHold.start_time < window_end,
+            SlotHold.end_time > window_start):
+        occupancy.add(('consultant', row.consultant_id), row.start_time, row.end_time)
+
+    if unavailable:
+        occupancy.add(('consultant', consultant_id), *unavailable)
+
+    caps = {other.user_id: other.max_daily_sessions for other in others}
+    caps[consultant_id] = consultant.max_daily_sessions
+    reserved: List[Tuple[int, date]] = []
+    vacated: List[Tuple[int, date]] = []
+    full = set()
+
+    def has_room(candidate: int, day: date, original_day: date) -> bool:
+        # Reserves the session as it answers, so call it last, for the slot being taken
+        if session_counter is None or (candidate, day) == (consultant_id, original_day):
+            return True
+        if (candidate, day) in full:
+            return False
+        if not session_counter.reserve(candidate, day, caps[candidate]):
+            full.add((candidate, day))
+            return False
+        reserved.append((candidate, day))
+        return True
+
+    rescheduled, unresolved = [], []
+    for appointment in affected:
+        duration = appointment.end_time - appointment.start_time
+        occupancy.remove(('consultant', consultant_id), appointment.start_time, appointment.end_time)
+        occupancy.remove(('client', appointment.client_id), appointment.start_time, appointment.end_time)
+
+        slot = None
+        for candidate_ids in ([consultant_id], [other.user_id for other in others]):
+            for start in _candidate_starts(appointment.start_time, now, search_days):
+                end = start + duration
+                if end.date() != start.date() or not occupancy.is_free(('client', appointment.client_id), start, end):
+                    continue
+                target = next((candidate for candidate in candidate_ids
+                               if _fits_hours(hours[candidate], start, end) and
+                               occupancy.is_free(('consultant', candidate), start, end) and
+                               has_room(candidate, start.date(), appointment.start_time.date())), None)
+                if target is not None:
+                    slot = (target, start, end)
+                    break
+            if slot:
+                break
+
+        if slot is None:
+            # Stays where it is, so later moves must not take its consultant's or client's time
+            occupancy.add(('consultant', consultant_id), appointment.start_time, appointment.end_time)
+            occupancy.add(('client', appointment.client_id), appointment.start_time, appointment.end_time)
+            unresolved.append(appointment.id)
+            continue
+        target, start, end = slot
+        if (target, start.date()) != (consultant_id, appointment.start_time.date()):
+            vacated.append((consultant_id, appointment.start_time.date()))
+        occupancy.add(('consultant', target), start, end)
+        occupancy.add(('client', appointment.client_id), start, end)
+        rescheduled.append({
+            'appointment_id': appointment.id,
+            'client_id': appointment.client_id,
+            'status': appointment.status,
+            'from': {'consultant_id': appointment.consultant_id, 'start_time': appointment.start_time.isoformat(),
+                     'end_time': appointment.end_time.isoformat()},
+            'to': {'consultant_id': target, 'start_time': start.isoformat(), 'end_time': end.isoformat()}
+        })
+        if not dry_run:
+            appointment.consultant_id, appointment.start_time, appointment.end_time = target, start, end
+
+    if dry_run:
+        db.session.rollback()
+        _release(session_counter, reserved)
+    else:
+        if availability is not None:
+            consultant.availability = availability
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            _release(session_counter, reserved)
+            raise
+        _release(session_counter, vacated)
+    log_info("Rescheduled %d of %d appointments for consultant %s%s", len(rescheduled), len(affected),
+             consultant_id, " (dry run)" if dry_run else "")
+    return {'rescheduled': rescheduled, 'unresolved': unresolved} 
\ No newline at end of file
@@ -29,11 +29,11 @@ def check_availability(
             
             # Check for overlap
             if (slot_time < booking_end and slot_end > booking_start):
-                log_info(f"Slot {slot_time} overlaps with existing booking")
+                log_info("Slot %s overlaps with existing booking", slot_time, hot_path=True)
                 return False
                 
         return True
         
     except Exception as e:
-        log_error(f"Error checking availability: {str(e)}", "AVAILABILITY_ERROR")
+        log_error("Error checking availability: %s", "AVAILABILITY_ERROR", e)
         return False 
\ No newline at end of file
@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta
 from models import PeakHourRule, SlotHoldRule, ConsultantPreferenceRule
 from flask import current_app
-import logging
+from services.logging_service import LoggingService
 
-logger = logging.getLogger(__name__)
+logger = LoggingService(__name__)
 
 def check_peak_hour(slot_time):
     """Check if the given time slot falls within peak hours."""
@@ -19,11 +19,11 @@ def check_peak_hour(slot_time):
         ).first()
         
         if peak_rule:
-            logger.info(f"Peak hour detected: {day_name} {time_str}")
+            logger.log_info("Peak hour detected: %s %s", day_name, time_str, hot_path=True)
             return True, peak_rule.multiplier
         return False, 1.0
     except Exception as e:
-        logger.error(f"Error checking peak hour: {str(e)}")
+        logger.log_error("Error checking peak hour: %s", "PEAK_HOUR_ERROR", e)
         return False, 1.0
 
 def get_slot_hold_duration(consultant, is_peak_hour):
@@ -38,11 +38,11 @@ def get_slot_hold_duration(consultant, is_peak_hour):
         # Extend hold time for preferred consultants during peak hours
         if is_peak_hour and consultant.is_preferred:
             hold_duration = int(hold_duration * 1.5)
-            logger.info(f"Extended hold time for preferred consultant during peak hours: {hold_duration}s")
+            logger.log_info("Extended hold time for preferred consultant during peak hours: %ss", hold_duration, hot_path=True)
         
         return hold_duration
     except Exception as e:
-        logger.error(f"Error getting slot hold duration: {str(e)}")
+        logger.log_error("Error getting slot hold duration: %s", "HOLD_DURATION_ERROR", e)
         return 600
 
 def check_consultant_preferences(consultant, client_preferences):
@@ -65,11 +65,11 @@ def check_consultant_preferences(consultant, client_preferences):
             return True
             
         match_percentage = (matched_weight / total_weight) * 100
-        logger.info(f"Consultant preference match percentage: {match_percentage}%")
+        logger.log_info("Consultant preference match percentage: %s%%", match_percentage, hot_path=True)
         
         return match_percentage >= 70  # At least 70% match required
     except Exception as e:
-        logger.error(f"Error checking consultant preferences: {str(e)}")
+        logger.log_error("Error checking consultant preferences: %s", "PREFERENCE_ERROR", e)
         return True
 
 def is_slot_available(consultant, start_time, end_time, client_preferences=None):
@@ -77,7 +77,7 @@ def is_slot_available(consultant, start_time, end_time, client_preferences=None)
     try:
         # Check if slot is in the past
         if start_time < datetime.utcnow():
-            logger.warning("Attempted to book slot in the past")
+            logger.log_warning("Attempted to book slot in the past", hot_path=True)
             return False, "Cannot book slots in the past"
         
         # Check peak hours
@@ -105,10 +105,10 @@ def is_slot_available(consultant, start_time, end_time, client_preferences=None)
         ).first()
         
         if existing_appointment:
-            logger.warning(f"Slot conflict found with appointment {existing_appointment.id}")
+            logger.log_warning("Slot conflict found with appointment %s", existing_appointment.id, hot_path=True)
             return False, "This time slot is already booked"
         
         return True, "Slot is available"
     except Exception as e:
-        logger.error(f"Error checking slot availability: {str(e)}")
+        logger.log_error("Error checking slot availability: %s", "AVAILABILITY_ERROR", e)
         return False, "An error occurred while checking slot availability" 
\ No newline at end of file
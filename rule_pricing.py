@@ -36,9 +36,9 @@ def calculate_price(
         # Calculate final price
         final_price = base_price * hours * peak_multiplier * experience_multiplier
         
-        log_info(f"Calculated price: {final_price} for {duration} minutes")
+        log_info("Calculated price: %s for %s minutes", final_price, duration, hot_path=True)
         return round(final_price, 2)
         
     except Exception as e:
-        log_error(f"Error calculating price: {str(e)}", "PRICING_ERROR")
+        log_error("Error calculating price: %s", "PRICING_ERROR", e)
         return base_price * (duration / 60)  # Fallback to simple calculation 
\ No newline at end of file
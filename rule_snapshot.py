@@ -0,0 +1,248 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .dynamic_rules import DAYS, MINUTES_PER_DAY
+from ..services.logging_service import log_info, log_warning
+
+# Snapshot file, little-endian:
+#   header      magic, format, version, created_at, then offset and length
+#               of the peak table and of the metadata
+#   peak table  float64 multiplier per weekday (Monday first) and minute of
+#               the day, read in place from the mapping by every worker
+#   metadata    JSON hold times, payment rules and preference weights; small,
+#               so each worker decodes it once per version
+MAGIC = b'RSNP'
+FORMAT = 1
+HEADER = struct.Struct('<4sIQdQQQQ')
+PEAK_ENTRIES = len(DAYS) * MINUTES_PER_DAY
+DEFAULT_HOLD_TIME = 900  # Same defaults as RuleEngine
+DEFAULT_VERIFICATION_TIME = 15
+
+_DAY_INDEX = {day: index for index, day in enumerate(DAYS)}
+
+def build_snapshot(rule_engine, preference_rules: Iterable[Dict[str, Any]] = ()) -> Tuple[array, Dict]:
+    """
+    Compile the rules behind a RuleEngine into snapshot contents.
+
+    Args:
+        rule_engine: RuleEngine to read peak hour, consultant and payment rules from
+        preference_rules: Active consultant preference rule documents
+            (preference_type, value, weight)
+
+    Returns:
+        tuple: (peak table, metadata dict)
+    """
+    peak = array('d', [1.0]) * PEAK_ENTRIES
+    for (day, hour, minute), multiplier in rule_engine.peak_hour_matches().items():
+        if day in _DAY_INDEX and hour < 24 and minute < 60:
+            peak[_DAY_INDEX[day] * MINUTES_PER_DAY + hour * 60 + minute] = multiplier
+
+    metadata = {
+        'hold_times': [[specialization, is_preferred, hold_time]
+                       for (specialization, is_preferred), hold_time in rule_engine.hold_times().items()],
+        'payment_rules': rule_engine.payment_rule_table(),
+        'preference_weights': [[rule['preference_type'], rule['value'], rule.get('weight', 1.0)]
+                               for rule in preference_rules]
+    }
+    return peak, metadata
+
+def read_version(path: str) -> int:
+    """Version of the snapshot at path, or 0 if there is none"""
+    try:
+        with open(path, 'rb') as f:
+            magic, _, version, *_ = HEADER.unpack(f.read(HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return 0
+    return version if magic == MAGIC else 0
+
+def write_snapshot(path: str, peak: array, metadata: Dict, version: Optional[int] = None) -> int:
+    """
+    Write a snapshot next to path and rename it into place.
+
+    Readers see either the old file or the complete new one, never a
+    partial write.
+
+    Args:
+        version: Snapshot version; one past the current file's by default
+
+    Returns:
+        int: The version written
+    """
+    if version is None:
+        version = read_version(path) + 1
+    if len(peak) != PEAK_ENTRIES:
+        raise ValueError(f"Peak table has {len(peak)} entries, expected {PEAK_ENTRIES}")
+    if sys.byteorder != 'little':
+        peak = array('d', peak)
+        peak.byteswap()
+
+    peak_bytes = peak.tobytes()
+    meta_bytes = json.dumps(metadata, separators=(',', ':')).encode()
+    peak_offset = HEADER.size + (-HEADER.size % 8)  # float64 aligned
+    meta_offset = peak_offset + len(peak_bytes)
+    header = HEADER.pack(MAGIC, FORMAT, version, time.time(), peak_offset, len(peak_bytes),
+                         meta_offset, len(meta_bytes))
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(header.ljust(peak_offset, b'\0'))
+        f.write(peak_bytes)
+        f.write(meta_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return version
+
+def publish_snapshot(path: str, rule_engine, preference_rules: Iterable[Dict[str, Any]] = ()) -> int:
+    """Compile the current rules and publish them to path; returns the new version"""
+    started = monotonic()
+    peak, metadata = build_snapshot(rule_engine, preference_rules)
+    version = write_snapshot(path, peak, metadata)
+    log_info("Published rule snapshot %s version %s in %.1f ms", path, version,
+             (monotonic() - started) * 1000)
+    return version
+
+class RuleSnapshot:
+    def __init__(self, path: str):
+        """
+        One snapshot version, mapped read-only; never changes once opened.
+
+        Workers mapping the same file share its pages, so the peak table is
+        held once per host however many workers read it.
+
+        Raises:
+            ValueError: If the file is not a snapshot in this format
+        """
+        with open(path, 'rb') as f:
+            self.identity = self._identity(os.fstat(f.fileno()))
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, file_format, self.version, self.created_at, peak_offset, peak_length, \
+            meta_offset, meta_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC or file_format != FORMAT:
+            raise ValueError(f"{path} is not a format {FORMAT} rule snapshot")
+        if peak_length != PEAK_ENTRIES * 8 or meta_offset + meta_length > len(self._map):
+            raise ValueError(f"{path} is truncated or corrupt")
+
+        if sys.byteorder == 'little':
+            self._peak = memoryview(self._map)[peak_offset:peak_offset + peak_length].cast('d')
+        else:
+            self._peak = array('d', self._map[peak_offset:peak_offset + peak_length])
+            self._peak.byteswap()
+
+        metadata = json.loads(self._map[meta_offset:meta_offset + meta_length])
+        self.hold_times = {(specialization, is_preferred): hold_time
+                           for specialization, is_preferred, hold_time in metadata['hold_times']}
+        self.payment_rules: Dict[str, Dict] = metadata['payment_rules']
+        self.preference_weights: List[Tuple[str, str, float]] = [
+            tuple(rule) for rule in metadata['preference_weights']]
+
+    @staticmethod
+    def _identity(stat: os.stat_result) -> tuple:
+        return (stat.st_dev, stat.st_ino)
+
+    def peak_multiplier(self, day: str, time: datetime) -> float:
+        index = _DAY_INDEX.get(day)
+        if index is None:
+            return 1.0
+        return self._peak[index * MINUTES_PER_DAY + time.hour * 60 + time.minute]
+
+    def __len__(self) -> int:
+        return len(self._peak) + len(self.hold_times) + len(self.payment_rules)
+
+class SnapshotRules:
+    def __init__(self, path: str, check_interval: float = 1.0):
+        """
+        Rule lookups served from the published snapshot at path.
+
+        Answers get_peak_hour_multiplier, get_consultant_hold_time and
+        get_payment_verification_time like RuleEngine, so it can stand in for
+        one (e.g. in SchedulingRuleEngine) without a Mongo round trip or a
+        per-worker cache. The file is checked at most every check_interval
+        seconds and a renamed-in version is mapped on the next lookup.
+
+        Args:
+            path: Snapshot file written by publish_snapshot
+            check_interval: Seconds between checks for a new version
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[RuleSnapshot] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> RuleSnapshot:
+        """
+        Return the current snapshot, mapping a newer one if it was published.
+
+        Raises:
+            FileNotFoundError, ValueError: If no usable snapshot has been mapped yet
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and monotonic() < self._next_check:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not snapshot:
+                return self._snapshot
+            self._next_check = monotonic() + self.check_interval
+            try:
+                if snapshot is not None and RuleSnapshot._identity(os.stat(self.path)) == snapshot.identity:
+                    return snapshot
+                # Older versions stay mapped until the last lookup using them lets go
+                self._snapshot = RuleSnapshot(self.path)
+            except (OSError, ValueError) as e:
+                if snapshot is None:
+                    raise
+                log_warning("Keeping rule snapshot version %s: %s", snapshot.version, e)
+                return snapshot
+            log_info("Mapped rule snapshot %s version %s", self.path, self._snapshot.version)
+            return self._snapshot
+
+    def warm_cache(self) -> int:
+        """Map the snapshot now; returns the number of rule entries it holds"""
+        return len(self.snapshot())
+
+    def get_peak_hour_multiplier(self, day: str, time: datetime) -> float:
+        """Get the rate multiplier for a specific time"""
+        return self.snapshot().peak_multiplier(day, time)
+
+    def get_peak_hour_multipliers(self, times: List[datetime]) -> List[float]:
+        """Get the rate multipliers for many times from one snapshot version"""
+        snapshot = self.snapshot()
+        return [snapshot.peak_multiplier(DAYS[time.weekday()], time) for time in times]
+
+    def get_consultant_hold_time(self, specialization: str, is_preferred: bool) -> int:
+        """Get the hold time for a specific consultant type"""
+        return self.snapshot().hold_times.get((specialization, is_preferred), DEFAULT_HOLD_TIME)
+
+    def get_payment_verification_time(self, payment_type: str) -> int:
+        """Get the verification time for a specific payment type"""
+        rule = self.snapshot().payment_rules.get(payment_type)
+        return rule['verification_time'] if rule else DEFAULT_VERIFICATION_TIME
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Publish the rules in MongoDB as a snapshot file')
+    parser.add_argument('--path', default=os.getenv('RULE_SNAPSHOT_PATH'),
+                        help='Snapshot file (default: RULE_SNAPSHOT_PATH)')
+    parser.add_argument('--mongodb-uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017/climbup'))
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error('--path or RULE_SNAPSHOT_PATH is required')
+
+    from pymongo import MongoClient
+    from ..models.mongodb.rules import RuleEngine
+    client = MongoClient(args.mongodb_uri)
+    preference_rules = client.get_database().consultant_preference_rule.find({'is_active': True})
+    publish_snapshot(args.path, RuleEngine(args.mongodb_uri, client=client), preference_rules)
+
+if __name__ == '__main__':
+    main() 
\ No newline at end of file
@@ -1,7 +1,129 @@
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 from ..services.logging_service import log_info, log_error
 
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+# Reason codes returned by validate_bookings
+VALID = 'VALID'
+INSUFFICIENT_NOTICE = 'INSUFFICIENT_NOTICE'
+DURATION_TOO_LONG = 'DURATION_TOO_LONG'
+DAY_UNAVAILABLE = 'DAY_UNAVAILABLE'
+OUTSIDE_WORKING_HOURS = 'OUTSIDE_WORKING_HOURS'
+INVALID_BOOKING = 'INVALID_BOOKING'
+
+# Working hours per weekday (Monday first) as (start, end) minutes after midnight
+WorkingHours = Tuple[Optional[Tuple[int, int]], ...]
+
+@lru_cache(maxsize=1024)
+def _minute_offsets(start: str, end: str) -> Tuple[int, int]:
+    # Consultants share a handful of distinct hours, so each pair is parsed once per process
+    start_time = datetime.strptime(start, '%H:%M')
+    end_time = datetime.strptime(end, '%H:%M')
+    return start_time.hour * 60 + start_time.minute, end_time.hour * 60 + end_time.minute
+
+def compile_working_hours(work_hours: Dict[str, Dict[str, str]]) -> WorkingHours:
+    """
+    Parse a consultant's working hours once, for reuse across validations.
+
+    Args:
+        work_hours: {'monday': {'start': '09:00', 'end': '17:00'}, ...}
+
+    Returns:
+        WorkingHours: (start, end) minute offsets indexed by weekday, None
+        for days the consultant does not work
+
+    Raises:
+        KeyError, ValueError: If a day's hours are malformed
+    """
+    compiled = []
+    for day in WEEKDAYS:
+        hours = work_hours.get(day)
+        if hours is None:
+            compiled.append(None)
+            continue
+        compiled.append(_minute_offsets(hours['start'], hours['end']))
+    return tuple(compiled)
+
+def validate_bookings(
+    bookings: Sequence[Dict[str, Any]],
+    consultant_data: Dict[str, Any],
+    rules: Dict[str, Any],
+    working_hours: Optional[WorkingHours] = None,
+    now: Optional[datetime] = None
+) -> List[str]:
+    """
+    Validate candidate bookings for one consultant in a single pass.
+
+    Checks the same rules as validate_booking, in the same order, but parses
+    the rules and working hours once per call instead of once per booking,
+    and compares each candidate as plain seconds after midnight.
+
+    Args:
+        bookings: Candidates with start_time and duration (minutes)
+        consultant_data: Consultant's information
+        rules: Business rules from MongoDB
+        working_hours: Precompiled working hours (compile_working_hours);
+            parsed from consultant_data when omitted
+        now: Reference time for the notice period, default now
+
+    Returns:
+        list: One reason code per booking (VALID, INSUFFICIENT_NOTICE,
+        DURATION_TOO_LONG, DAY_UNAVAILABLE, OUTSIDE_WORKING_HOURS or
+        INVALID_BOOKING)
+    """
+    try:
+        if working_hours is None:
+            working_hours = compile_working_hours(consultant_data.get('working_hours', {}))
+        earliest = (now or datetime.now()) + timedelta(hours=rules.get('min_notice_hours', 24))
+        max_duration = rules.get('max_duration_minutes', 120)
+    except Exception as e:
+        log_error("Error validating bookings: %s", "VALIDATION_ERROR", e)
+        return [INVALID_BOOKING] * len(bookings)
+
+    # Day windows in seconds, so a start or end with seconds compares like time() did
+    windows = [None if hours is None else (hours[0] * 60, hours[1] * 60) for hours in working_hours]
+    reasons = []
+    append = reasons.append
+    for booking in bookings:
+        try:
+            booking_time = booking['start_time']
+            duration = booking['duration']
+            if booking_time < earliest:
+                append(INSUFFICIENT_NOTICE)
+                continue
+            if duration > max_duration:
+                append(DURATION_TOO_LONG)
+                continue
+            window = windows[booking_time.weekday()]
+            if window is None:
+                append(DAY_UNAVAILABLE)
+                continue
+            start = booking_time.hour * 3600 + booking_time.minute * 60 + booking_time.second
+            if start < window[0] or start + duration * 60 + (booking_time.microsecond > 0) > window[1]:
+                append(OUTSIDE_WORKING_HOURS)
+                continue
+            append(VALID)
+        except (KeyError, TypeError, AttributeError) as e:
+            log_error("Error validating booking: %s", "VALIDATION_ERROR", e, hot_path=True)
+            append(INVALID_BOOKING)
+    return reasons
+
+def reason_message(reason: str, rules: Dict[str, Any]) -> str:
+    """User-facing message for a validate_bookings reason code ("" for VALID)"""
+    if reason == VALID:
+        return ""
+    if reason == INSUFFICIENT_NOTICE:
+        return "Booking must be made at least 24 hours in advance"
+    if reason == DURATION_TOO_LONG:
+        return f"Maximum booking duration is {rules.get('max_duration_minutes', 120)} minutes"
+    if reason == DAY_UNAVAILABLE:
+        return "Consultant is not available on this day"
+    if reason == OUTSIDE_WORKING_HOURS:
+        return "Booking time is outside consultant's working hours"
+    return "An error occurred while validating the booking"
+
 def validate_booking(
     booking_data: Dict[str, Any],
     consultant_data: Dict[str, Any],
@@ -9,46 +131,17 @@ def validate_booking(
 ) -> tuple[bool, str]:
     """
     Validate a booking request against business rules.
-    
+
     Args:
         booking_data: Booking request data
         consultant_data: Consultant's information
         rules: Business rules from MongoDB
-        
+
     Returns:
         tuple[bool, str]: (is_valid, error_message)
     """
-    try:
-        # Check minimum notice period
-        min_notice = rules.get('min_notice_hours', 24)
-        booking_time = booking_data['start_time']
-        if (booking_time - datetime.now()).total_seconds() < min_notice * 3600:
-            return False, "Booking must be made at least 24 hours in advance"
-            
-        # Check maximum booking duration
-        max_duration = rules.get('max_duration_minutes', 120)
-        duration = booking_data['duration']
-        if duration > max_duration:
-            return False, f"Maximum booking duration is {max_duration} minutes"
-            
-        # Check consultant's working hours
-        work_hours = consultant_data.get('working_hours', {})
-        day_of_week = booking_time.strftime('%A').lower()
-        if day_of_week not in work_hours:
-            return False, "Consultant is not available on this day"
-            
-        # Check if within working hours
-        start_time = work_hours[day_of_week]['start']
-        end_time = work_hours[day_of_week]['end']
-        booking_end = booking_time + timedelta(minutes=duration)
-        
-        if (booking_time.time() < datetime.strptime(start_time, '%H:%M').time() or
-            booking_end.time() > datetime.strptime(end_time, '%H:%M').time()):
-            return False, "Booking time is outside consultant's working hours"
-            
-        log_info(f"Booking validation successful for {booking_time}")
+    reason = validate_bookings([booking_data], consultant_data, rules)[0]
+    if reason == VALID:
+        log_info("Booking validation successful for %s", booking_data['start_time'], hot_path=True)
         return True, ""
-        
-    except Exception as e:
-        log_error(f"Error validating booking: {str(e)}", "VALIDATION_ERROR")
-        return False, "An error occurred while validating the booking" 
\ No newline at end of file
+    return False, reason_message(reason, rules) 
\ No newline at end of file
@@ -1,18 +1,117 @@
 from pymongo import MongoClient
 from datetime import datetime
-from typing import Dict, List, Optional
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional
+from ...services.metrics import record_cache_lookup
+from ...services.tracing import traced
 
 class RuleEngine:
-    def __init__(self, mongo_uri: str):
-        self.client = MongoClient(mongo_uri)
+    def __init__(self, mongo_uri: str, cache_ttl: int = 60, client: Optional[MongoClient] = None):
+        # client lets callers supply an existing (or mongomock) client instead of a URI
+        self.client = client if client is not None else MongoClient(mongo_uri)
         self.db = self.client.climbup_rules
         
+        # Per-process cache of rule lookups: key -> (expires_at, value)
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[tuple, tuple] = {}
+        
         # Collections
         self.peak_hours = self.db.peak_hours
         self.consultant_rules = self.db.consultant_rules
         self.slot_hold_rules = self.db.slot_hold_rules
         self.payment_rules = self.db.payment_rules
 
+    def _cached(self, cache: str, key: tuple, loader: Callable[[], Any]) -> Any:
+        """Return a cached rule lookup, loading it from MongoDB on miss or expiry"""
+        entry = self._cache.get(key)
+        now = monotonic()
+        if entry is not None and entry[0] > now:
+            record_cache_lookup(cache, True)
+            return entry[1]
+        record_cache_lookup(cache, False)
+        value = loader()
+        self._cache[key] = (now + self.cache_ttl, value)
+        return value
+
+    def clear_cache(self):
+        """Drop all cached rule lookups"""
+        self._cache.clear()
+
+    @traced()
+    def warm_cache(self) -> int:
+        """
+        Fill the cache for every peak hour and consultant rule lookup.
+
+        Reads each collection once instead of one find_one per key, and
+        gives each key the value the matching get_* call would load.
+
+        Returns:
+            int: Cache entries loaded
+        """
+        expires_at = monotonic() + self.cache_ttl
+        entries = {}
+
+        matches = self.peak_hour_matches()
+        days = {rule_day for rule_day, _, _ in matches}
+        for day in days:
+            for hour in range(24):
+                for minute in range(60):
+                    entries[('peak_hours', day, hour, minute)] = matches.get((day, hour, minute), 1.0)
+
+        for (specialization, is_preferred), hold_time in self.hold_times().items():
+            entries[('consultant_rules', specialization, is_preferred)] = hold_time
+
+        self._cache.update({key: (expires_at, value) for key, value in entries.items()})
+        return len(entries)
+
+    def peak_hour_matches(self) -> Dict[tuple, float]:
+        """
+        Every (day, hour, minute) that a peak hour rule answers, from one query.
+
+        get_peak_hour_multiplier matches "^{hour}:{minute}" against time_range,
+        so a rule answers every key that is a prefix of its time_range; the
+        first rule found wins, as with find_one.
+
+        Returns:
+            dict: {(day, hour, minute): multiplier}
+        """
+        matches: Dict[tuple, float] = {}
+        for rule in self.peak_hours.find({}, {"day": 1, "time_range": 1, "multiplier": 1}):
+            time_range = rule.get("time_range", "")
+            for end in range(3, min(len(time_range), 5) + 1):
+                hour, _, minute = time_range[:end].partition(':')
+                if hour.isdigit() and minute.isdigit() and f"{int(hour)}:{int(minute)}" == time_range[:end]:
+                    matches.setdefault((rule["day"], int(hour), int(minute)), rule["multiplier"])
+        return matches
+
+    def hold_times(self) -> Dict[tuple, int]:
+        """Hold time per (specialization, is_preferred), as get_consultant_hold_time finds them"""
+        hold_times: Dict[tuple, int] = {}
+        for rule in self.consultant_rules.find({}, {"specialization": 1, "is_preferred": 1, "hold_time": 1}):
+            hold_times.setdefault((rule["specialization"], rule["is_preferred"]), rule["hold_time"])
+        return hold_times
+
+    def daily_session_caps(self) -> Dict[tuple, int]:
+        """max_daily_sessions per (specialization, is_preferred), first rule found wins as in hold_times"""
+        caps: Dict[tuple, int] = {}
+        for rule in self.consultant_rules.find({}, {"specialization": 1, "is_preferred": 1,
+                                                     "max_daily_sessions": 1}):
+            if rule.get("max_daily_sessions") is not None:
+                caps.setdefault((rule["specialization"], rule["is_preferred"]), rule["max_daily_sessions"])
+        return caps
+
+    def payment_rule_table(self) -> Dict[str, Dict]:
+        """Verification time and channels per payment type, as get_payment_verification_time finds them"""
+        rules: Dict[str, Dict] = {}
+        for rule in self.payment_rules.find({}, {"payment_type": 1, "verification_time": 1,
+                                                  "notification_channels": 1}):
+            rules.setdefault(rule["payment_type"], {
+                "verification_time": rule["verification_time"],
+                "notification_channels": rule.get("notification_channels", [])
+            })
+        return rules
+
+    @traced()
     def initialize_collections(self):
         # Peak hours rules
         self.peak_hours.create_index([("day", 1), ("time_range", 1)])
@@ -26,6 +125,7 @@ class RuleEngine:
         # Payment verification rules
         self.payment_rules.create_index([("payment_type", 1)])
 
+    @traced()
     def add_peak_hour_rule(self, day: str, time_range: str, multiplier: float):
         """Add a peak hour rule with time range and rate multiplier"""
         self.peak_hours.insert_one({
@@ -34,17 +134,47 @@ class RuleEngine:
             "multiplier": multiplier,
             "created_at": datetime.utcnow()
         })
+        self.clear_cache()
 
+    @traced()
     def get_peak_hour_multiplier(self, day: str, time: datetime) -> float:
         """Get the rate multiplier for a specific time"""
-        rule = self.peak_hours.find_one({
-            "day": day,
-            "time_range": {
-                "$regex": f"^{time.hour}:{time.minute}"
-            }
-        })
-        return rule["multiplier"] if rule else 1.0
+        def load():
+            rule = self.peak_hours.find_one({
+                "day": day,
+                "time_range": {
+                    "$regex": f"^{time.hour}:{time.minute}"
+                }
+            })
+            return rule["multiplier"] if rule else 1.0
+        return self._cached('peak_hours', ('peak_hours', day, time.hour, time.minute), load)
+
+    @traced()
+    def get_peak_hour_multipliers(self, times: List[datetime]) -> List[float]:
+        """
+        Get the rate multipliers for many times with at most one query.
+
+        Cached times are answered from the cache; if any are missing, the
+        peak hour rules are read once, as in warm_cache, instead of one
+        find_one per time.
+        """
+        keys = [('peak_hours', time.strftime('%A'), time.hour, time.minute) for time in times]
+        now = monotonic()
+        missing = set()
+        for key in keys:
+            entry = self._cache.get(key)
+            hit = entry is not None and entry[0] > now
+            record_cache_lookup('peak_hours', hit)
+            if not hit:
+                missing.add(key)
+        if missing:
+            matches = self.peak_hour_matches()
+            expires_at = now + self.cache_ttl
+            for key in missing:
+                self._cache[key] = (expires_at, matches.get(key[1:], 1.0))
+        return [self._cache[key][1] for key in keys]
 
+    @traced()
     def add_consultant_rule(self, specialization: str, is_preferred: bool, 
                           hold_time: int, max_daily_sessions: int):
         """Add rules for consultant matching and slot holds"""
@@ -55,15 +185,21 @@ class RuleEngine:
             "max_daily_sessions": max_daily_sessions,
             "created_at": datetime.utcnow()
         })
+        self.clear_cache()
 
+    @traced()
     def get_consultant_hold_time(self, specialization: str, is_preferred: bool) -> int:
         """Get the hold time for a specific consultant type"""
-        rule = self.consultant_rules.find_one({
-            "specialization": specialization,
-            "is_preferred": is_preferred
-        })
-        return rule["hold_time"] if rule else 900  # Default 15 minutes
+        def load():
+            rule = self.consultant_rules.find_one({
+                "specialization": specialization,
+                "is_preferred": is_preferred
+            })
+            return rule["hold_time"] if rule else 900  # Default 15 minutes
+        return self._cached('consultant_rules',
+                            ('consultant_rules', specialization, is_preferred), load)
 
+    @traced()
     def add_payment_rule(self, payment_type: str, verification_time: int, 
                         notification_channels: List[str]):
         """Add rules for payment verification"""
@@ -73,8 +209,12 @@ class RuleEngine:
             "notification_channels": notification_channels,
             "created_at": datetime.utcnow()
         })
+        self.clear_cache()
 
+    @traced()
     def get_payment_verification_time(self, payment_type: str) -> int:
         """Get the verification time for a specific payment type"""
-        rule = self.payment_rules.find_one({"payment_type": payment_type})
-        return rule["verification_time"] if rule else 15  # Default 15 minutes 
\ No newline at end of file
+        def load():
+            rule = self.payment_rules.find_one({"payment_type": payment_type})
+            return rule["verification_time"] if rule else 15  # Default 15 minutes
+        return self._cached('payment_rules', ('payment_rules', payment_type), load) 
\ No newline at end of file
@@ -2,11 +2,13 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from ..models.mongodb.rules import RuleEngine
 from ..models.postgresql.models import Appointment, SlotHold, Consultant
+from ..services.tracing import traced
 
 class SchedulingRuleEngine:
     def __init__(self, rule_engine: RuleEngine):
         self.rule_engine = rule_engine
 
+    @traced()
     def check_availability(self, consultant_id: int, start_time: datetime, 
                          end_time: datetime) -> bool:
         """Check if a time slot is available for booking"""
@@ -28,6 +30,7 @@ class SchedulingRuleEngine:
 
         return existing_appointments == 0 and active_holds == 0
 
+    @traced()
     def calculate_hold_time(self, consultant: Consultant, 
                           start_time: datetime) -> int:
         """Calculate the hold time based on consultant type and peak hours"""
@@ -46,6 +49,7 @@ class SchedulingRuleEngine:
         
         return base_hold_time
 
+    @traced()
     def validate_slot_hold(self, slot_hold: SlotHold) -> bool:
         """Validate if a slot hold is still valid"""
         if slot_hold.status != 'active':
@@ -57,6 +61,7 @@ class SchedulingRuleEngine:
             
         return True
 
+    @traced()
     def get_available_slots(self, consultant_id: int, date: datetime, 
                           duration: int) -> List[Dict]:
         """Get available time slots for a consultant on a specific date"""
@@ -93,6 +98,7 @@ class SchedulingRuleEngine:
 
         return available_slots
 
+    @traced()
     def match_consultant(self, specialization: str, 
                         preferred_only: bool = False) -> List[Consultant]:
         """Match consultants based on specialization and preferences"""
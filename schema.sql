@@ -49,12 +49,49 @@ CREATE TABLE slot_holds (
     end_time TIMESTAMP WITH TIME ZONE NOT NULL,
     status VARCHAR(20) NOT NULL CHECK (status IN ('active', 'expired', 'converted')),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     expires_at TIMESTAMP WITH TIME ZONE NOT NULL
 );
 
+-- Payments table (proof of payment and its verification)
+CREATE TABLE payments (
+    id SERIAL PRIMARY KEY,
+    appointment_id INTEGER NOT NULL REFERENCES appointments(id),
+    amount DECIMAL(10,2) NOT NULL,
+    status VARCHAR(20) NOT NULL CHECK (status IN ('pending', 'verified', 'failed')),
+    payment_proof_url VARCHAR(255),
+    verified_by INTEGER REFERENCES users(id),
+    verified_at TIMESTAMP WITH TIME ZONE,
+    verification_notes TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for better query performance
 CREATE INDEX idx_appointments_client ON appointments(client_id);
 CREATE INDEX idx_appointments_consultant ON appointments(consultant_id);
 CREATE INDEX idx_appointments_time ON appointments(start_time, end_time);
 CREATE INDEX idx_slot_holds_time ON slot_holds(start_time, end_time);
-CREATE INDEX idx_users_role ON users(role); 
\ No newline at end of file
+-- Conflict audit: scans in (consultant_id, start_time) order, and incremental runs find changed rows
+CREATE INDEX idx_appointments_consultant_start ON appointments(consultant_id, start_time);
+CREATE INDEX idx_slot_holds_consultant_start ON slot_holds(consultant_id, start_time);
+CREATE INDEX idx_appointments_updated_at ON appointments(updated_at);
+CREATE INDEX idx_slot_holds_updated_at ON slot_holds(updated_at);
+-- Upcoming confirmed appointments, scanned by the reminder scheduler on startup
+CREATE INDEX idx_appointments_confirmed_start ON appointments(start_time) WHERE status = 'confirmed';
+CREATE INDEX idx_payments_appointment ON payments(appointment_id);
+CREATE INDEX idx_users_role ON users(role);
+CREATE INDEX idx_users_created_at ON users(created_at);
+
+-- Keep updated_at current on every update, whoever writes the row
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER appointments_updated_at BEFORE UPDATE ON appointments
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+CREATE TRIGGER slot_holds_updated_at BEFORE UPDATE ON slot_holds
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at(); 
\ No newline at end of file
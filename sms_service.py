@@ -0,0 +1,80 @@
+import importlib
+from typing import List, Optional, Sequence, Tuple
+from .logging_service import log_info
+
+# (phone number, text)
+SMSMessage = Tuple[str, str]
+
+class SMSTransport:
+    """
+    Sends text messages through one provider.
+
+    Subclass and name it in SMS_TRANSPORT ('package.module:ClassName') to
+    plug in a provider; it is built once per worker process with no
+    arguments, so read credentials from the environment.
+    """
+
+    def send(self, to: str, body: str) -> None:
+        raise NotImplementedError
+
+    def send_batch(self, messages: Sequence[SMSMessage]) -> List[Optional[Exception]]:
+        """
+        Send several messages; override for providers with a bulk API.
+
+        Returns:
+            list: None for each message sent, or the exception it failed with
+        """
+        results: List[Optional[Exception]] = []
+        for to, body in messages:
+            try:
+                self.send(to, body)
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def close(self) -> None:
+        pass
+
+class LogSMSTransport(SMSTransport):
+    """Logs messages instead of sending them; the default outside production"""
+
+    def send(self, to: str, body: str) -> None:
+        log_info("SMS to %s: %s", to, body, hot_path=True)
+
+class FakeSMSTransport(SMSTransport):
+    def __init__(self):
+        """Records messages instead of sending them, for tests and local runs"""
+        self.sent: List[SMSMessage] = []
+        self.failures = 0
+
+    def fail_next(self, count: int = 1) -> None:
+        """Make the next count sends raise ConnectionError"""
+        self.failures += count
+
+    def send(self, to: str, body: str) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Fake SMS transport failure")
+        self.sent.append((to, body))
+
+def load_transport(spec: Optional[str] = None) -> SMSTransport:
+    """
+    Build the SMS transport named by spec.
+
+    Args:
+        spec: 'log' (default), 'fake' or 'package.module:ClassName'
+
+    Raises:
+        ValueError: If spec names nothing that can be imported
+    """
+    if not spec or spec == 'log':
+        return LogSMSTransport()
+    if spec == 'fake':
+        return FakeSMSTransport()
+    module_name, _, class_name = spec.partition(':')
+    try:
+        transport_class = getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise ValueError(f"Unknown SMS transport {spec!r}: {e}") from e
+    return transport_class() 
\ No newline at end of file
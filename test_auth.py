@@ -1,9 +1,9 @@
 import pytest
 from flask import Flask
-from flask_jwt_extended import JWTManager
 from ..routes.auth import bp as auth_bp
 from ..models.postgresql.models import db, User
 from ..config import TestConfig
+from ..services.jwt_service import init_jwt
 
 @pytest.fixture
 def app():
@@ -13,7 +13,7 @@ def app():
     
     # Initialize extensions
     db.init_app(app)
-    JWTManager(app)
+    init_jwt(app)
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -150,4 +150,57 @@ def test_refresh_token_invalid(client):
     
     assert response.status_code == 401
     data = response.get_json()
-    assert data['success'] is False 
\ No newline at end of file
+    assert data['success'] is False
+
+def _login(client):
+    client.post('/auth/register', json={
+        'email': 'test@example.com',
+        'password': 'testpass123',
+        'name': 'Test User'
+    })
+    
+    response = client.post('/auth/login', json={
+        'email': 'test@example.com',
+        'password': 'testpass123'
+    })
+    return response.get_json()['tokens']
+
+def test_refresh_token_rotation(client):
+    """Test that refreshing rotates the refresh token"""
+    tokens = _login(client)
+    
+    response = client.post('/auth/refresh',
+        headers={'Authorization': f"Bearer {tokens['refresh_token']}"}
+    )
+    
+    assert response.status_code == 200
+    new_refresh_token = response.get_json()['token']['refresh_token']
+    assert new_refresh_token != tokens['refresh_token']
+    
+    # The old refresh token can no longer be used
+    response = client.post('/auth/refresh',
+        headers={'Authorization': f"Bearer {tokens['refresh_token']}"}
+    )
+    assert response.status_code == 401
+
+def test_logout_revokes_tokens(client):
+    """Test that logout revokes the access and refresh tokens"""
+    tokens = _login(client)
+    
+    response = client.post('/auth/logout',
+        headers={'Authorization': f"Bearer {tokens['access_token']}"},
+        json={'refresh_token': tokens['refresh_token']}
+    )
+    
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+    
+    response = client.post('/auth/logout',
+        headers={'Authorization': f"Bearer {tokens['access_token']}"}
+    )
+    assert response.status_code == 401
+    
+    response = client.post('/auth/refresh',
+        headers={'Authorization': f"Bearer {tokens['refresh_token']}"}
+    )
+    assert response.status_code == 401 
\ No newline at end of file
@@ -0,0 +1,41 @@
+import pytest
+from ..services.bloom_filter import BloomFilter
+
+EMAILS = [f"user{i}@example.com" for i in range(5000)]
+
+def test_no_false_negatives():
+    bloom = BloomFilter.for_capacity(len(EMAILS), 0.01)
+    bloom.update(EMAILS)
+
+    assert all(email in bloom for email in EMAILS)
+    assert bloom.count == len(EMAILS)
+
+def test_false_positive_rate_near_target():
+    bloom = BloomFilter.for_capacity(len(EMAILS), 0.01)
+    bloom.update(EMAILS)
+
+    unknown = [f"stuffing{i}@example.org" for i in range(20000)]
+    false_positives = sum(1 for email in unknown if email in bloom)
+
+    assert false_positives / len(unknown) < 0.02
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'user_emails.bloom')
+    bloom = BloomFilter.for_capacity(100)
+    bloom.update(EMAILS[:50])
+    bloom.built_at = 1700000000.0
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+
+    assert loaded.bits == bloom.bits
+    assert loaded.count == 50
+    assert loaded.built_at == 1700000000.0
+    assert EMAILS[0] in loaded
+
+def test_load_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'not_a_filter'
+    path.write_bytes(b'x' * 64)
+
+    with pytest.raises(ValueError):
+        BloomFilter.load(str(path)) 
\ No newline at end of file
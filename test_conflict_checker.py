@@ -0,0 +1,60 @@
+import random
+from datetime import datetime, timedelta
+from ..services.conflict_checker import find_conflicts, overlapping_pairs, load_watermark, save_watermark
+
+BASE = datetime(2030, 1, 7, 9, 0)
+
+def row(table, row_id, consultant_id, start_minutes, minutes, status='confirmed', appointment_id=None,
+        changed=True):
+    start = BASE + timedelta(minutes=start_minutes)
+    return (table, row_id, consultant_id, start, start + timedelta(minutes=minutes), status,
+            appointment_id, changed)
+
+def test_reports_every_overlapping_pair_with_statuses():
+    rows = [
+        row('appointment', 1, 1, 0, 60),
+        row('appointment', 2, 1, 30, 60, 'pending'),
+        row('hold', 7, 1, 45, 30, 'active'),
+        row('appointment', 3, 1, 90, 30),   # starts as 2 ends: no overlap
+        row('appointment', 4, 2, 0, 60),    # other consultant, same time
+    ]
+
+    conflicts = list(find_conflicts(rows))
+    assert [(c['first']['id'], c['second']['id'], c['kind']) for c in conflicts] == [
+        (1, 2, 'double_booking'), (1, 7, 'hold_appointment_overlap'), (2, 7, 'hold_appointment_overlap')
+    ]
+    assert conflicts[0]['first']['status'] == 'confirmed'
+    assert conflicts[0]['second']['status'] == 'pending'
+    assert conflicts[0]['overlap_start'] == (BASE + timedelta(minutes=30)).isoformat()
+    assert conflicts[0]['overlap_end'] == (BASE + timedelta(minutes=60)).isoformat()
+
+def test_hold_converted_into_the_appointment_is_not_a_conflict():
+    rows = [row('appointment', 1, 1, 0, 60), row('hold', 1, 1, 0, 60, 'active', appointment_id=1)]
+
+    assert list(find_conflicts(rows)) == []
+
+def test_changed_only_skips_pairs_of_unchanged_rows():
+    rows = [
+        row('appointment', 1, 1, 0, 60, changed=False),
+        row('appointment', 2, 1, 10, 60, changed=False),
+        row('appointment', 3, 1, 20, 60, changed=True),
+    ]
+
+    conflicts = list(find_conflicts(rows, changed_only=True))
+    assert [(c['first']['id'], c['second']['id']) for c in conflicts] == [(1, 3), (2, 3)]
+
+def test_sweep_matches_brute_force():
+    rng = random.Random(7)
+    rows = sorted((row('appointment', i, rng.randrange(5), rng.randrange(0, 2000, 15), rng.choice([30, 60, 90]))
+                   for i in range(400)), key=lambda r: (r[2], r[3]))
+
+    expected = {(a[1], b[1]) for i, a in enumerate(rows) for b in rows[i + 1:]
+                if a[2] == b[2] and a[3] < b[4] and b[3] < a[4]}
+    assert {(a[1], b[1]) for a, b in overlapping_pairs(rows)} == expected
+
+def test_watermark_round_trip(tmp_path):
+    path = str(tmp_path / 'audit.json')
+    assert load_watermark(path) is None
+
+    save_watermark(path, BASE)
+    assert load_watermark(path) == BASE 
\ No newline at end of file
@@ -0,0 +1,23 @@
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from ..services import cooperative
+
+def test_sync_mode_defaults(monkeypatch):
+    monkeypatch.setattr(cooperative, 'WORKER_MODE', 'sync')
+    monkeypatch.delenv('DB_POOL_SIZE', raising=False)
+    monkeypatch.delenv('DB_MAX_OVERFLOW', raising=False)
+
+    cooperative.check_patched()
+    assert cooperative.sqlalchemy_engine_options() == {'pool_size': 5, 'max_overflow': 10}
+    executor = cooperative.cpu_executor(1)
+    assert isinstance(executor, ProcessPoolExecutor)
+    executor.shutdown()
+
+def test_gevent_mode_requires_patching(monkeypatch):
+    pytest.importorskip('gevent')
+    monkeypatch.setattr(cooperative, 'WORKER_MODE', 'gevent')
+    monkeypatch.setenv('DB_POOL_SIZE', '20')
+
+    with pytest.raises(RuntimeError, match='monkey-patched'):
+        cooperative.check_patched()
+    assert cooperative.sqlalchemy_engine_options() == {'pool_size': 20, 'max_overflow': 5} 
\ No newline at end of file
@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+import fakeredis
+import pytest
+from ..services.daily_sessions import DailySessionCounter, load_caps
+
+DAY = date(2030, 1, 7)
+
+@pytest.fixture
+def counter():
+    return DailySessionCounter(fakeredis.FakeRedis())
+
+def test_reserve_stops_at_published_cap(counter):
+    counter.rebuild({}, {1: 2}, DAY, days=1)
+
+    assert [counter.reserve(1, DAY) for _ in range(3)] == [True, True, False]
+    assert counter.count(1, DAY) == 2
+    assert counter.is_full(1, DAY)
+    assert counter.reserve(1, DAY + timedelta(days=1))
+
+def test_fallback_cap_and_uncapped_consultants(counter):
+    assert all(counter.reserve(2, DAY) for _ in range(10))
+    assert not counter.is_full(2, DAY)
+    assert [counter.reserve(3, DAY, cap=1) for _ in range(2)] == [True, False]
+
+def test_release_compensates_and_never_goes_negative(counter):
+    counter.rebuild({}, {1: 1}, DAY, days=1)
+    counter.reserve(1, DAY)
+
+    counter.release(1, DAY)
+    counter.release(1, DAY)
+
+    assert counter.count(1, DAY) == 0
+    assert counter.reserve(1, DAY)
+
+def test_reserve_many_in_one_pipeline(counter):
+    counter.rebuild({(1, DAY): 1}, {1: 2}, DAY, days=2)
+
+    assert counter.reserve_many(1, [DAY, DAY, DAY + timedelta(days=1)]) == [True, False, True]
+    counter.release_many(1, [DAY])
+    assert counter.count(1, DAY) == 1
+
+def test_rebuild_repairs_drift(counter):
+    counter.rebuild({}, {1: 5}, DAY, days=2)
+    for _ in range(4):
+        counter.reserve(1, DAY)
+    counter.reserve(1, DAY + timedelta(days=1))
+
+    written = counter.rebuild({(1, DAY): 2}, {1: 3}, DAY, days=2)
+
+    assert written == 1
+    assert counter.count(1, DAY) == 2
+    assert counter.count(1, DAY + timedelta(days=1)) == 0
+    assert counter.redis.ttl(counter.key(1, DAY)) > 0
+    assert [counter.reserve(1, DAY) for _ in range(2)] == [True, False]
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        rows = self.rows
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, params=None):
+                pass
+
+            def __iter__(self):
+                return iter(rows)
+        return Cursor()
+
+def test_load_caps_applies_the_lower_of_consultant_and_rule():
+    connection = FakeConnection([(1, 'tech', True, 8), (2, 'tech', False, 8), (3, 'legal', False, None)])
+
+    caps = load_caps(connection, {('tech', True): 4, ('tech', False): 10})
+
+    assert caps == {1: 4, 2: 8} 
\ No newline at end of file
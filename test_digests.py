@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+import fakeredis
+import pytest
+from ..services.digests import CANCELLED, CONFIRMED, HOLD, DigestBuffer
+from ..services.notifications import (CONSULTANT_CANCELLED, CONSULTANT_CONFIRMED, CONSULTANT_DIGEST,
+                                      NotificationQueue, TemplateRegistry)
+from ..services.reminders import unix_time
+
+NOW = datetime(2030, 1, 7, 9, 0)
+WINDOW = 600
+
+@pytest.fixture
+def queue():
+    return NotificationQueue(fakeredis.FakeRedis(decode_responses=True))
+
+@pytest.fixture
+def digests(queue):
+    return DigestBuffer(queue.redis, queue, window=WINDOW)
+
+def later(**kwargs):
+    return NOW + timedelta(**kwargs)
+
+def test_updates_in_a_window_become_one_digest(digests, queue):
+    digests.add(1, HOLD, later(days=2, hours=1), now=NOW)
+    digests.add(1, CONFIRMED, later(days=2, hours=1), now=later(minutes=3))
+    digests.add(1, CONFIRMED, later(days=3), now=later(minutes=5))
+    digests.add(1, CANCELLED, later(days=4), now=later(minutes=9))
+
+    assert digests.flush(now=later(minutes=9)) == (0, 0)  # The window opened by the first update is still open
+    assert digests.flush(now=later(minutes=10)) == (1, 4)
+
+    [event] = queue.claim('test', timeout=0)
+    assert event['type'] == CONSULTANT_DIGEST and event['user_id'] == 1
+    assert event['context']['summary'] == ('- 2030-01-09T10:00:00: confirmed\n'
+                                           '- 2030-01-10T09:00:00: confirmed\n'
+                                           '- 2030-01-11T09:00:00: cancelled')
+    rendered = TemplateRegistry().render(event)
+    assert rendered['email'][0] == '3 updates to your schedule'
+    assert rendered['sms'][1] == 'ClimbUp: 2 new bookings, 1 cancellations. Details by email.'
+    assert queue.redis.zcard(digests.due_key) == 0
+
+def test_single_slot_keeps_its_own_template(digests, queue):
+    digests.add(1, CONFIRMED, later(days=2), now=NOW)
+    digests.add(2, HOLD, later(days=2), now=NOW)
+    digests.add(2, CONFIRMED, later(days=2), now=NOW)
+
+    assert digests.flush(now=later(minutes=10)) == (2, 3)
+    assert sorted(event['type'] for event in queue.claim('test', timeout=0)) == [CONSULTANT_CONFIRMED] * 2
+
+def test_same_day_cancellations_bypass_the_window(digests, queue):
+    assert not digests.add(1, CANCELLED, later(hours=6), now=NOW, event_id='consultant_cancelled:7')
+    assert not digests.add(1, CANCELLED, later(hours=6), now=NOW, event_id='consultant_cancelled:7')
+    assert digests.add(1, CANCELLED, later(days=2), now=NOW)
+
+    [event] = queue.claim('test', timeout=0)
+    assert event['type'] == CONSULTANT_CANCELLED and event['id'] == 'consultant_cancelled:7'
+    assert queue.redis.llen(digests.buffer_key(1)) == 1
+
+def test_same_day_cancellation_drops_the_buffered_hold(digests, queue):
+    digests.add(1, HOLD, later(hours=8), now=NOW)
+    digests.add(1, CONFIRMED, later(days=2), now=NOW)
+
+    assert not digests.add(1, CANCELLED, later(hours=8), now=later(minutes=5))
+
+    assert [event['type'] for event in queue.claim('test', timeout=0)] == [CONSULTANT_CANCELLED]
+    assert digests.flush(now=later(minutes=10)) == (1, 1)
+    [event] = queue.claim('test', timeout=0)
+    assert event['type'] == CONSULTANT_CONFIRMED
+    assert event['context'] == {'start_time': later(days=2).isoformat()}
+
+def test_updates_during_a_flush_start_the_next_window(digests, queue, monkeypatch):
+    digests.add(1, CONFIRMED, later(days=2), now=NOW)
+    enqueue_many = queue.enqueue_many
+
+    def enqueue_during_flush(events):
+        digests.add(1, CONFIRMED, later(days=3), now=later(minutes=10))
+        return enqueue_many(events)
+
+    monkeypatch.setattr(queue, 'enqueue_many', enqueue_during_flush)
+    assert digests.flush(now=later(minutes=10)) == (1, 1)
+    monkeypatch.undo()
+
+    assert queue.redis.zscore(digests.due_key, '1') == unix_time(later(minutes=10)) + WINDOW
+    assert digests.flush(now=later(minutes=20)) == (1, 1)
+    assert len(queue.claim('test', timeout=0)) == 2
+
+def test_interrupted_flush_is_taken_again_without_duplicates(digests, queue, monkeypatch):
+    digests.add(1, CONFIRMED, later(days=2), now=NOW)
+    digests.add(1, CONFIRMED, later(days=3), now=NOW)
+    enqueue_many = queue.enqueue_many
+
+    def enqueue_and_die(events):
+        enqueue_many(events)
+        raise ConnectionError("Flush died before completing")
+
+    monkeypatch.setattr(queue, 'enqueue_many', enqueue_and_die)
+    with pytest.raises(ConnectionError):
+        digests.flush(now=later(minutes=10))
+    monkeypatch.undo()
+
+    assert digests.flush(now=later(minutes=10)) == (0, 0)  # Still leased
+    assert digests.flush(now=later(minutes=12)) == (1, 2)
+    assert len(queue.claim('test', timeout=0)) == 1 
\ No newline at end of file
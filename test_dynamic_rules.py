@@ -0,0 +1,83 @@
+from datetime import datetime
+import mongomock
+from ..rule_engine.dynamic_rules import CompiledRules, DynamicRuleEngine
+
+MONDAY_10AM = datetime(2023, 1, 2, 10, 0)
+
+RULES = [
+    {"name": "monday_peak", "priority": 1,
+     "when": {"days": ["Monday"], "start": "09:00", "end": "11:00"},
+     "then": {"multiplier": 1.2}},
+    {"name": "tech_premium", "priority": 5,
+     "when": {"specializations": ["tech"], "is_preferred": True},
+     "then": {"multiplier": 1.5, "hold_time": 1200}},
+    {"name": "long_sessions", "priority": 0,
+     "when": {"min_duration": 121},
+     "then": {"reject": "Sessions are limited to 2 hours"}},
+    {"name": "overnight", "when": {"start": "22:00", "end": "06:00"},
+     "then": {"reject": "Closed overnight"}}
+]
+
+def test_highest_priority_match_sets_each_effect():
+    rules = CompiledRules(RULES)
+
+    decision = rules.evaluate({"start_time": MONDAY_10AM, "duration": 60,
+                               "specialization": "tech", "is_preferred": True})
+    assert decision.multiplier == 1.5
+    assert decision.hold_time == 1200
+    assert decision.matched == ("tech_premium", "monday_peak")
+    assert decision.allowed
+
+    decision = rules.evaluate({"start_time": MONDAY_10AM, "duration": 60, "specialization": "legal"})
+    assert decision.multiplier == 1.2 and decision.hold_time is None
+
+def test_windows_days_and_predicates():
+    rules = CompiledRules(RULES)
+
+    assert rules.evaluate({"start_time": datetime(2023, 1, 2, 11, 1)}).multiplier == 1.0
+    assert rules.evaluate({"start_time": datetime(2023, 1, 3, 10, 0)}).multiplier == 1.0
+    assert rules.evaluate({"start_time": datetime(2023, 1, 3, 23, 30)}).reject == "Closed overnight"
+    assert rules.evaluate({"start_time": datetime(2023, 1, 3, 5, 59)}).reject == "Closed overnight"
+    assert rules.evaluate({"start_time": MONDAY_10AM, "duration": 180}).reject.startswith("Sessions")
+
+def test_batch_matches_single_evaluation():
+    rules = CompiledRules(RULES)
+    bookings = [{"start_time": datetime(2023, 1, 2, hour, minute), "duration": 60,
+                 "specialization": "tech", "is_preferred": hour % 2 == 0}
+                for hour in range(24) for minute in (0, 30)]
+
+    assert ([decision.to_dict() for decision in rules.evaluate_many(bookings)] ==
+            [rules.evaluate(booking).to_dict() for booking in bookings])
+
+def test_malformed_and_inactive_rules_are_skipped():
+    rules = CompiledRules([
+        {"name": "no_effect", "when": {}},
+        {"name": "bad_time", "when": {"start": "25:00"}, "then": {"multiplier": 2}},
+        {"name": "inactive", "active": False, "then": {"multiplier": 3}},
+        RULES[0]
+    ])
+
+    assert [rule.name for rule in rules.rules] == ["monday_peak"]
+
+def test_unmatched_rules_do_not_reach_the_bucket():
+    rules = CompiledRules(RULES + [
+        {"name": f"sunday_{i}", "when": {"days": ["Sunday"], "specializations": [f"s{i}"]},
+         "then": {"multiplier": 2}} for i in range(500)
+    ])
+
+    bucket = rules.table[MONDAY_10AM.weekday()][10 * 60]
+    assert [rule.name for rule in bucket[None]] == ["monday_peak", "long_sessions"]
+
+def test_engine_reloads_when_version_changes():
+    engine = DynamicRuleEngine(mongomock.MongoClient().climbup_rules, check_interval=0)
+    booking = {"start_time": MONDAY_10AM}
+    assert engine.evaluate(booking).multiplier == 1.0
+
+    engine.add_rule(dict(RULES[0]))
+    assert engine.evaluate(booking).multiplier == 1.2
+    compiled = engine.ruleset()
+    assert engine.ruleset() is compiled
+
+    engine.remove_rule("monday_peak")
+    assert engine.evaluate(booking).multiplier == 1.0
+    assert engine.ruleset().version == 2 
\ No newline at end of file
@@ -0,0 +1,56 @@
+from collections import defaultdict
+from werkzeug.security import check_password_hash
+from ..generate_dataset import (
+    DatasetSpec, _password_hash, booking_rows, consultant_rows, rule_documents, user_rows
+)
+
+def _spec(**overrides):
+    sizes = {'consultants': 450, 'clients': 1000, 'appointments': 9001, 'days': 60}
+    sizes.update(overrides)
+    return DatasetSpec(**sizes)
+
+def _bookings(spec):
+    rows = defaultdict(list)
+    for chunk in range(3):
+        for table, row in booking_rows(spec, chunk):
+            rows[table].append(row)
+    return rows
+
+def test_same_seed_same_data():
+    first, second = _spec(), _spec()
+
+    assert list(user_rows(first, 0, 'hash')) == list(user_rows(second, 0, 'hash'))
+    assert list(consultant_rows(first, 1)) == list(consultant_rows(second, 1))
+    assert _bookings(first) == _bookings(second)
+    assert list(rule_documents(first)) == list(rule_documents(second))
+    assert _bookings(first) != _bookings(_spec(seed=7))
+
+def test_appointment_ids_unique_and_dense():
+    spec = _spec()
+    ids = [row[0] for row in _bookings(spec)['appointments']]
+
+    assert len(ids) == spec.appointments
+    assert sorted(ids) == list(range(1, spec.appointments + 1))
+
+def test_consultant_appointments_do_not_overlap():
+    by_consultant = defaultdict(list)
+    for row in _bookings(_spec())['appointments']:
+        by_consultant[row[2]].append((row[3], row[4]))
+
+    for slots in by_consultant.values():
+        slots.sort()
+        assert all(end <= next_start for (_, end), (next_start, _) in zip(slots, slots[1:]))
+
+def test_holds_and_payments_reference_appointments():
+    rows = _bookings(_spec())
+    appointment_ids = {row[0] for row in rows['appointments']}
+
+    assert rows['slot_holds'] and rows['payments']
+    assert all(row[1] in appointment_ids for row in rows['slot_holds'] if row[1] is not None)
+    assert all(row[1] in appointment_ids for row in rows['payments'])
+
+def test_generated_password_hash_verifies():
+    spec = _spec()
+
+    assert _password_hash(spec) == _password_hash(_spec())
+    assert check_password_hash(_password_hash(spec), spec.password) 
\ No newline at end of file
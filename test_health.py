@@ -0,0 +1,57 @@
+import threading
+import time
+from ..services.health import HealthMonitor
+
+def _ok():
+    pass
+
+def _fail():
+    raise ConnectionError("connection refused")
+
+def test_check_reports_each_service():
+    monitor = HealthMonitor({'postgresql': _ok, 'redis': _fail}, timeout=1.0)
+
+    report = monitor.check()
+
+    assert report['status'] == 'degraded'
+    assert report['services']['postgresql']['status'] == 'healthy'
+    assert report['services']['redis']['status'] == 'unhealthy'
+    assert 'connection refused' in report['services']['redis']['error']
+
+def test_hung_probe_times_out_without_blocking_others():
+    release = threading.Event()
+    monitor = HealthMonitor({'mongodb': release.wait, 'redis': _ok}, timeout=0.2)
+
+    start = time.perf_counter()
+    report = monitor.check()
+    elapsed = time.perf_counter() - start
+    release.set()
+
+    assert elapsed < 1.0
+    assert report['services']['mongodb']['status'] == 'unhealthy'
+    assert 'timed out' in report['services']['mongodb']['error']
+    assert report['services']['redis']['status'] == 'healthy'
+
+def test_report_is_cached_within_ttl():
+    calls = []
+    monitor = HealthMonitor({'redis': lambda: calls.append(1)}, cache_ttl=60)
+
+    first = monitor.get_report()
+    second = monitor.get_report()
+
+    assert first is second
+    assert len(calls) == 1
+
+def test_stale_report_is_served_while_refreshing():
+    calls = []
+    monitor = HealthMonitor({'redis': lambda: calls.append(1)}, cache_ttl=0)
+
+    first = monitor.get_report()
+    second = monitor.get_report()
+
+    # The stale report is returned immediately; the refresh runs in the background
+    assert second is first
+    deadline = time.time() + 1.0
+    while len(calls) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 2 
\ No newline at end of file
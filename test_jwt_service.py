@@ -0,0 +1,52 @@
+import time
+import pytest
+from flask import Flask
+from flask_jwt_extended import create_access_token, decode_token
+from ..services.jwt_service import RevocationList, init_jwt
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret'
+    return app
+
+def test_verified_claims_are_cached(app):
+    jwt = init_jwt(app)
+    
+    with app.app_context():
+        token = create_access_token(identity='user-1')
+        first = decode_token(token)
+        second = decode_token(token)
+    
+    assert first == second
+    assert len(jwt._verified) == 1
+
+def test_cached_claims_are_copies(app):
+    init_jwt(app)
+    
+    with app.app_context():
+        token = create_access_token(identity='user-1')
+        decode_token(token)['sub'] = 'someone-else'
+        
+        assert decode_token(token)['sub'] == 'user-1'
+
+def test_stale_cache_entry_is_verified_again(app):
+    jwt = init_jwt(app)
+    
+    with app.app_context():
+        token = create_access_token(identity='user-1')
+        decode_token(token)
+        digest = next(iter(jwt._verified))
+        jwt._verified[digest] = (0, {'sub': 'stale'})
+        
+        assert decode_token(token)['sub'] == 'user-1'
+
+def test_revocation_applies_locally_without_redis():
+    revocations = RevocationList(redis_url='redis://localhost:1/0', resync_interval=3600)
+    
+    revocations.revoke('revoked-jti', time.time() + 60)
+    revocations.revoke('expired-jti', time.time() - 60)
+    
+    assert revocations.is_revoked('revoked-jti')
+    assert not revocations.is_revoked('expired-jti')
+    assert not revocations.is_revoked('other-jti') 
\ No newline at end of file
@@ -0,0 +1,54 @@
+from datetime import datetime
+import mongomock
+from ..services.lazy_client import LazyClient
+from ..models.mongodb.rules import RuleEngine
+
+class Client:
+    def __init__(self):
+        self.value = 'connected'
+
+def test_builds_once_on_first_use():
+    built = []
+    client = LazyClient(lambda: built.append(Client()) or built[-1], 'test')
+
+    assert not client.started and built == []
+    assert client.value == 'connected'
+    assert client.value == 'connected'
+    assert len(built) == 1
+
+def test_rebuilds_after_fork():
+    built = []
+    client = LazyClient(lambda: built.append(Client()) or built[-1], 'test')
+    client.resolve()
+    client._pid = -1  # as seen from a forked child
+
+    assert client.resolve() is built[1]
+
+def test_client_methods_are_not_shadowed():
+    class Store:
+        def get(self, key):
+            return key.upper()
+
+    assert LazyClient(Store, 'test').get('hits') == 'HITS'
+
+def test_override():
+    client = LazyClient(lambda: Client(), 'test')
+    fake = object()
+    client.override(fake)
+
+    assert client.resolve() is fake
+
+def test_warm_cache_matches_lookups():
+    engine = RuleEngine('mongodb://localhost:27017', client=mongomock.MongoClient())
+    engine.add_peak_hour_rule('Monday', '9:0-11:0', 1.5)
+    engine.add_peak_hour_rule('Monday', '9:15-11:0', 2.0)
+    engine.add_consultant_rule('tech', True, 1200, 8)
+    engine.warm_cache()
+    engine.peak_hours.drop()
+    engine.consultant_rules.drop()
+
+    # Served from the warmed cache, not the dropped collections
+    assert engine.get_peak_hour_multiplier('Monday', datetime(2024, 1, 1, 9, 0)) == 1.5
+    assert engine.get_peak_hour_multiplier('Monday', datetime(2024, 1, 1, 9, 1)) == 2.0
+    assert engine.get_peak_hour_multiplier('Monday', datetime(2024, 1, 1, 12, 0)) == 1.0
+    assert engine.get_consultant_hold_time('tech', True) == 1200 
\ No newline at end of file
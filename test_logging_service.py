@@ -0,0 +1,91 @@
+import logging
+from types import SimpleNamespace
+import pytest
+from ..services import logging_service as logging_service_module
+from ..services.logging_service import LoggingService, configure_logging
+
+LOGGER = 'climbup.test_logging_service'
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(logging_service_module, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+@pytest.fixture
+def service(caplog):
+    caplog.set_level(logging.INFO, logger=LOGGER)
+    return LoggingService(LOGGER)
+
+@pytest.fixture
+def root_logger(monkeypatch):
+    # configure_logging replaces the root handlers, caplog's included
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    monkeypatch.setattr(logging_service_module, '_configured', False)
+    yield root
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+def messages(caplog):
+    return [record.getMessage() for record in caplog.records if record.name == LOGGER]
+
+def test_sampling_drops_calls_above_the_rate(service, caplog, monkeypatch):
+    draws = iter([0.2, 0.7, 0.49])
+    monkeypatch.setattr(logging_service_module.random, 'random', lambda: next(draws))
+
+    for slot in range(3):
+        service.log_info('Checked slot %d', slot, sample_rate=0.5)
+
+    assert messages(caplog) == ['Checked slot 0', 'Checked slot 2']
+
+def test_rate_limit_applies_per_call_site(service, caplog, clock):
+    for slot in range(4):
+        service.log_info('Checked slot %d', slot, rate_limit=2)
+        service.log_info('Held slot %d', slot, rate_limit=3)
+
+    assert messages(caplog) == ['Checked slot 0', 'Held slot 0', 'Checked slot 1', 'Held slot 1',
+                                'Held slot 2']
+
+def test_suppressed_messages_summarized_when_window_ends(service, caplog, clock):
+    for slot in range(5):
+        service.log_info('Checked slot %d', slot, rate_limit=2, interval=10)
+    clock.now += 9.9
+    service.log_info('Checked slot %d', 5, rate_limit=2, interval=10)
+    clock.now += 0.1
+    service.log_info('Checked slot %d', 6, rate_limit=2, interval=10)
+
+    assert messages(caplog) == [
+        'Checked slot 0', 'Checked slot 1',
+        "Suppressed 4 messages like 'Checked slot %d' in the last 10.0s",
+        'Checked slot 6'
+    ]
+    assert caplog.records[-2].levelno == logging.WARNING
+
+def test_no_summary_without_suppression(service, caplog, clock):
+    service.log_info('Checked slot %d', 0, rate_limit=2, interval=10)
+    clock.now += 10
+    service.log_info('Checked slot %d', 1, rate_limit=2, interval=10)
+
+    assert messages(caplog) == ['Checked slot 0', 'Checked slot 1']
+
+def test_configure_logging_runs_once_unless_forced(root_logger, tmp_path):
+    log_file = tmp_path / 'logs' / 'app.log'
+    configure_logging(level='WARNING', log_file=str(log_file))
+    handlers = list(root_logger.handlers)
+
+    configure_logging(level='DEBUG')
+
+    assert root_logger.handlers == handlers
+    assert root_logger.level == logging.WARNING
+    assert log_file.parent.is_dir()
+
+    configure_logging(level='DEBUG', force=True)
+
+    assert len(root_logger.handlers) == 1
+    assert root_logger.handlers[0] not in handlers
+    assert root_logger.level == logging.DEBUG 
\ No newline at end of file
@@ -0,0 +1,109 @@
+from datetime import datetime
+from types import SimpleNamespace
+import fakeredis
+import mongomock
+import pytest
+from flask import Blueprint, Flask, jsonify
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from ..models.mongodb.rules import RuleEngine
+from ..services.instrumentation import InstrumentedRedis, MongoCommandListener
+from ..services.metrics import init_metrics
+
+MONDAY_9AM = datetime(2023, 1, 2, 9, 0)
+
+class FakeInstrumentedRedis(InstrumentedRedis, fakeredis.FakeRedis):
+    pass
+
+def sample(name, **labels):
+    # The registry is process-wide, so tests compare before and after
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def datastore_calls(store, operation):
+    return (sample('datastore_call_duration_seconds_count', store=store, operation=operation),
+            sample('datastore_call_duration_seconds_sum', store=store, operation=operation))
+
+def cache_lookups(cache):
+    return (sample('rule_cache_lookups_total', cache=cache, result='hit'),
+            sample('rule_cache_lookups_total', cache=cache, result='miss'))
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    slots_bp = Blueprint('slots', __name__)
+
+    @slots_bp.route('/slots/<int:consultant_id>')
+    def slots(consultant_id):
+        return jsonify({'slots': []})
+
+    app.register_blueprint(slots_bp, url_prefix='/api')
+    init_metrics(app)
+    return app.test_client()
+
+@pytest.fixture
+def engine():
+    return RuleEngine('mongodb://localhost:27017', client=mongomock.MongoClient())
+
+def test_metrics_endpoint_labels_requests_by_blueprint_and_route(client):
+    assert client.get('/api/slots/7').status_code == 200
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert ('http_request_duration_seconds_count{blueprint="slots",method="GET",'
+            'route="/api/slots/<int:consultant_id>",status="200"}') in response.get_data(as_text=True)
+
+def test_postgres_calls_recorded(client):
+    engine = create_engine('sqlite://')
+    before = datastore_calls('postgresql', 'SELECT')
+
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+
+    count, total = datastore_calls('postgresql', 'SELECT')
+    assert count == before[0] + 1
+    assert total > before[1]
+
+def test_mongo_calls_recorded(client, engine):
+    before = datastore_calls('mongodb', 'find')
+
+    # mongomock does not publish pymongo's command events, so the listener
+    # is handed the event pymongo would have sent for this find
+    engine.peak_hours.find_one({'day': 'Monday'})
+    MongoCommandListener().succeeded(SimpleNamespace(
+        command_name='find', database_name='climbup_rules', duration_micros=1500))
+
+    count, total = datastore_calls('mongodb', 'find')
+    assert count == before[0] + 1
+    assert total == pytest.approx(before[1] + 0.0015)
+
+def test_redis_calls_recorded(client):
+    redis_client = FakeInstrumentedRedis()
+    before = datastore_calls('redis', 'SET')
+
+    redis_client.set('slot_hold:1', 'user:1')
+
+    count, total = datastore_calls('redis', 'SET')
+    assert count == before[0] + 1
+    assert total > before[1]
+    assert redis_client.get('slot_hold:1') == b'user:1'
+
+def test_rule_cache_hits_and_misses_counted(engine):
+    engine.add_peak_hour_rule('Monday', '9:0-11:0', 1.5)
+    hits, misses = cache_lookups('peak_hours')
+
+    assert engine.get_peak_hour_multiplier('Monday', MONDAY_9AM) == 1.5
+    assert engine.get_peak_hour_multiplier('Monday', MONDAY_9AM) == 1.5
+
+    assert cache_lookups('peak_hours') == (hits + 1, misses + 1)
+
+def test_rule_writes_clear_the_cache(engine):
+    engine.add_peak_hour_rule('Monday', '9:0-11:0', 1.5)
+    assert engine.get_peak_hour_multiplier('Monday', MONDAY_9AM) == 1.5
+    engine.add_payment_rule('card', 10, ['email'])
+    hits, misses = cache_lookups('peak_hours')
+
+    assert engine.get_peak_hour_multiplier('Monday', MONDAY_9AM) == 1.5
+
+    assert cache_lookups('peak_hours') == (hits, misses + 1) 
\ No newline at end of file
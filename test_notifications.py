@@ -0,0 +1,195 @@
+import json
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+import fakeredis
+import pytest
+from ..services.email_service import SMTPPool
+from ..services.notifications import (BOOKING_CONFIRMED, HOLD_EXPIRING, MAX_ATTEMPTS, NotificationQueue,
+                                      NotificationWorker, TemplateRegistry)
+from ..services.sms_service import FakeSMSTransport, load_transport
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Local SMTP server that accepts everything and keeps the messages"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.reject = set()  # Recipients refused at RCPT TO
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 sink ready')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 sink')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip().strip('<>')
+                if address in self.server.reject:
+                    self.reply('550 no such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 ok')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                data = b''
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk == b'.\r\n':
+                        break
+                    data += chunk
+                self.server.messages.append(message_from_bytes(data))
+                recipients = []
+                self.reply('250 queued')
+            elif command == 'RSET':
+                recipients = []
+                self.reply('250 ok')
+            else:
+                self.reply('250 ok')
+
+@pytest.fixture
+def smtp():
+    sink = SMTPSink()
+    thread = threading.Thread(target=sink.serve_forever, daemon=True)
+    thread.start()
+    yield sink
+    sink.shutdown()
+    sink.server_close()
+
+@pytest.fixture
+def queue():
+    return NotificationQueue(fakeredis.FakeRedis(decode_responses=True))
+
+@pytest.fixture
+def sms():
+    return FakeSMSTransport()
+
+@pytest.fixture
+def worker(queue, smtp, sms):
+    contacts_calls = []
+
+    def contacts(user_ids):
+        contacts_calls.append(sorted(user_ids))
+        return {user_id: {'email': f'user{user_id}@example.com'} for user_id in user_ids}
+
+    worker = NotificationWorker(queue, TemplateRegistry(), SMTPPool(*smtp.server_address), sms,
+                                'ClimbUp <no-reply@example.com>', contacts=contacts, worker='test')
+    worker.contacts_calls = contacts_calls
+    return worker
+
+def test_batch_goes_out_over_one_smtp_connection(queue, worker, smtp, sms):
+    for user_id in range(1, 6):
+        queue.enqueue(BOOKING_CONFIRMED, user_id, {'start_time': '2030-01-07T10:00'})
+    queue.enqueue(BOOKING_CONFIRMED, 6, {'start_time': '2030-01-07T11:00'}, phone='+15550100')
+
+    assert worker.process_batch(timeout=0) == 6
+    assert worker.process_batch(timeout=0) == 0
+
+    assert sorted(message['To'] for message in smtp.messages) == [f'user{i}@example.com' for i in range(1, 7)]
+    assert smtp.connections == 1
+    assert worker.contacts_calls == [[1, 2, 3, 4, 5, 6]]
+    assert sms.sent == [('+15550100', 'ClimbUp: your appointment on 2030-01-07T11:00 is confirmed.')]
+
+def test_duplicate_event_ids_are_delivered_once(queue, worker, smtp):
+    assert queue.enqueue(BOOKING_CONFIRMED, 1, {'start_time': 'x'}, event_id='booking_confirmed:1')
+    assert not queue.enqueue(BOOKING_CONFIRMED, 1, {'start_time': 'x'}, event_id='booking_confirmed:1')
+    worker.process_batch(timeout=0)
+    assert not queue.enqueue(BOOKING_CONFIRMED, 1, {'start_time': 'x'}, event_id='booking_confirmed:1')
+
+    assert len(smtp.messages) == 1
+
+def test_failed_channel_is_retried_with_backoff_alone(queue, worker, smtp, sms):
+    queue.enqueue(BOOKING_CONFIRMED, 1, {'start_time': 'x'}, phone='+15550100', event_id='e1')
+    sms.fail_next()
+
+    worker.process_batch(timeout=0)
+
+    assert len(smtp.messages) == 1 and sms.sent == []
+    due = queue.redis.zscore(queue.delayed_key, 'e1')
+    assert 30 <= due - time.time() <= 34
+    queue.redis.zadd(queue.delayed_key, {'e1': 0})
+
+    worker.process_batch(timeout=0)
+
+    assert len(smtp.messages) == 1 and len(sms.sent) == 1
+    assert queue.redis.hget(queue.events_key, 'e1') is None
+
+def test_failed_contact_lookup_is_retried(queue, worker, smtp, sms):
+    lookup = worker.contacts
+    worker.contacts = lambda user_ids: 1 / 0
+    queue.enqueue(BOOKING_CONFIRMED, 1, {'start_time': 'x'}, phone='+15550100', event_id='e1')
+
+    worker.process_batch(timeout=0)
+
+    assert smtp.messages == [] and len(sms.sent) == 1
+    assert not queue.redis.exists(queue.sent_key('e1'))
+    assert 'contact lookup failed' in json.loads(queue.redis.hget(queue.events_key, 'e1'))['last_error']
+    queue.redis.zadd(queue.delayed_key, {'e1': 0})
+    worker.contacts = lookup
+
+    worker.process_batch(timeout=0)
+
+    assert [message['To'] for message in smtp.messages] == ['user1@example.com'] and len(sms.sent) == 1
+    assert queue.redis.exists(queue.sent_key('e1'))
+
+def test_undeliverable_events_end_in_dead_letter(queue, worker, smtp):
+    smtp.reject.add('user1@example.com')
+    queue.enqueue(BOOKING_CONFIRMED, 1, {'start_time': 'x'}, event_id='e1')
+    queue.enqueue('unknown_template', 2, {}, event_id='e2')
+    queue.enqueue(BOOKING_CONFIRMED, 3, {'start_time': 'x'}, event_id='e3')
+
+    for _ in range(MAX_ATTEMPTS):
+        worker.process_batch(timeout=0)
+        for event_id in queue.redis.zrange(queue.delayed_key, 0, -1):
+            queue.redis.zadd(queue.delayed_key, {event_id: 0})
+
+    assert sorted(queue.redis.lrange(queue.dead_key, 0, -1)) == ['e1', 'e2']
+    assert [message['To'] for message in smtp.messages] == ['user3@example.com']
+
+def test_delayed_events_wait_and_can_be_cancelled(queue, worker, smtp):
+    context = {'start_time': 'x', 'expires_at': 'y'}
+    queue.enqueue(HOLD_EXPIRING, 1, context, event_id='hold_expiring:1', deliver_at=time.time() + 60)
+    queue.enqueue(HOLD_EXPIRING, 2, context, event_id='hold_expiring:2', deliver_at=time.time() + 60)
+
+    assert worker.process_batch(timeout=0) == 0
+    assert queue.cancel('hold_expiring:1')
+    queue.redis.zadd(queue.delayed_key, {'hold_expiring:2': 0})
+
+    assert worker.process_batch(timeout=0) == 1
+    assert [message['To'] for message in smtp.messages] == ['user2@example.com']
+
+def test_unfinished_batch_is_recovered(queue, worker, smtp):
+    queue.enqueue(BOOKING_CONFIRMED, 1, {'start_time': 'x'})
+    queue.claim('test', timeout=0)  # A previous run claimed it and died
+
+    assert queue.recover('test') == 1
+    assert worker.process_batch(timeout=0) == 1
+    assert len(smtp.messages) == 1
+
+def test_templates_compile_once_per_version():
+    registry = TemplateRegistry()
+    event = {'type': BOOKING_CONFIRMED, 'context': {'start_time': 'x'}}
+
+    assert registry.update([{'name': BOOKING_CONFIRMED, 'version': 1, 'email': 'old'}]) == 0
+    assert registry.update([{'name': BOOKING_CONFIRMED, 'version': 2, 'subject': 'Hi', 'email': 'At $start_time'}]) == 1
+    assert registry.render(event) == {'email': ('Hi', 'At x')}
+
+def test_load_transport():
+    assert isinstance(load_transport('fake'), FakeSMSTransport)
+    assert isinstance(load_transport('backend.services.sms_service:FakeSMSTransport'), FakeSMSTransport)
+    with pytest.raises(ValueError):
+        load_transport('nowhere:Transport') 
\ No newline at end of file
@@ -0,0 +1,47 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from werkzeug.security import generate_password_hash
+from ..services.password_hasher import HashingPoolSaturated, PasswordHasher
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_pending=1, queue_timeout=0.01)
+    yield hasher
+    hasher.shutdown()
+
+def test_hash_and_verify(hasher):
+    password_hash = hasher.hash_password('testpass123')
+
+    assert hasher.verify_password(password_hash, 'testpass123')
+    assert not hasher.verify_password(password_hash, 'wrongpass')
+
+def test_unknown_user_runs_dummy_verification(hasher):
+    assert not hasher.verify_password(None, 'testpass123')
+    assert hasher._dummy_hash is not None
+
+def test_saturated_pool_fails_fast(hasher):
+    password_hash = generate_password_hash('testpass123')
+    hasher._slots.acquire()
+    try:
+        with pytest.raises(HashingPoolSaturated):
+            hasher.verify_password(password_hash, 'testpass123')
+    finally:
+        hasher._slots.release()
+
+def test_timed_out_hash_keeps_its_slot_until_done(hasher, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(hasher, '_get_executor', lambda: executor)
+    monkeypatch.setattr(hasher, 'hash_timeout', 0.01)
+    finished = threading.Event()
+
+    with pytest.raises(HashingPoolSaturated):
+        hasher._run(finished.wait, 5)
+    # The abandoned hash still holds the only slot
+    with pytest.raises(HashingPoolSaturated):
+        hasher.hash_password('testpass123')
+
+    finished.set()
+    executor.shutdown(wait=True)
+    assert hasher._slots.acquire(timeout=1)
+    hasher._slots.release() 
\ No newline at end of file
@@ -0,0 +1,55 @@
+import pytest
+from flask import Flask, jsonify
+from ..services.instrumentation import notify_datastore_call
+from ..services.profiler import QueryRecorder, RequestProfiler, make_profile_token
+
+def test_query_recorder_counts_and_keeps_slowest():
+    with QueryRecorder(slowest=2) as recorder:
+        notify_datastore_call('postgresql', 'SELECT', 'SELECT 1', 0.001)
+        notify_datastore_call('postgresql', 'SELECT', 'SELECT 2', 0.005)
+        notify_datastore_call('redis', 'GET', 'GET slot_hold:1', 0.003)
+    notify_datastore_call('postgresql', 'SELECT', 'SELECT 3', 0.010)
+
+    summary = recorder.summary()
+    assert recorder.count('postgresql') == 2
+    assert recorder.count() == 3
+    assert [s['statement'] for s in summary['slowest']] == ['SELECT 2', 'GET slot_hold:1']
+
+def test_query_budget_passes_within_budget(query_budget):
+    with query_budget(postgresql=1, total=2):
+        notify_datastore_call('postgresql', 'SELECT', 'SELECT 1', 0.001)
+        notify_datastore_call('mongodb', 'find', 'climbup.find', 0.001)
+
+def test_query_budget_fails_when_exceeded(query_budget):
+    with pytest.raises(AssertionError, match='Query budget exceeded'):
+        with query_budget(postgresql=1):
+            notify_datastore_call('postgresql', 'SELECT', 'SELECT 1', 0.001)
+            notify_datastore_call('postgresql', 'SELECT', 'SELECT 2', 0.001)
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    app = Flask(__name__)
+    app.config['PROFILER_SECRET'] = 'test-secret'
+    app.config['PROFILER_OUTPUT_DIR'] = str(tmp_path)
+    RequestProfiler(app)
+
+    @app.route('/slots')
+    def slots():
+        notify_datastore_call('postgresql', 'SELECT', 'SELECT * FROM appointments', 0.002)
+        return jsonify({'slots': []})
+
+    return app
+
+def test_profile_written_for_signed_token(profiled_app, tmp_path):
+    token = make_profile_token('test-secret')
+    response = profiled_app.test_client().get('/slots', headers={'X-Profile-Token': token})
+
+    report_name = response.headers['X-Profile-Report']
+    assert (tmp_path / f"{report_name}.json").exists()
+    assert (tmp_path / f"{report_name}.prof").exists()
+
+def test_profile_skipped_for_bad_token(profiled_app, tmp_path):
+    response = profiled_app.test_client().get('/slots', headers={'X-Profile-Token': 'forged'})
+
+    assert 'X-Profile-Report' not in response.headers
+    assert not list(tmp_path.iterdir()) 
\ No newline at end of file
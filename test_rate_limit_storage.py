@@ -0,0 +1,60 @@
+import time
+import pytest
+from limits import parse
+from limits.strategies import FixedWindowRateLimiter
+from ..services.rate_limit_storage import SOCKET_TIMEOUT, HybridRedisStorage
+
+UNREACHABLE = 'hybrid+redis://localhost:1/0'
+
+@pytest.fixture
+def storage():
+    return HybridRedisStorage(UNREACHABLE, sync_interval=3600, max_unsynced=1000)
+
+def test_limits_enforced_locally(storage):
+    limiter = FixedWindowRateLimiter(storage)
+    limit = parse('5 per minute')
+
+    admitted = [limiter.hit(limit, '127.0.0.1') for _ in range(7)]
+
+    assert admitted == [True] * 5 + [False] * 2
+    assert limiter.get_window_stats(limit, '127.0.0.1')[0] > time.time()
+
+def test_unsent_hits_survive_redis_outage():
+    storage = HybridRedisStorage(UNREACHABLE, sync_interval=3600, max_unsynced=2)
+
+    for _ in range(3):
+        storage.incr('LIMITER/key', 60)
+    storage.flush()
+
+    assert storage.get('LIMITER/key') == 3
+    assert storage._windows['LIMITER/key'].pending == 3
+    assert not storage._redis_available
+
+def test_window_expires(storage):
+    storage.incr('LIMITER/key', 60)
+    storage._windows['LIMITER/key'].expires_at = time.time() - 1
+
+    assert storage.get('LIMITER/key') == 0
+    assert storage.incr('LIMITER/key', 60) == 1
+
+def test_clear(storage):
+    storage.incr('LIMITER/key', 60, amount=4)
+    storage.clear('LIMITER/key')
+
+    assert storage.get('LIMITER/key') == 0
+
+def test_redis_calls_time_out_quickly(storage):
+    assert storage.redis_options['socket_timeout'] == SOCKET_TIMEOUT
+    assert storage.redis_options['socket_connect_timeout'] == SOCKET_TIMEOUT
+
+def test_inline_flush_skipped_while_flusher_runs():
+    storage = HybridRedisStorage(UNREACHABLE, sync_interval=3600, max_unsynced=1)
+    storage.incr('LIMITER/key', 60)  # Starts the flusher
+    storage._redis_available = True
+
+    with storage._flush_lock:
+        assert storage.incr('LIMITER/key', 60) == 2
+
+    # Left for the flusher: not sent, so Redis being down was not noticed either
+    assert storage._windows['LIMITER/key'].pending == 2
+    assert storage._redis_available 
\ No newline at end of file
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+import fakeredis
+import mongomock
+import pytest
+from ..models.mongodb.rules import RuleEngine
+from ..models.postgresql.models import db, Appointment, Consultant, SlotHold
+from ..services.daily_sessions import DailySessionCounter
+from ..services.recurring import Recurrence, book_series
+
+NOW = datetime(2030, 1, 1)
+MONDAY = datetime(2030, 1, 7, 10)
+
+@pytest.fixture
+def consultant(app):
+    db.session.add(Consultant(user_id=1, specialization='tech', hourly_rate=100, availability={}))
+    db.session.commit()
+
+@pytest.fixture
+def rule_engine():
+    engine = RuleEngine('mongodb://localhost:27017', client=mongomock.MongoClient())
+    engine.add_peak_hour_rule('Monday', '10:00-11:00', 1.5)
+    return engine
+
+def weekly(count=4, start=MONDAY):
+    return Recurrence(start, timedelta(hours=1), 'weekly', count=count)
+
+def test_recurrence_expansion():
+    assert [start.day for start, _ in weekly(3).occurrences()] == [7, 14, 21]
+    daily = Recurrence(MONDAY, timedelta(minutes=30), 'daily', interval=2, until=MONDAY + timedelta(days=5))
+    assert [start.day for start, _ in daily.occurrences()] == [7, 9, 11]
+    with pytest.raises(ValueError):
+        Recurrence(MONDAY, timedelta(hours=1), 'daily', until=MONDAY + timedelta(days=400)).occurrences()
+    with pytest.raises(ValueError):
+        Recurrence(MONDAY, timedelta(hours=1), 'monthly', count=2)
+
+def test_books_whole_series_in_one_round(consultant, rule_engine, query_budget):
+    # Consultant lock, range query and the insert; SQLite has no ordered
+    # multi-row RETURNING so it inserts the 4 rows one by one, where Postgres
+    # sends one statement
+    with query_budget(postgresql=2 + 4, mongodb=1):
+        result = book_series(rule_engine, 1, 100, weekly(), now=NOW)
+
+    assert result['booked'] == 4 and result['conflicts'] == 0
+    assert [occurrence['price'] for occurrence in result['occurrences']] == [150.0] * 4
+    assert result['total_price'] == 600.0
+    appointments = Appointment.query.order_by(Appointment.start_time).all()
+    assert [a.id for a in appointments] == [o['appointment_id'] for o in result['occurrences']]
+    assert all(a.status == 'pending' and a.is_peak_hour for a in appointments)
+
+def test_conflicts_are_reported_per_occurrence(consultant, rule_engine):
+    db.session.add(Appointment(consultant_id=1, client_id=200, start_time=MONDAY + timedelta(weeks=1, minutes=30),
+                               end_time=MONDAY + timedelta(weeks=1, minutes=90), status='confirmed',
+                               payment_status='pending'))
+    db.session.add(SlotHold(consultant_id=1, client_id=201, start_time=MONDAY + timedelta(weeks=3),
+                            end_time=MONDAY + timedelta(weeks=3, hours=1), status='active',
+                            expires_at=NOW + timedelta(days=60)))
+    db.session.add(SlotHold(consultant_id=1, client_id=202, start_time=MONDAY + timedelta(weeks=2),
+                            end_time=MONDAY + timedelta(weeks=2, hours=1), status='active',
+                            expires_at=NOW - timedelta(minutes=1)))
+    db.session.commit()
+
+    result = book_series(rule_engine, 1, 100, weekly(), now=NOW)
+
+    assert result['booked'] == 0 and result['conflicts'] == 2
+    assert [[c['type'] for c in o['conflicts']] for o in result['occurrences']] == [[], ['appointment'], [], ['hold']]
+    assert Appointment.query.filter_by(client_id=100).count() == 0
+
+    result = book_series(rule_engine, 1, 100, weekly(), skip_conflicts=True, now=NOW)
+
+    assert result['booked'] == 2 and result['total_price'] == 300.0
+    booked = Appointment.query.filter_by(client_id=100).order_by(Appointment.start_time).all()
+    assert [a.start_time for a in booked] == [MONDAY, MONDAY + timedelta(weeks=2)]
+
+def test_daily_cap_conflicts_and_reservations(consultant, rule_engine):
+    counter = DailySessionCounter(fakeredis.FakeRedis())
+    second_week = (MONDAY + timedelta(weeks=1)).date()
+    counter.rebuild({(1, second_week): 1}, {1: 1}, MONDAY.date(), days=28)
+
+    result = book_series(rule_engine, 1, 100, weekly(3), now=NOW, session_counter=counter)
+
+    assert result['booked'] == 0
+    assert result['occurrences'][1]['conflicts'] == [{'type': 'daily_cap', 'id': None}]
+    assert counter.count(1, MONDAY.date()) == 0
+
+    result = book_series(rule_engine, 1, 100, weekly(3), skip_conflicts=True, now=NOW, session_counter=counter)
+
+    assert result['booked'] == 2
+    assert [counter.count(1, (MONDAY + timedelta(weeks=week)).date()) for week in range(3)] == [1, 1, 1]
+
+def test_rule_lookup_failure_reserves_no_sessions(consultant, rule_engine, monkeypatch):
+    counter = DailySessionCounter(fakeredis.FakeRedis())
+    counter.rebuild({}, {1: 2}, MONDAY.date(), days=28)
+
+    def unavailable(times):
+        raise ConnectionError('rules unavailable')
+
+    monkeypatch.setattr(rule_engine, 'get_peak_hour_multipliers', unavailable)
+    with pytest.raises(ConnectionError):
+        book_series(rule_engine, 1, 100, weekly(3), now=NOW, session_counter=counter)
+
+    assert [counter.count(1, (MONDAY + timedelta(weeks=week)).date()) for week in range(3)] == [0, 0, 0]
+    assert Appointment.query.count() == 0
+
+def test_rejects_past_series_and_unknown_consultant(consultant, rule_engine):
+    with pytest.raises(ValueError):
+        book_series(rule_engine, 1, 100, weekly(start=NOW - timedelta(days=1)), now=NOW)
+    with pytest.raises(ValueError):
+        book_series(rule_engine, 99, 100, weekly(), now=NOW)
+
+def test_batch_peak_multipliers_match_single_lookups(rule_engine):
+    times = [MONDAY, MONDAY + timedelta(hours=1), MONDAY + timedelta(days=1)]
+    batch = rule_engine.get_peak_hour_multipliers(times)
+    rule_engine.clear_cache()
+    assert batch == [rule_engine.get_peak_hour_multiplier(t.strftime('%A'), t) for t in times] == [1.5, 1.0, 1.0] 
\ No newline at end of file
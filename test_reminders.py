@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+import fakeredis
+import pytest
+from ..services.notifications import APPOINTMENT_REMINDER, NotificationQueue
+from ..services.reminders import LEASE, ReminderScheduler, unix_time
+
+NOW = datetime(2030, 1, 7, 9, 0)
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+@pytest.fixture
+def queue(redis_client):
+    return NotificationQueue(redis_client)
+
+@pytest.fixture
+def scheduler(redis_client, queue):
+    return ReminderScheduler(redis_client, queue)
+
+def queued(queue):
+    return sorted(queue.redis.hkeys(queue.events_key))
+
+def test_reminders_are_due_24h_and_1h_before(scheduler):
+    start = NOW + timedelta(days=2)
+    assert scheduler.schedule(1, 10, start, now=NOW) == 2
+
+    assert scheduler.redis.zrange(scheduler.due_key, 0, -1, withscores=True) == [
+        ('1:24h', unix_time(start - timedelta(hours=24))), ('1:1h', unix_time(start - timedelta(hours=1)))]
+
+def test_drain_queues_only_due_reminders(scheduler, queue):
+    start = NOW + timedelta(hours=3)
+    scheduler.schedule(1, 10, start, now=NOW - timedelta(days=1))
+    scheduler.schedule(2, 20, NOW + timedelta(days=3), now=NOW)
+
+    assert scheduler.drain(now=NOW) == 1
+    assert scheduler.drain(now=NOW) == 0
+
+    event_id = f'reminder:1:24h:{int(unix_time(start))}'
+    assert queued(queue) == [event_id]
+    event = queue.claim('test', timeout=0)[0]
+    assert event['type'] == APPOINTMENT_REMINDER and event['user_id'] == 10
+    assert event['context'] == {'start_time': start.isoformat(), 'lead_time': '24 hours'}
+    assert scheduler.redis.zrange(scheduler.due_key, 0, -1) == ['1:1h', '2:24h', '2:1h']
+
+def test_drain_respects_limit(scheduler):
+    scheduler.schedule_many([(i, i, NOW + timedelta(minutes=30)) for i in range(5)], now=NOW - timedelta(hours=2))
+
+    assert scheduler.drain(now=NOW, limit=3) == 3
+    assert scheduler.drain(now=NOW, limit=3) == 2
+
+def test_redrained_reminders_are_delivered_once(scheduler, queue):
+    start = NOW + timedelta(minutes=30)
+    scheduler.schedule(1, 10, start, now=NOW - timedelta(days=1))
+    # A drain that queued the reminders but died before removing them
+    scheduler.drain(now=NOW)
+    scheduler.schedule(1, 10, start, now=NOW - timedelta(days=1))
+
+    assert scheduler.drain(now=NOW) == 2
+    assert len(queued(queue)) == 2
+
+def test_claimed_reminders_are_leased(scheduler):
+    scheduler.schedule(1, 10, NOW + timedelta(minutes=30), now=NOW - timedelta(days=1))
+    scheduler.notifications = None  # The drain fails after claiming
+
+    with pytest.raises(AttributeError):
+        scheduler.drain(now=NOW)
+    assert scheduler.redis.zscore(scheduler.due_key, '1:1h') == unix_time(NOW) + LEASE
+
+def test_reschedule_during_a_drain_keeps_the_new_reminders(scheduler, queue, monkeypatch):
+    scheduler.schedule(1, 10, NOW + timedelta(minutes=30), now=NOW - timedelta(days=1))
+    moved = NOW + timedelta(days=3)
+    enqueue_many = queue.enqueue_many
+
+    def reschedule_during_drain(events):
+        scheduler.schedule(1, 10, moved, now=NOW)
+        return enqueue_many(events)
+
+    monkeypatch.setattr(queue, 'enqueue_many', reschedule_during_drain)
+    assert scheduler.drain(now=NOW) == 2
+
+    assert scheduler.redis.zrange(scheduler.due_key, 0, -1, withscores=True) == [
+        ('1:24h', unix_time(moved - timedelta(hours=24))), ('1:1h', unix_time(moved - timedelta(hours=1)))]
+    assert sorted(scheduler.redis.hkeys(scheduler.context_key)) == ['1:1h', '1:24h']
+
+def test_cancel_and_reschedule(scheduler, queue):
+    scheduler.schedule(1, 10, NOW + timedelta(days=2), now=NOW)
+    scheduler.schedule(2, 20, NOW + timedelta(days=2), now=NOW)
+    scheduler.cancel(1)
+    # Moved to within the day: the 24-hour reminder is dropped
+    assert scheduler.schedule(2, 20, NOW + timedelta(hours=5), now=NOW) == 1
+
+    assert scheduler.redis.zrange(scheduler.due_key, 0, -1) == ['2:1h']
+    assert scheduler.redis.hkeys(scheduler.context_key) == ['2:1h']
+
+def test_rebuild_keeps_recently_missed_reminders(scheduler):
+    rows = [(1, 10, NOW + timedelta(minutes=50)),   # 1h reminder missed by 10 minutes
+            (2, 20, NOW + timedelta(minutes=30)),   # 1h reminder missed by 30 minutes
+            (3, 30, NOW + timedelta(days=1, hours=2))]
+
+    assert scheduler.rebuild(iter(rows), now=NOW, batch_size=2) == 3
+    assert sorted(scheduler.redis.zrange(scheduler.due_key, 0, -1)) == ['1:1h', '3:1h', '3:24h']
+
+def test_rebuild_from_aware_rows_does_not_resend(scheduler, queue):
+    start = NOW + timedelta(minutes=50)
+    scheduler.schedule(1, 10, start, now=NOW - timedelta(days=1))
+    assert scheduler.drain(now=NOW) == 2
+    queue.ack('test', queue.claim('test', timeout=0))
+
+    # Restarted: Postgres returns TIMESTAMPTZ values, so the rows are aware
+    scheduler.rebuild([(1, 10, start.replace(tzinfo=timezone.utc))], now=NOW)
+    assert scheduler.drain(now=NOW) == 1
+
+    assert queue.claim('test', timeout=0) == [] 
\ No newline at end of file
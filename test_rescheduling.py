@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+import fakeredis
+import pytest
+from flask_jwt_extended import JWTManager, create_access_token
+from ..api.gateway import bp
+from ..models.postgresql.models import db, Appointment, Consultant, SlotHold, User
+from ..services.daily_sessions import DailySessionCounter
+from ..services.rescheduling import reschedule
+
+NOW = datetime(2030, 1, 1)
+MONDAY = datetime(2030, 1, 7)
+HOURS = {str(day): {'start': 9, 'end': 12} for day in range(7)}
+
+@pytest.fixture
+def consultants(app):
+    db.session.add_all([
+        Consultant(user_id=1, specialization='tech', hourly_rate=100, availability=HOURS),
+        Consultant(user_id=2, specialization='tech', hourly_rate=100, availability=HOURS),
+        Consultant(user_id=3, specialization='legal', hourly_rate=100, availability=HOURS),
+    ])
+    db.session.commit()
+
+def book(consultant_id, client_id, start, minutes=60, status='confirmed'):
+    appointment = Appointment(consultant_id=consultant_id, client_id=client_id, start_time=start,
+                              end_time=start + timedelta(minutes=minutes), status=status,
+                              payment_status='pending')
+    db.session.add(appointment)
+    db.session.commit()
+    return appointment.id
+
+def slot(result, appointment_id):
+    return next(move['to'] for move in result['rescheduled'] if move['appointment_id'] == appointment_id)
+
+def test_day_off_moves_to_nearest_free_slots_without_conflicts(consultants, query_budget):
+    first = book(1, 100, MONDAY.replace(hour=9))
+    second = book(1, 101, MONDAY.replace(hour=10))
+    book(1, 102, MONDAY.replace(hour=9) + timedelta(days=1))           # Tuesday 9-10 already taken
+    book(2, 100, MONDAY.replace(hour=9) - timedelta(days=1))           # client 100's other booking
+    untouched = book(1, 103, MONDAY.replace(hour=9) + timedelta(days=2))
+
+    with query_budget(postgresql=6):
+        result = reschedule(1, (MONDAY, MONDAY + timedelta(days=1)), now=NOW)
+
+    assert result['unresolved'] == []
+    assert slot(result, first) == {'consultant_id': 1, 'start_time': '2030-01-06T11:00:00',
+                                   'end_time': '2030-01-06T12:00:00'}
+    assert slot(result, second)['consultant_id'] == 1
+    assert slot(result, second)['start_time'] == '2030-01-08T10:00:00'
+    saved = db.session.get(Appointment, first)
+    assert (saved.consultant_id, saved.start_time) == (1, datetime(2030, 1, 6, 11))
+    assert db.session.get(Appointment, untouched).start_time == MONDAY.replace(hour=9) + timedelta(days=2)
+
+def test_falls_back_to_same_specialization(consultants):
+    moved = book(1, 100, MONDAY.replace(hour=9))
+    db.session.add(SlotHold(consultant_id=2, client_id=200, start_time=MONDAY.replace(hour=9),
+                            end_time=MONDAY.replace(hour=10), status='active',
+                            expires_at=NOW + timedelta(days=30)))
+    db.session.commit()
+
+    result = reschedule(1, (NOW, NOW + timedelta(days=30)), search_days=3, now=NOW)
+
+    assert slot(result, moved) == {'consultant_id': 2, 'start_time': '2030-01-07T10:00:00',
+                                   'end_time': '2030-01-07T11:00:00'}
+
+def test_new_availability_and_dry_run(consultants):
+    early = book(1, 100, MONDAY.replace(hour=9))
+    late = book(1, 101, MONDAY.replace(hour=11))
+    hours = {str(day): {'start': 11, 'end': 12} for day in range(7)}
+
+    result = reschedule(1, availability=hours, search_days=0, dry_run=True, now=NOW)
+
+    assert result['rescheduled'][0]['to']['consultant_id'] == 2
+    assert [move['appointment_id'] for move in result['rescheduled']] == [early]
+    assert late not in result['unresolved']
+    assert db.session.get(Appointment, early).consultant_id == 1
+    assert db.session.get(Consultant, 1).availability == HOURS
+
+def test_capped_days_are_unavailable_and_counters_follow_moves(consultants):
+    counter = DailySessionCounter(fakeredis.FakeRedis())
+    monday, sunday, tuesday = MONDAY.date(), (MONDAY - timedelta(days=1)).date(), (MONDAY + timedelta(days=1)).date()
+    counter.rebuild({(1, monday): 1, (1, sunday): 1, (1, tuesday): 1}, {1: 1, 2: 1}, sunday, days=3)
+    moved = book(1, 100, MONDAY.replace(hour=9))
+
+    result = reschedule(1, (MONDAY, MONDAY + timedelta(days=1)), search_days=1, dry_run=True, now=NOW,
+                        session_counter=counter)
+
+    assert slot(result, moved)['consultant_id'] == 2
+    assert [counter.count(2, monday), counter.count(1, monday)] == [0, 1]
+
+    result = reschedule(1, (MONDAY, MONDAY + timedelta(days=1)), search_days=1, now=NOW,
+                        session_counter=counter)
+
+    assert slot(result, moved) == {'consultant_id': 2, 'start_time': '2030-01-07T09:00:00',
+                                   'end_time': '2030-01-07T10:00:00'}
+    assert [counter.count(2, monday), counter.count(1, monday)] == [1, 0]
+    assert [counter.count(1, sunday), counter.count(1, tuesday)] == [1, 1]
+
+@pytest.fixture
+def client(app, consultants):
+    app.config['JWT_SECRET_KEY'] = 'test-secret'
+    JWTManager(app)
+    app.register_blueprint(bp)
+    db.session.add_all([User(id=1, email='consultant@example.com', role='consultant'),
+                        User(id=100, email='client@example.com', role='client'),
+                        User(id=900, email='admin@example.com', role='admin')])
+    db.session.commit()
+    return app.test_client()
+
+def post_reschedule(client, consultant_id, user_id, body):
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+    return client.post(f'/api/consultants/{consultant_id}/reschedule', json=body, headers=headers)
+
+def test_route_allows_only_the_consultant_or_an_admin(client):
+    body = {'availability': HOURS, 'dry_run': True}
+
+    assert post_reschedule(client, 1, 100, body).status_code == 403
+    assert post_reschedule(client, 1, 1, body).status_code == 200
+    assert post_reschedule(client, 1, 900, body).status_code == 200
+
+def test_route_rejects_bad_input(client):
+    bad_date = {'unavailable_from': 'monday', 'unavailable_until': '2030-01-08', 'dry_run': True}
+
+    assert post_reschedule(client, 1, 1, bad_date).status_code == 400
+    assert post_reschedule(client, 1, 1, {'dry_run': True}).status_code == 400
+    assert post_reschedule(client, 99, 900, {'availability': HOURS, 'dry_run': True}).status_code == 404 
\ No newline at end of file
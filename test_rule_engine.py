@@ -1,9 +1,15 @@
+import os
+import subprocess
+import sys
 import pytest
 from datetime import datetime, timedelta
 from ..rule_engine.rule_peak_hours import is_peak_hour, get_peak_hour_multiplier
 from ..rule_engine.rule_availability import check_availability
 from ..rule_engine.rule_pricing import calculate_price
-from ..rule_engine.rule_validation import validate_booking
+from ..rule_engine.rule_validation import (
+    validate_booking, validate_bookings, compile_working_hours, VALID, INSUFFICIENT_NOTICE,
+    DURATION_TOO_LONG, DAY_UNAVAILABLE, OUTSIDE_WORKING_HOURS, INVALID_BOOKING
+)
 
 # Test data
 PEAK_HOURS_RULES = {
@@ -89,4 +95,40 @@ def test_validate_booking():
     booking_data["start_time"] = datetime.now().replace(hour=8, minute=0) + timedelta(days=1)
     is_valid, message = validate_booking(booking_data, consultant_data, rules)
     assert not is_valid
-    assert "working hours" in message 
\ No newline at end of file
+    assert "working hours" in message
+
+def test_rule_package_imports_without_app_stack():
+    """The pure rule functions must not drag in Flask or the data-store clients"""
+    package = __package__.rsplit('.', 1)[0] + '.rule_engine'
+    loaded = subprocess.run(
+        [sys.executable, '-c', f"import sys, {package}; print(' '.join(sys.modules))"],
+        check=True, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    ).stdout.split()
+
+    assert not {'flask', 'pymongo', 'mongoengine', 'sqlalchemy', 'redis'} & set(loaded)
+
+def test_validate_bookings_reason_codes():
+    now = datetime(2022, 12, 31, 12, 0)
+    consultant_data = {"working_hours": {"monday": {"start": "09:00", "end": "17:00"}}}
+    rules = {"min_notice_hours": 24, "max_duration_minutes": 120}
+    monday = datetime(2023, 1, 2)
+    bookings = [
+        {"start_time": monday.replace(hour=10), "duration": 60},
+        {"start_time": monday.replace(hour=16), "duration": 60},
+        {"start_time": monday.replace(hour=16, second=1), "duration": 60},
+        {"start_time": monday.replace(hour=8, minute=59), "duration": 30},
+        {"start_time": monday.replace(hour=10), "duration": 180},
+        {"start_time": monday + timedelta(days=1, hours=10), "duration": 60},
+        {"start_time": now + timedelta(hours=23), "duration": 60},
+        {"duration": 60}
+    ]
+
+    assert validate_bookings(bookings, consultant_data, rules, now=now) == [
+        VALID, VALID, OUTSIDE_WORKING_HOURS, OUTSIDE_WORKING_HOURS, DURATION_TOO_LONG,
+        DAY_UNAVAILABLE, INSUFFICIENT_NOTICE, INVALID_BOOKING
+    ]
+    working_hours = compile_working_hours(consultant_data["working_hours"])
+    assert working_hours[0] == (9 * 60, 17 * 60) and working_hours[1] is None
+    assert validate_bookings(bookings, {}, rules, working_hours=working_hours, now=now) == \
+        validate_bookings(bookings, consultant_data, rules, now=now)
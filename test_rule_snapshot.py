@@ -0,0 +1,61 @@
+import os
+from datetime import datetime
+import mongomock
+import pytest
+from ..models.mongodb.rules import RuleEngine
+from ..rule_engine.rule_snapshot import RuleSnapshot, SnapshotRules, publish_snapshot, read_version
+
+MONDAY = datetime(2023, 1, 2)
+
+@pytest.fixture
+def engine():
+    engine = RuleEngine('mongodb://localhost:27017', client=mongomock.MongoClient())
+    engine.add_peak_hour_rule('Monday', '9:0-11:0', 1.5)
+    engine.add_peak_hour_rule('Monday', '17:30-19:0', 1.2)
+    engine.add_consultant_rule('tech', True, 1200, 10)
+    engine.add_payment_rule('card', 5, ['email'])
+    return engine
+
+def test_snapshot_answers_like_rule_engine(engine, tmp_path):
+    path = str(tmp_path / 'rules.snap')
+    assert publish_snapshot(path, engine, [{'preference_type': 'specialization', 'value': 'tech', 'weight': 2.0}]) == 1
+    rules = SnapshotRules(path)
+
+    for hour in range(24):
+        for minute in (0, 30, 59):
+            time = MONDAY.replace(hour=hour, minute=minute)
+            assert (rules.get_peak_hour_multiplier('Monday', time) ==
+                    engine.get_peak_hour_multiplier('Monday', time))
+    assert rules.get_peak_hour_multiplier('Holiday', MONDAY) == 1.0
+    assert rules.get_consultant_hold_time('tech', True) == engine.get_consultant_hold_time('tech', True)
+    assert rules.get_consultant_hold_time('legal', False) == 900
+    assert rules.get_payment_verification_time('card') == 5
+    assert rules.get_payment_verification_time('wire') == 15
+    assert rules.snapshot().preference_weights == [('specialization', 'tech', 2.0)]
+
+def test_new_version_is_swapped_in(engine, tmp_path):
+    path = str(tmp_path / 'rules.snap')
+    publish_snapshot(path, engine)
+    rules = SnapshotRules(path, check_interval=0)
+    old = rules.snapshot()
+
+    engine.add_consultant_rule('legal', False, 600, 8)
+    assert publish_snapshot(path, engine) == 2
+    assert rules.get_consultant_hold_time('legal', False) == 600
+    assert rules.snapshot().version == read_version(path) == 2
+    # Lookups still holding the old version keep reading it
+    assert old.version == 1 and old.hold_times.get(('legal', False)) is None
+    assert [name for name in os.listdir(tmp_path)] == ['rules.snap']
+
+def test_bad_file_keeps_current_version(engine, tmp_path):
+    path = str(tmp_path / 'rules.snap')
+    publish_snapshot(path, engine)
+    rules = SnapshotRules(path, check_interval=0)
+    rules.snapshot()
+
+    with open(path + '.new', 'wb') as f:
+        f.write(b'not a snapshot' * 10)
+    os.replace(path + '.new', path)
+    assert rules.snapshot().version == 1
+    with pytest.raises(ValueError):
+        RuleSnapshot(path) 
\ No newline at end of file
@@ -0,0 +1,72 @@
+import json
+import pytest
+from flask import Flask, jsonify
+from ..services.instrumentation import notify_datastore_call
+from ..services.tracing import (
+    JsonLinesExporter, RingBufferExporter, configure_tracing, current_trace_id,
+    init_tracing, traced, tracer
+)
+
+@pytest.fixture
+def exporter():
+    exporter = RingBufferExporter()
+    configure_tracing(enabled=True, exporter=exporter)
+    yield exporter
+    configure_tracing(enabled=False, exporter=None)
+
+@traced()
+def lookup_rule():
+    notify_datastore_call('mongodb', 'find', 'climbup_rules.find', 0.002)
+    return current_trace_id()
+
+def test_child_spans_share_trace(exporter):
+    with tracer.span('book_appointment') as root:
+        trace_id = lookup_rule()
+
+    spans = {span.name: span for span in exporter.spans()}
+    assert trace_id == root.trace_id
+    assert spans['lookup_rule'].parent_id == root.span_id
+    assert spans['mongodb find'].parent_id == spans['lookup_rule'].span_id
+    assert spans['mongodb find'].duration_ms == pytest.approx(2.0)
+
+def test_disabled_tracing_records_nothing():
+    configure_tracing(enabled=False)
+
+    with tracer.span('ignored') as span:
+        assert span is None
+        assert lookup_rule() is None
+
+def test_error_marks_span(exporter):
+    with pytest.raises(ValueError):
+        with tracer.span('failing'):
+            raise ValueError('boom')
+
+    assert exporter.spans()[0].status == 'error'
+
+def test_json_lines_exporter(tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    configure_tracing(enabled=True, exporter=JsonLinesExporter(str(path)))
+    try:
+        with tracer.span('outer'):
+            with tracer.span('inner'):
+                pass
+    finally:
+        configure_tracing(enabled=False, exporter=None)
+
+    names = [json.loads(line)['name'] for line in path.read_text().splitlines()]
+    assert names == ['inner', 'outer']
+
+def test_request_trace_id_propagates(exporter):
+    app = Flask(__name__)
+    init_tracing(app)
+
+    @app.route('/api/availability')
+    def availability():
+        return jsonify({'trace_id': lookup_rule()})
+
+    response = app.test_client().get('/api/availability', headers={'X-Trace-Id': 'abc123'})
+
+    assert response.headers['X-Trace-Id'] == 'abc123'
+    assert response.get_json()['trace_id'] == 'abc123'
+    root = [span for span in exporter.spans() if span.parent_id is None][0]
+    assert root.name == 'GET /api/availability' 
\ No newline at end of file
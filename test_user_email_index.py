@@ -0,0 +1,65 @@
+import time
+import fakeredis
+import pytest
+from ..models.postgresql.models import db, User
+from ..services import user_email_index as user_email_index_module
+from ..services.user_email_index import UserEmailIndex
+
+@pytest.fixture
+def users(app):
+    db.session.add_all([User(id=1, email='ada@example.com', password='hash-1'),
+                        User(id=2, email='grace@example.com', password='hash-2')])
+    db.session.commit()
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(user_email_index_module.InstrumentedRedis, 'from_url',
+                        lambda url, **kwargs: fakeredis.FakeRedis(server=server))
+    return server
+
+@pytest.fixture
+def make_index(users, redis_server, tmp_path):
+    def make(**kwargs):
+        kwargs.setdefault('catch_up_interval', 3600)
+        index = UserEmailIndex(snapshot_path=str(tmp_path / 'user_emails.bloom'), **kwargs)
+        index.load()
+        return index
+    return make
+
+def register(user_id, email, password='hash'):
+    db.session.add(User(id=user_id, email=email, password=password))
+    db.session.commit()
+
+def test_unknown_email_skips_the_database(make_index, query_budget):
+    index = make_index()
+
+    with query_budget(postgresql=0):
+        assert index.lookup('nobody@example.com') is None
+    assert index.lookup('ada@example.com') == {'id': 1, 'password': 'hash-1'}
+
+def test_registration_reaches_other_workers(make_index):
+    here, there = make_index(), make_index()
+    register(3, 'new@example.com')
+
+    here.add('new@example.com')
+
+    deadline = time.monotonic() + 2
+    while 'new@example.com' not in there._bloom and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert there.lookup('new@example.com') == {'id': 3, 'password': 'hash'}
+
+def test_catch_up_finds_unannounced_registrations(make_index):
+    index = make_index(catch_up_interval=0)
+    register(3, 'quiet@example.com')  # No pub/sub message
+
+    assert index.lookup('quiet@example.com') == {'id': 3, 'password': 'hash'}
+
+def test_found_users_expire_from_the_cache(make_index):
+    index = make_index(positive_ttl=0)
+    assert index.lookup('ada@example.com')['password'] == 'hash-1'
+
+    db.session.get(User, 1).password = 'hash-changed'
+    db.session.commit()
+
+    assert index.lookup('ada@example.com')['password'] == 'hash-changed' 
\ No newline at end of file
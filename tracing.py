@@ -0,0 +1,252 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from flask import g, request
+from .instrumentation import add_datastore_listener, install_datastore_instrumentation
+
+TRACE_HEADER = 'X-Trace-Id'
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+class Span:
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_time',
+                 'duration_ms', 'attributes', 'status', '_started')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.duration_ms: Optional[float] = None
+        self.attributes = attributes or {}
+        self.status = 'ok'
+        self._started = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': self.start_time,
+            'duration_ms': round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+class SpanExporter:
+    """Base class for span exporters; export() is called once per finished span"""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+class RingBufferExporter(SpanExporter):
+    def __init__(self, capacity: int = 10000):
+        """Keep the most recent finished spans in memory"""
+        self._spans = deque(maxlen=capacity)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        """Finished spans, optionally only those of one trace"""
+        spans = list(self._spans)
+        if trace_id is not None:
+            spans = [span for span in spans if span.trace_id == trace_id]
+        return spans
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+class JsonLinesExporter(SpanExporter):
+    def __init__(self, path: str):
+        """Append each finished span as one JSON object per line"""
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+class _NoopSpanContext:
+    """Shared stand-in used while tracing is disabled"""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP = _NoopSpanContext()
+
+class _SpanContext:
+    __slots__ = ('tracer', 'span', 'token')
+
+    def __init__(self, tracer: 'Tracer', span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.finish()
+        if exc_type is not None:
+            self.span.status = 'error'
+            self.span.attributes['error'] = repr(exc)
+        _current_span.reset(self.token)
+        self.tracer.export(self.span)
+        return False
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporter] = None, enabled: bool = False):
+        self.exporter = exporter
+        self.enabled = enabled and exporter is not None
+
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes):
+        """
+        Context manager for a span that is a child of the current span.
+
+        Args:
+            name: Span name
+            trace_id: Trace to join when there is no current span (e.g. from a header)
+            **attributes: Initial span attributes
+
+        Returns:
+            Context manager yielding the Span, or None while tracing is disabled
+        """
+        if not self.enabled:
+            return _NOOP
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+        else:
+            span = Span(name, trace_id or os.urandom(16).hex(), None, attributes)
+        return _SpanContext(self, span)
+
+    def record(self, name: str, duration: float, **attributes) -> None:
+        """Record an already finished child span that lasted duration seconds"""
+        parent = _current_span.get()
+        if not self.enabled or parent is None:
+            return
+        span = Span(name, parent.trace_id, parent.span_id, attributes)
+        span.start_time -= duration
+        span.duration_ms = duration * 1000
+        self.export(span)
+
+    def export(self, span: Span) -> None:
+        try:
+            self.exporter.export(span)
+        except Exception:
+            # Tracing must never break the traced code
+            pass
+
+tracer = Tracer()
+
+def _record_datastore_span(store, operation, statement, duration, error):
+    if tracer.enabled:
+        tracer.record(f"{store} {operation}", duration, statement=statement[:500], error=error)
+
+def configure_tracing(enabled: Optional[bool] = None, exporter: Optional[SpanExporter] = None) -> Tracer:
+    """
+    Enable or disable tracing for the process.
+
+    Args:
+        enabled: Defaults to TRACING_ENABLED
+        exporter: Defaults to TRACING_EXPORTER ('ring' or 'jsonl', written to TRACING_FILE)
+
+    Returns:
+        Tracer: The process-wide tracer
+    """
+    if enabled is None:
+        enabled = os.getenv('TRACING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    if exporter is None and enabled:
+        if os.getenv('TRACING_EXPORTER', 'ring') == 'jsonl':
+            exporter = JsonLinesExporter(os.getenv('TRACING_FILE', 'logs/traces.jsonl'))
+        else:
+            exporter = RingBufferExporter(int(os.getenv('TRACING_RING_SIZE', 10000)))
+    tracer.exporter = exporter
+    tracer.enabled = bool(enabled) and exporter is not None
+    if tracer.enabled:
+        install_datastore_instrumentation()
+        add_datastore_listener(_record_datastore_span)
+    return tracer
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the active span, if any"""
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator wrapping each call in a span named after the function.
+
+    While tracing is disabled the wrapper only checks a flag and calls through.
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _start_request_span():
+    if not tracer.enabled:
+        return
+    route = request.url_rule.rule if request.url_rule else request.path
+    context = tracer.span(f"{request.method} {route}",
+                          trace_id=request.headers.get(TRACE_HEADER),
+                          endpoint=request.endpoint)
+    g._trace_context = context
+    context.__enter__()
+
+def _add_trace_header(response):
+    context = g.get('_trace_context')
+    if context is not None:
+        context.span.set_attribute('status', response.status_code)
+        response.headers[TRACE_HEADER] = context.span.trace_id
+    return response
+
+def _finish_request_span(exc):
+    context = g.pop('_trace_context', None)
+    if context is not None:
+        context.__exit__(type(exc) if exc else None, exc, None)
+
+def init_tracing(app) -> Tracer:
+    """
+    Trace every request of an app with a root span and data-store child spans.
+
+    An incoming X-Trace-Id header is joined; the trace ID is returned in the
+    same header.
+    """
+    if not tracer.enabled:
+        configure_tracing()
+    app.before_request(_start_request_span)
+    app.after_request(_add_trace_header)
+    app.teardown_request(_finish_request_span)
+    return tracer 
\ No newline at end of file
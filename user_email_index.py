@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from ..models.postgresql.models import User, db
+from .bloom_filter import BloomFilter
+from .instrumentation import InstrumentedRedis
+from .logging_service import log_info, log_warning
+
+CHANNEL = 'user_emails:registered'
+
+class UserEmailIndex:
+    def __init__(self, snapshot_path: Optional[str] = None, lru_size: Optional[int] = None,
+                 error_rate: float = 0.001, catch_up_interval: Optional[float] = None,
+                 redis_url: Optional[str] = None, positive_ttl: Optional[float] = None):
+        """
+        Per-worker user-by-email lookups that skip the database for unknown emails.
+
+        A Bloom filter over every registered email answers "definitely not
+        registered" without a query; a small LRU holds recently found users
+        for positive_ttl seconds, so a changed password hash is picked up
+        without an invalidation message. Registrations in other workers
+        arrive over Redis pub/sub, and a periodic catch-up query on
+        users.created_at covers missed messages.
+
+        Call load() after the fork (gunicorn's post_worker_init does, through
+        warm_up) so building the filter never lands on a login request.
+
+        Args:
+            snapshot_path: Filter snapshot for warm start, defaults to USER_BLOOM_SNAPSHOT
+            lru_size: Positive lookups kept, defaults to USER_LOOKUP_LRU_SIZE or 1024
+            error_rate: Bloom filter false-positive rate
+            catch_up_interval: Seconds between catch-up queries, defaults to USER_BLOOM_CATCH_UP_SECONDS or 30
+            redis_url: Pub/sub server, defaults to REDIS_URL
+            positive_ttl: Seconds a found user is cached, defaults to USER_LOOKUP_TTL_SECONDS or 60
+        """
+        self.snapshot_path = snapshot_path or os.getenv('USER_BLOOM_SNAPSHOT', 'cache/user_emails.bloom')
+        self.lru_size = lru_size or int(os.getenv('USER_LOOKUP_LRU_SIZE', 1024))
+        self.error_rate = error_rate
+        self.catch_up_interval = catch_up_interval if catch_up_interval is not None else float(
+            os.getenv('USER_BLOOM_CATCH_UP_SECONDS', 30))
+        self.redis_url = redis_url or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.positive_ttl = positive_ttl if positive_ttl is not None else float(
+            os.getenv('USER_LOOKUP_TTL_SECONDS', 60))
+        self._bloom: Optional[BloomFilter] = None
+        self._positive: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        self._last_catch_up = 0.0
+        self._pid: Optional[int] = None
+        self._redis = None
+
+    def load(self) -> None:
+        """Load or build this worker's filter and subscribe to registrations; call after the fork"""
+        self._ensure_loaded()
+
+    def _ensure_loaded(self) -> BloomFilter:
+        # Loaded once per process, so each worker subscribes itself; load()
+        # does it at startup, lookups only if that failed
+        if self._bloom is not None and self._pid == os.getpid():
+            return self._bloom
+        with self._lock:
+            if self._bloom is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._bloom = self._load_snapshot()
+                if self._bloom is None:
+                    self.rebuild()
+                else:
+                    self._catch_up()
+                self._subscribe()
+        return self._bloom
+
+    def _load_snapshot(self) -> Optional[BloomFilter]:
+        try:
+            bloom = BloomFilter.load(self.snapshot_path)
+            log_info("Loaded user email filter snapshot with %d entries", bloom.count)
+            return bloom
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log_warning("Ignoring user email filter snapshot: %s", e)
+            return None
+
+    def rebuild(self) -> None:
+        """Rebuild the filter from the users table and save a snapshot"""
+        built_at = time.time()
+        total = db.session.query(db.func.count(User.id)).scalar() or 0
+        bloom = BloomFilter.for_capacity(max(total * 2, 10000), self.error_rate)
+        for (email,) in db.session.query(User.email).yield_per(10000):
+            bloom.add(email)
+        bloom.built_at = built_at
+        with self._lock:
+            self._bloom = bloom
+            self._last_catch_up = time.monotonic()
+        log_info("Rebuilt user email filter with %d entries", bloom.count)
+        self.save_snapshot()
+
+    def save_snapshot(self) -> None:
+        try:
+            self._bloom.save(self.snapshot_path)
+        except OSError as e:
+            log_warning("Failed to save user email filter snapshot: %s", e)
+
+    def _catch_up(self) -> None:
+        """Add users created since the filter was last brought up to date"""
+        bloom = self._bloom
+        # Overlap a little to allow for clock skew between app and database
+        since = datetime.utcfromtimestamp(bloom.built_at) - timedelta(seconds=60)
+        checked_at = time.time()
+        added = 0
+        for (email,) in db.session.query(User.email).filter(User.created_at >= since):
+            if email not in bloom:
+                bloom.add(email)
+                added += 1
+        bloom.built_at = checked_at
+        self._last_catch_up = time.monotonic()
+        if bloom.count > bloom.capacity:
+            self.rebuild()
+        elif added:
+            self.save_snapshot()
+
+    def _subscribe(self) -> None:
+        try:
+            self._redis = InstrumentedRedis.from_url(self.redis_url)
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{CHANNEL: self._on_registered})
+            pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        except Exception as e:
+            self._redis = None
+            log_warning("User email pub/sub unavailable, relying on catch-up queries: %s", e)
+
+    def _on_registered(self, message) -> None:
+        email = message['data']
+        if isinstance(email, bytes):
+            email = email.decode('utf-8')
+        with self._lock:
+            if email not in self._bloom:
+                self._bloom.add(email)
+
+    def lookup(self, email: str) -> Optional[Dict]:
+        """
+        Find a user's id and password hash by email.
+
+        Returns:
+            Optional[dict]: {'id', 'password'} or None if no such user; emails
+            the filter rules out never reach the database
+        """
+        bloom = self._ensure_loaded()
+        if email not in bloom:
+            if time.monotonic() - self._last_catch_up < self.catch_up_interval:
+                return None
+            with self._lock:
+                self._catch_up()
+            if email not in self._bloom:
+                return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._positive.get(email)
+            if entry is not None:
+                record, expires_at = entry
+                if expires_at > now:
+                    self._positive.move_to_end(email)
+                    return record
+                del self._positive[email]
+
+        user = User.query.filter_by(email=email).first()
+        if user is None:
+            return None
+        record = {'id': user.id, 'password': user.password}
+        with self._lock:
+            self._positive[email] = (record, now + self.positive_ttl)
+            if len(self._positive) > self.lru_size:
+                self._positive.popitem(last=False)
+        return record
+
+    def add(self, email: str) -> None:
+        """Record a new registration here and in every other worker"""
+        self._ensure_loaded()
+        with self._lock:
+            self._bloom.add(email)
+        if self._redis is not None:
+            try:
+                self._redis.publish(CHANNEL, email)
+            except Exception as e:
+                log_warning("Failed to publish user registration: %s", e)
+
+    def invalidate(self, email: str) -> None:
+        """Drop a cached positive lookup, e.g. after a password change"""
+        with self._lock:
+            self._positive.pop(email, None)
+
+user_email_index = UserEmailIndex() 
\ No newline at end of file
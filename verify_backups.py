@@ -3,12 +3,8 @@ import os
 import datetime
 import logging
 from pathlib import Path
+from services.logging_service import configure_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 def verify_postgres_backup(backup_file):
@@ -77,6 +73,8 @@ def check_backup_schedule():
         return False
 
 if __name__ == "__main__":
+    configure_logging()
+    
     # Create backup directory if it doesn't exist
     Path("/backup").mkdir(parents=True, exist_ok=True)
     